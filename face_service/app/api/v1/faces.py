@@ -1,23 +1,49 @@
 import json
+from contextlib import ExitStack
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, File, Form, UploadFile
+import numpy as np
+from fastapi import APIRouter, File, Form, Header, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
-from app.schemas.face import RecognizeRequest
-from app.services import embedding_store, id_map_store, matcher
+from app.core.config import settings
+from app.core.exceptions import FaceException
+from app.engine.tracker import face_tracker
+from app.schemas.face import BatchFrameMeta, BatchFrameResponse, RecognizeRequest
+from app.services import tenant_registry
 from app.services.retention_service import purge_unknown_images
-from app.services.recognition_service import recognize
+from app.services.recognition_service import decode_image_bytes, recognize_async, recognize_frames_async, recognize_image_async
 from app.services.registration_service import delete_face as delete_face_service
 from app.services.registration_service import register_faces as register_faces_service
+from app.vector.tenants import ORGANIZATION_ID_PATTERN
 
 
 router = APIRouter(prefix="/faces", tags=["Faces"])
 
 
+async def _lease(stack: ExitStack, organization_id: str | None):
+    # A cold tenant is loaded from disk, so the lease is taken in the threadpool; it is released with `stack`.
+    return await run_in_threadpool(stack.enter_context, tenant_registry.lease(organization_id))
+
+
+def _register(organization_id: str | None, user_id: str, images: list[UploadFile], policies: dict) -> dict:
+    with tenant_registry.lease(organization_id) as partition:
+        return register_faces_service(
+            user_id=user_id,
+            images=images,
+            store=partition.store,
+            id_map=partition.id_map,
+            policies=policies,
+        )
+
+
 @router.post("/register")
 async def register_faces(
     user_id: str = Form(...),
     images: list[UploadFile] = File(...),
     policy_json: str | None = Form(None),
+    organization_id: str | None = Form(None, pattern=ORGANIZATION_ID_PATTERN),
 ):
     policies = {}
     if policy_json:
@@ -26,40 +52,169 @@ async def register_faces(
         except json.JSONDecodeError:
             policies = {}
 
-    data = register_faces_service(
-        user_id=user_id,
-        images=images,
-        store=embedding_store,
-        id_map=id_map_store,
-        policies=policies,
-    )
-
+    data = await run_in_threadpool(_register, organization_id, user_id, images, policies)
     return {
         "success": True,
         "code": "FACE_REGISTERED",
         "message": "Face registered successfully",
         "data": data,
-        "meta": {"images_received": len(images)},
+        "meta": {"images_received": len(images), "organization_id": organization_id},
         "errors": [],
     }
 
 
 @router.post("/recognize")
-def recognize_faces(payload: RecognizeRequest):
-    response = recognize(payload, matcher)
+async def recognize_faces(payload: RecognizeRequest):
+    with ExitStack() as stack:
+        partition = await _lease(stack, payload.organization_id)
+        response = await recognize_async(payload, partition.matcher)
+    return {
+        "success": True,
+        "code": "FACE_RECOGNIZED",
+        "message": "Recognition completed",
+        "data": response.model_dump(),
+        "meta": {"source_id": payload.source_id, "organization_id": payload.organization_id},
+        "errors": [],
+    }
+
+
+def _parse_face_boxes(value: str | None) -> list[list[int]] | None:
+    if not value:
+        return None
+    try:
+        boxes = json.loads(value)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(boxes, list) or not all(
+        isinstance(box, list) and len(box) == 4 and all(isinstance(v, int) for v in box) for box in boxes
+    ):
+        return None
+    return boxes
+
+
+@router.post("/recognize/raw")
+async def recognize_faces_raw(
+    request: Request,
+    x_source_type: str = Header(...),
+    x_source_id: str = Header(...),
+    x_timestamp: datetime | None = Header(None),
+    x_organization_id: str | None = Header(None, pattern=ORGANIZATION_ID_PATTERN),
+    x_policy: str | None = Header(None),
+    x_face_boxes: str | None = Header(None),
+):
+    """Encoded image bytes as the body (application/octet-stream); metadata travels in X-* headers.
+
+    X-Face-Boxes optionally carries a JSON list of [x1, y1, x2, y2] boxes the caller already detected.
+    """
+    policy = {}
+    if x_policy:
+        try:
+            policy = json.loads(x_policy)
+        except json.JSONDecodeError:
+            policy = {}
+
+    raw = await request.body()
+    img = await run_in_threadpool(decode_image_bytes, raw)
+    tracks = face_tracker.for_source(x_organization_id, x_source_id, x_source_type)
+    with ExitStack() as stack:
+        partition = await _lease(stack, x_organization_id)
+        response = await recognize_image_async(
+            img,
+            source_type=x_source_type,
+            source_id=x_source_id,
+            timestamp=x_timestamp or datetime.now(timezone.utc),
+            policy=policy if isinstance(policy, dict) else {},
+            matcher=partition.matcher,
+            tracks=tracks,
+            face_boxes=_parse_face_boxes(x_face_boxes),
+        )
     return {
         "success": True,
         "code": "FACE_RECOGNIZED",
         "message": "Recognition completed",
         "data": response.model_dump(),
-        "meta": {"source_id": payload.source_id},
+        "meta": {"source_id": x_source_id, "organization_id": x_organization_id, "bytes_received": len(raw)},
+        "errors": [],
+    }
+
+
+def _parse_batch_metadata(metadata: str, frame_count: int) -> list[BatchFrameMeta]:
+    if frame_count > settings.RECOGNIZE_BATCH_MAX_FRAMES:
+        raise FaceException(400, "BATCH_TOO_LARGE", f"At most {settings.RECOGNIZE_BATCH_MAX_FRAMES} frames per batch")
+    try:
+        items = json.loads(metadata)
+        if not isinstance(items, list):
+            raise ValueError("metadata must be a JSON array")
+        parsed = [BatchFrameMeta.model_validate(item) for item in items]
+    except (ValueError, ValidationError) as exc:
+        raise FaceException(400, "INVALID_BATCH_METADATA", str(exc)) from exc
+    if len(parsed) != frame_count:
+        raise FaceException(400, "INVALID_BATCH_METADATA", "metadata must have one entry per frame")
+    return parsed
+
+
+def _decode_frames(raw_frames: list[bytes]) -> list[np.ndarray | None]:
+    images = []
+    for raw in raw_frames:
+        try:
+            images.append(decode_image_bytes(raw))
+        except FaceException:
+            images.append(None)
+    return images
+
+
+async def _recognize_batch(raw_frames: list[bytes], metas: list[BatchFrameMeta]) -> list[BatchFrameResponse]:
+    images = await run_in_threadpool(_decode_frames, raw_frames)
+    with ExitStack() as stack:
+        partitions = {}
+        for meta in metas:
+            if meta.organization_id not in partitions:
+                partitions[meta.organization_id] = await _lease(stack, meta.organization_id)
+
+        frames = []
+        for img, meta in zip(images, metas):
+            frames.append(
+                {
+                    "img": img,
+                    "source_type": meta.source_type,
+                    "source_id": meta.source_id,
+                    "timestamp": meta.timestamp or datetime.now(timezone.utc),
+                    "policy": meta.policy,
+                    "matcher": partitions[meta.organization_id].matcher,
+                    "tracks": face_tracker.for_source(meta.organization_id, meta.source_id, meta.source_type),
+                    "face_boxes": meta.face_boxes,
+                }
+            )
+        responses = await recognize_frames_async(frames)
+    return [
+        BatchFrameResponse(frame_index=i, source_id=meta.source_id, **response.model_dump())
+        for i, (meta, response) in enumerate(zip(metas, responses))
+    ]
+
+
+@router.post("/recognize/batch")
+async def recognize_faces_batch(
+    frames: list[UploadFile] = File(...),
+    metadata: str = Form(...),
+):
+    """N encoded frames plus a JSON array with one {source_type, source_id, ...} entry per frame."""
+    metas = _parse_batch_metadata(metadata, len(frames))
+    raw_frames = [await frame.read() for frame in frames]
+    responses = await _recognize_batch(raw_frames, metas)
+    return {
+        "success": True,
+        "code": "FACES_RECOGNIZED_BATCH",
+        "message": "Batch recognition completed",
+        "data": {"frames": [response.model_dump() for response in responses]},
+        "meta": {"frames_received": len(frames)},
         "errors": [],
     }
 
 
 @router.delete("/{face_id}")
-def delete_face(face_id: str):
-    data = delete_face_service(face_id, embedding_store, id_map_store)
+def delete_face(face_id: str, organization_id: str | None = Query(None, pattern=ORGANIZATION_ID_PATTERN)):
+    with tenant_registry.lease(organization_id) as partition:
+        data = delete_face_service(face_id, partition.store, partition.id_map)
     return {
         "success": True,
         "code": "FACE_DELETED",
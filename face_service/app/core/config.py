@@ -9,13 +9,98 @@ class FaceSettings(BaseSettings):
 
     # Model
     MODEL_PATH: str = "./models/arc.onnx"
+    # fp32 | int8. int8 loads MODEL_INT8_PATH (made by scripts/ops/quantize_embedder.py)
+    # and falls back to MODEL_PATH when that file is missing.
+    EMBEDDING_PRECISION: str = "fp32"
+    MODEL_INT8_PATH: str = "./models/arc.int8.onnx"
     EMBEDDING_DIM: int = 512
     FACE_TECH_ROOT: str = "../Face-Tech"
     RETINAFACE_FALLBACK_TO_HAAR: bool = True
+    # Face detector: auto | scrfd | retinaface | haar. "auto" uses the SCRFD ONNX model
+    # when DETECTOR_MODEL_PATH exists, then the retinaface package, then Haar.
+    DETECTOR_BACKEND: str = "auto"
+    DETECTOR_MODEL_PATH: str = "./models/det_10g.onnx"
+    DETECTOR_INPUT_SIZE: int = 640
+    DETECTOR_SCORE_THRESHOLD: float = 0.5
+    DETECTOR_NMS_THRESHOLD: float = 0.4
+    # template: similarity transform from landmarks to the ArcFace 112x112 template.
+    # legacy: eye-line rotation + padded box crop (matches galleries enrolled before template alignment).
+    # Switch to template only after re-enrolling every face; the two modes' embeddings do not match.
+    ALIGNMENT_MODE: str = "legacy"
+    EMBEDDING_MAX_BATCH_SIZE: int = 32
+    # Bind the embedder's preallocated output buffer with ONNX Runtime IO binding.
+    EMBEDDING_IO_BINDING: bool = True
+    RECOGNIZE_BATCH_MAX_FRAMES: int = 64
+    # Detect faces on a copy resized to this long side (0 = full resolution); alignment
+    # still crops from the original image. Policy "detection.long_side_px" overrides it.
+    DETECTION_LONG_SIDE_PX: int = 1280
+    # Camera faces are tracked across frames; a track is embedded once it has
+    # FACE_TRACK_MIN_HITS detections and again only while below the recheck confidence.
+    # Keep it at 1 for low sampling rates: at 1 fps a passer-by may be in a single frame.
+    FACE_TRACKING_ENABLED: bool = True
+    FACE_TRACK_IOU_THRESHOLD: float = 0.3
+    FACE_TRACK_MIN_HITS: int = 1
+    FACE_TRACK_MAX_AGE_SECONDS: float = 3.0
+    FACE_TRACK_RECHECK_CONFIDENCE: float = 0.9
+    # A cached identity is re-checked after this long or this many reuses, whichever comes first,
+    # so a person who steps into the box someone else just left is not reported as them.
+    FACE_TRACK_IDENTITY_TTL_SECONDS: float = 2.0
+    FACE_TRACK_IDENTITY_MAX_REUSES: int = 4
+    # Face boxes sent by the caller (main_app's wall-camera check): "refine" runs the
+    # detector only around them, "trust" uses them as-is, "ignore" detects on the full frame.
+    FACE_HINT_MODE: str = "refine"
+    FACE_HINT_MARGIN: float = 0.25
+
+    # Inference
+    # ONNX Runtime session options; thread counts of 0 keep the runtime defaults.
+    ONNX_INTRA_OP_THREADS: int = 0
+    ONNX_INTER_OP_THREADS: int = 0
+    # sequential | parallel (parallel only helps graphs with independent branches)
+    ONNX_EXECUTION_MODE: str = "sequential"
+    # disable | basic | extended | all
+    ONNX_GRAPH_OPTIMIZATION_LEVEL: str = "all"
+    ONNX_ENABLE_CPU_MEM_ARENA: bool = True
+    ONNX_ENABLE_MEM_PATTERN: bool = True
+    # Optimized graphs are saved here on first load and reused on restart ("" disables).
+    ONNX_OPTIMIZED_MODEL_DIR: str = "./models/optimized"
+    # Worker processes for detection/alignment/embedding (0 = run in the API process).
+    # Each worker pins its sessions to INFERENCE_POOL_INTRA_OP_THREADS threads.
+    INFERENCE_POOL_SIZE: int = 0
+    INFERENCE_POOL_INTRA_OP_THREADS: int = 1
+    # Models load on first use; startup warm-up loads them and runs dummy batches,
+    # and /ready answers 503 until it is done.
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 120.0
 
     # FAISS
     FAISS_INDEX_PATH: str = "./storage/embeddings/faiss.index"
+    FAISS_ID_MAP_DB_PATH: str = "./storage/embeddings/id_map.sqlite3"
+    # Legacy JSON map, imported into FAISS_ID_MAP_DB_PATH once on startup.
     FAISS_ID_MAP_PATH: str = "./storage/embeddings/id_map.json"
+    # Per-organization indexes live in <TENANT_INDEX_ROOT>/<organization_id>/. Off by default:
+    # existing enrollments are in the shared index until scripts/ops/split_tenant_index.py
+    # has copied them out, so turn this on only after running it.
+    TENANT_PARTITIONING_ENABLED: bool = False
+    TENANT_INDEX_ROOT: str = "./storage/embeddings/tenants"
+    TENANT_MAX_LOADED: int = 32
+    # flat | ivf_flat | hnsw | ivf_pq
+    FAISS_INDEX_TYPE: str = "flat"
+    FAISS_IVF_NLIST: int = 1024
+    # 0 means the FAISS recommendation of 39 training points per IVF list.
+    FAISS_IVF_TRAIN_MIN_VECTORS: int = 0
+    FAISS_PQ_M: int = 64
+    FAISS_PQ_NBITS: int = 8
+    FAISS_HNSW_M: int = 32
+    FAISS_NPROBE: int = 16
+    FAISS_EF_SEARCH: int = 64
+    # Index changes are fsync'd to a write-ahead log; full snapshots are written in the background.
+    FAISS_WAL_FSYNC: bool = True
+    FAISS_CHECKPOINT_INTERVAL_SECONDS: float = 60.0
+    # Memory-map the checkpointed gallery instead of reading it into each worker's RAM.
+    # Flat indexes switch to a raw .npy layout; IVF/HNSW indexes load normally.
+    FAISS_MMAP_LOAD: bool = False
+    # Storage precision of the NumPy fallback index used when FAISS is unavailable.
+    MEMORY_INDEX_FLOAT16: bool = False
 
     # Storage
     STORAGE_ROOT: str = "./storage"
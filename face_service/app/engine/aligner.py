@@ -1,60 +1,127 @@
 import cv2
 import numpy as np
 
+from app.core.config import settings
+
+OUTPUT_SIZE = 112
+
+# ArcFace 112x112 reference points, listed in LANDMARK_ORDER (image-left eye first).
+ARCFACE_TEMPLATE = np.array(
+    [
+        [38.2946, 51.6963],
+        [73.5318, 51.5014],
+        [56.0252, 71.7366],
+        [41.5493, 92.3655],
+        [70.7299, 92.2041],
+    ],
+    dtype=np.float64,
+)
+LANDMARK_ORDER = ("right_eye", "left_eye", "nose", "mouth_right", "mouth_left")
+ALIGNMENT_MODES = ("legacy", "template")
+
+
+def similarity_transform(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Least-squares rotation + uniform scale + translation mapping src points onto dst (Umeyama)."""
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    src_mean, dst_mean = src.mean(axis=0), dst.mean(axis=0)
+    src_c, dst_c = src - src_mean, dst - dst_mean
+    U, S, Vt = np.linalg.svd(dst_c.T @ src_c / src.shape[0])
+    d = np.array([1.0, 1.0 if np.linalg.det(U) * np.linalg.det(Vt) >= 0 else -1.0])
+    R = U @ np.diag(d) @ Vt
+    scale = float((S * d).sum() / max((src_c ** 2).sum() / src.shape[0], 1e-12))
+    t = dst_mean - scale * R @ src_mean
+    return np.hstack([scale * R, t[:, None]])
+
+
+def _resize_matrix(x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+    # Same sampling grid cv2.resize uses when stretching the crop to OUTPUT_SIZE.
+    sx = OUTPUT_SIZE / float(x2 - x1)
+    sy = OUTPUT_SIZE / float(y2 - y1)
+    return np.array(
+        [
+            [sx, 0.0, 0.5 * sx - 0.5 - x1 * sx],
+            [0.0, sy, 0.5 * sy - 0.5 - y1 * sy],
+        ]
+    )
+
+
+def _compose(outer: np.ndarray, inner: np.ndarray) -> np.ndarray:
+    combined = outer[:, :2] @ inner
+    combined[:, 2] += outer[:, 2]
+    return combined
+
+
 class FaceAligner:
-    @staticmethod
-    def _rotate_point(M: np.ndarray, point: tuple[float, float]) -> tuple[int, int]:
-        x, y = point
-        new_x = M[0, 0] * x + M[0, 1] * y + M[0, 2]
-        new_y = M[1, 0] * x + M[1, 1] * y + M[1, 2]
-        return int(new_x), int(new_y)
+    """Warps each face straight into a 112x112 crop with one warpAffine.
+
+    `template` mode maps the detector's landmarks onto the ArcFace template
+    with a similarity transform. `legacy` reproduces the old eye-line rotation
+    + padded crop + resize as a single matrix, for galleries enrolled before
+    template alignment. Without landmarks both modes stretch the padded box.
 
-    def _rotate_bbox(self, box: list[int], M: np.ndarray) -> tuple[int, int, int, int]:
+    Embeddings from the two modes are not comparable, so `template` is opt-in
+    and needs a re-enrolled gallery.
+    """
+
+    def __init__(self, mode: str | None = None):
+        self.mode = (mode or settings.ALIGNMENT_MODE).strip().lower()
+        if self.mode not in ALIGNMENT_MODES:
+            raise ValueError(f"Unsupported ALIGNMENT_MODE '{self.mode}', expected one of {', '.join(ALIGNMENT_MODES)}")
+
+    @staticmethod
+    def _padded_box(box: list[int], width: int, height: int) -> tuple[int, int, int, int]:
         x1, y1, x2, y2 = box
-        p1 = (x1, y1)
-        p2 = (x2, y1)
-        p3 = (x2, y2)
-        p4 = (x1, y2)
-
-        rp1 = self._rotate_point(M, p1)
-        rp2 = self._rotate_point(M, p2)
-        rp3 = self._rotate_point(M, p3)
-        rp4 = self._rotate_point(M, p4)
-
-        min_x = min(rp1[0], rp2[0], rp3[0], rp4[0])
-        max_x = max(rp1[0], rp2[0], rp3[0], rp4[0])
-        min_y = min(rp1[1], rp2[1], rp3[1], rp4[1])
-        max_y = max(rp1[1], rp2[1], rp3[1], rp4[1])
-        return min_x, min_y, max_x, max_y
+        pad = int((x2 - x1) * 0.1)
+        cx1, cy1 = max(0, x1 - pad), max(0, y1 - pad)
+        cx2, cy2 = min(width, x2 + pad), min(height, y2 + pad)
+        if cx2 <= cx1 or cy2 <= cy1:
+            cx1, cy1 = max(0, x1), max(0, y1)
+            cx2, cy2 = max(min(width, x2), cx1 + 1), max(min(height, y2), cy1 + 1)
+        return cx1, cy1, cx2, cy2
+
+    def _template_matrix(self, landmarks: dict) -> np.ndarray | None:
+        names = [name for name in LANDMARK_ORDER if name in landmarks]
+        if "left_eye" not in names or "right_eye" not in names:
+            return None
+        src = np.array([landmarks[name] for name in names], dtype=np.float64)
+        dst = ARCFACE_TEMPLATE[[LANDMARK_ORDER.index(name) for name in names]]
+        return similarity_transform(src, dst)
+
+    def _legacy_matrix(self, box: list[int], landmarks: dict, width: int, height: int) -> np.ndarray:
+        left_eye = np.asarray(landmarks["left_eye"], dtype=np.float64)
+        right_eye = np.asarray(landmarks["right_eye"], dtype=np.float64)
+        dx, dy = right_eye - left_eye
+        angle = np.degrees(np.arctan2(dy, dx)) - 180.0
+        center = (int((left_eye[0] + right_eye[0]) / 2.0), int((left_eye[1] + right_eye[1]) / 2.0))
+        rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
 
-    def align(self, image: np.ndarray, box: list[int], landmarks: dict | None = None) -> np.ndarray:
         x1, y1, x2, y2 = box
+        corners = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float64)
+        rotated = (corners @ rotation[:, :2].T + rotation[:, 2]).astype(np.int64)
+        rbox = [int(rotated[:, 0].min()), int(rotated[:, 1].min()), int(rotated[:, 0].max()), int(rotated[:, 1].max())]
+        return _compose(_resize_matrix(*self._padded_box(rbox, width, height)), rotation)
 
+    def transform(self, image: np.ndarray, box: list[int], landmarks: dict | None = None) -> np.ndarray:
+        """2x3 matrix from image pixels to the 112x112 aligned face."""
+        h, w = image.shape[:2]
         if landmarks and "left_eye" in landmarks and "right_eye" in landmarks:
-            left_eye = landmarks["left_eye"]
-            right_eye = landmarks["right_eye"]
-            dx = float(right_eye[0]) - float(left_eye[0])
-            dy = float(right_eye[1]) - float(left_eye[1])
-            angle = np.degrees(np.arctan2(dy, dx)) - 180.0
-            eyes_center = (
-                int((float(left_eye[0]) + float(right_eye[0])) / 2.0),
-                int((float(left_eye[1]) + float(right_eye[1])) / 2.0),
-            )
-            M = cv2.getRotationMatrix2D(eyes_center, angle, 1.0)
-            image = cv2.warpAffine(image, M, (image.shape[1], image.shape[0]), flags=cv2.INTER_CUBIC)
-            x1, y1, x2, y2 = self._rotate_bbox([x1, y1, x2, y2], M)
+            if self.mode == "legacy":
+                return self._legacy_matrix(box, landmarks, w, h)
+            matrix = self._template_matrix(landmarks)
+            if matrix is not None:
+                return matrix
+        return _resize_matrix(*self._padded_box(box, w, h))
+
+    def align(self, image: np.ndarray, box: list[int], landmarks: dict | None = None) -> np.ndarray:
+        # Only the 112x112 output is sampled, so the cost does not depend on the frame size.
+        return cv2.warpAffine(
+            image,
+            self.transform(image, box, landmarks),
+            (OUTPUT_SIZE, OUTPUT_SIZE),
+            flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_CONSTANT,
+        )
 
-        pad = int((x2 - x1) * 0.1)
-        h, w = image.shape[:2]
-        crop_x1 = max(0, x1 - pad)
-        crop_y1 = max(0, y1 - pad)
-        crop_x2 = min(w, x2 + pad)
-        crop_y2 = min(h, y2 + pad)
-
-        cropped = image[crop_y1:crop_y2, crop_x1:crop_x2]
-        if cropped.size == 0:
-            cropped = image[max(0, y1):min(h, y2), max(0, x1):min(w, x2)]
-        aligned = cv2.resize(cropped, (112, 112))
-        return aligned
 
 aligner = FaceAligner()
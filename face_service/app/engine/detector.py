@@ -1,65 +1,139 @@
+import threading
+
 import cv2
 import numpy as np
 from app.core.config import settings
+from app.engine.detector_backends import DetectorBackend, create_detector_backend
 from ..core.exceptions import FaceException
 
-try:
-    from retinaface import RetinaFace  # type: ignore
-except Exception:  # pragma: no cover
-    RetinaFace = None
-
 class FaceDetector:
-    def __init__(self):
-        # Fallback detector used when RetinaFace package is unavailable.
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    def __init__(self, backend: DetectorBackend | None = None):
+        # Chosen by DETECTOR_BACKEND on first use, so a missing model only fails detection calls.
+        self._backend = backend
+        self._backend_lock = threading.Lock()
 
-    def detect(self, image: np.ndarray, min_laplacian_variance: float | None = None):
-        # image expected as uncompressed numpy array (BGR from cv2.imdecode)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    @property
+    def backend(self) -> DetectorBackend:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = create_detector_backend()
+        return self._backend
 
+    def _check_blur(self, gray: np.ndarray, min_laplacian_variance: float | None) -> None:
         # Blur check using Laplacian variance
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
         threshold = float(min_laplacian_variance) if min_laplacian_variance is not None else float(settings.QUALITY_MIN_LAPLACIAN_VARIANCE)
         if laplacian_var < threshold:
              raise FaceException(400, "IMAGE_QUALITY_TOO_LOW", f"Image blur variance too low: {laplacian_var:.2f}")
 
-        if RetinaFace is not None:
-            detected = RetinaFace.detect_faces(image)
-            if not isinstance(detected, dict):
-                return []
-            results = []
-            for face in detected.values():
-                facial_area = face.get("facial_area")
-                if not facial_area or len(facial_area) != 4:
-                    continue
-                results.append(
-                    {
-                        "box": [int(facial_area[0]), int(facial_area[1]), int(facial_area[2]), int(facial_area[3])],
-                        "score": float(face.get("score", 0.0)),
-                        "landmarks": face.get("landmarks") or {},
-                    }
-                )
-            return results
+    @staticmethod
+    def _detection_scale(image: np.ndarray, long_side: int | None) -> float:
+        limit = settings.DETECTION_LONG_SIDE_PX if long_side is None else int(long_side)
+        largest = max(image.shape[:2])
+        return limit / float(largest) if limit and largest > limit else 1.0
 
-        if not settings.RETINAFACE_FALLBACK_TO_HAAR:
-            raise FaceException(500, "RETINAFACE_UNAVAILABLE", "RetinaFace dependency is not installed")
+    def detect(self, image: np.ndarray, min_laplacian_variance: float | None = None, long_side: int | None = None):
+        # image expected as uncompressed numpy array (BGR from cv2.imdecode)
+        return self.detect_batch([image], min_laplacian_variance=min_laplacian_variance, long_side=long_side)[0]
+
+    def detect_batch(
+        self,
+        images: list[np.ndarray],
+        min_laplacian_variance: float | list[float | None] | None = None,
+        long_side: int | list[int | None] | None = None,
+        return_exceptions: bool = False,
+    ):
+        """Detect faces in several images with one backend call per detection scale.
 
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(50, 50),
-        )
+        Detection and the blur check run on copies whose long side is at most
+        `long_side` (DETECTION_LONG_SIDE_PX by default); boxes and landmarks
+        come back in original pixels. The blur threshold and long side may be
+        given per image. With `return_exceptions`, an image that fails the blur
+        check gets its FaceException in place of its faces and the others are
+        still detected.
+        """
+        thresholds = min_laplacian_variance if isinstance(min_laplacian_variance, list) else [min_laplacian_variance] * len(images)
+        long_sides = long_side if isinstance(long_side, list) else [long_side] * len(images)
+        results: list = [[] for _ in images]
+        scales: dict[int, float] = {}
+        smalls: dict[int, np.ndarray] = {}
+        grays: dict[int, np.ndarray] = {}
+        for i, image in enumerate(images):
+            scale = self._detection_scale(image, long_sides[i])
+            small = image
+            if scale < 1.0:
+                h, w = image.shape[:2]
+                small = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            try:
+                self._check_blur(gray, thresholds[i])
+            except FaceException as exc:
+                if not return_exceptions:
+                    raise
+                results[i] = exc
+                continue
+            scales[i] = scale
+            smalls[i] = small
+            grays[i] = gray
 
+        # The minimum face size is in detection pixels, so images are grouped by it.
+        groups: dict[int, list[int]] = {}
+        for i, scale in scales.items():
+            groups.setdefault(max(24, round(50 * scale)), []).append(i)
+        for min_size, rows in groups.items():
+            found = self.backend.find_faces([smalls[i] for i in rows], [grays[i] for i in rows], min_size=min_size)
+            for i, faces in zip(rows, found):
+                results[i] = faces
+
+        for i, scale in scales.items():
+            if scale < 1.0:
+                inverse = 1.0 / scale
+                for face in results[i]:
+                    face["box"] = [int(round(v * inverse)) for v in face["box"]]
+                    face["landmarks"] = {
+                        name: [float(point[0]) * inverse, float(point[1]) * inverse] for name, point in face["landmarks"].items()
+                    }
+        return results
+
+    def detect_in_regions(self, image: np.ndarray, regions: list[list[int]], min_laplacian_variance: float | None = None):
+        """Run the detector only around caller-supplied face boxes (expanded by FACE_HINT_MARGIN).
+
+        The blur check runs on each face region rather than the whole frame.
+        """
+        h, w = image.shape[:2]
         results = []
-        for (x, y, w, h) in faces:
-            results.append(
-                {
-                    "box": [int(x), int(y), int(x + w), int(y + h)],
-                    "score": 0.99,
-                    "landmarks": {},
+        for x1, y1, x2, y2 in regions:
+            mx = int((x2 - x1) * settings.FACE_HINT_MARGIN)
+            my = int((y2 - y1) * settings.FACE_HINT_MARGIN)
+            cx1, cy1 = max(x1 - mx, 0), max(y1 - my, 0)
+            cx2, cy2 = min(x2 + mx, w), min(y2 + my, h)
+            if cx2 <= cx1 or cy2 <= cy1:
+                continue
+            crop = image[cy1:cy2, cx1:cx2]
+            gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            self._check_blur(gray, min_laplacian_variance)
+            for face in self._find_faces(crop, gray):
+                bx1, by1, bx2, by2 = face["box"]
+                face["box"] = [bx1 + cx1, by1 + cy1, bx2 + cx1, by2 + cy1]
+                face["landmarks"] = {
+                    name: [float(point[0]) + cx1, float(point[1]) + cy1] for name, point in face["landmarks"].items()
                 }
-            )
+                results.append(face)
         return results
 
+    def faces_from_hints(self, image: np.ndarray, regions: list[list[int]], min_laplacian_variance: float | None = None):
+        """Accept caller-supplied face boxes as detections; only the blur check runs, on each face region."""
+        h, w = image.shape[:2]
+        results = []
+        for x1, y1, x2, y2 in regions:
+            box = [max(int(x1), 0), max(int(y1), 0), min(int(x2), w), min(int(y2), h)]
+            if box[2] > box[0] and box[3] > box[1]:
+                self._check_blur(cv2.cvtColor(image[box[1]:box[3], box[0]:box[2]], cv2.COLOR_BGR2GRAY), min_laplacian_variance)
+                results.append({"box": box, "score": 1.0, "landmarks": {}})
+        return results
+
+    def _find_faces(self, image: np.ndarray, gray: np.ndarray, min_size: int = 50):
+        return self.backend.find_faces([image], [gray], min_size=min_size)[0]
+
 detector = FaceDetector()
@@ -0,0 +1,249 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import FaceException
+from app.engine.onnx_session import create_session
+
+try:
+    from retinaface import RetinaFace  # type: ignore
+except Exception:  # pragma: no cover
+    RetinaFace = None
+
+try:
+    import onnxruntime as ort
+except Exception:  # pragma: no cover
+    ort = None
+
+
+# SCRFD emits five points in image order; names follow the retinaface package
+# (subject's right eye is on the image left), which FaceAligner expects.
+LANDMARK_NAMES = ("right_eye", "left_eye", "nose", "mouth_right", "mouth_left")
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression; returns kept row indices, best score first."""
+    if boxes.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0)
+        h = np.maximum(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+class DetectorBackend:
+    """Finds faces in BGR images. Boxes are [x1, y1, x2, y2] in the image's own pixels."""
+
+    name = "base"
+
+    def find_faces(self, images: list[np.ndarray], grays: list[np.ndarray], min_size: int = 50) -> list[list[dict]]:
+        raise NotImplementedError
+
+
+class HaarBackend(DetectorBackend):
+    # Haar has no confidence or landmarks: every hit reports 0.99 and alignment falls back to the box.
+    name = "haar"
+
+    def __init__(self):
+        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+
+    def find_faces(self, images, grays, min_size=50):
+        out = []
+        for gray in grays:
+            faces = self.face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(min_size, min_size),
+            )
+            out.append(
+                [
+                    {"box": [int(x), int(y), int(x + w), int(y + h)], "score": 0.99, "landmarks": {}}
+                    for (x, y, w, h) in faces
+                ]
+            )
+        return out
+
+
+class RetinaFaceBackend(DetectorBackend):
+    name = "retinaface"
+
+    def __init__(self):
+        if RetinaFace is None:
+            raise FaceException(500, "RETINAFACE_UNAVAILABLE", "RetinaFace dependency is not installed")
+
+    def find_faces(self, images, grays, min_size=50):
+        out = []
+        for image in images:
+            detected = RetinaFace.detect_faces(image)
+            results = []
+            if isinstance(detected, dict):
+                for face in detected.values():
+                    facial_area = face.get("facial_area")
+                    if not facial_area or len(facial_area) != 4:
+                        continue
+                    results.append(
+                        {
+                            "box": [int(facial_area[0]), int(facial_area[1]), int(facial_area[2]), int(facial_area[3])],
+                            "score": float(face.get("score", 0.0)),
+                            "landmarks": face.get("landmarks") or {},
+                        }
+                    )
+            out.append(results)
+        return out
+
+
+class ScrfdOnnxBackend(DetectorBackend):
+    """SCRFD (insightface) detector exported to ONNX, run with ONNX Runtime.
+
+    The session is created once. Images are letterboxed to DETECTOR_INPUT_SIZE
+    and sent as one batch when the export keeps a batch axis on its outputs.
+    """
+
+    name = "scrfd"
+
+    def __init__(self, model_path: str | None = None, session=None):
+        if session is None:
+            path = Path(model_path or settings.DETECTOR_MODEL_PATH)
+            if ort is None or not path.exists():
+                raise FaceException(500, "DETECTOR_MODEL_UNAVAILABLE", f"SCRFD model not found at {path}")
+            session = create_session(path)
+        self.session = session
+        model_input = session.get_inputs()[0]
+        self.input_name = model_input.name
+        shape = list(model_input.shape)
+        size = int(settings.DETECTOR_INPUT_SIZE)
+        self.input_size = (
+            int(shape[3]) if len(shape) == 4 and isinstance(shape[3], int) else size,
+            int(shape[2]) if len(shape) == 4 and isinstance(shape[2], int) else size,
+        )
+        model_outputs = session.get_outputs()
+        outputs = len(model_outputs)
+        # As in insightface: only exports with (N, anchors, C) outputs keep images apart in a
+        # batch. Most SCRFD exports emit (anchors, C) even with a dynamic input batch axis.
+        self.batched = len(model_outputs[0].shape or ()) == 3 and not (shape and shape[0] == 1)
+        # 6/9 outputs: strides 8-32 with two anchors; 10/15 outputs: strides 8-128 with one.
+        self.levels = 3 if outputs in (6, 9) else 5
+        self.strides = (8, 16, 32) if self.levels == 3 else (8, 16, 32, 64, 128)
+        self.num_anchors = 2 if self.levels == 3 else 1
+        self.has_landmarks = outputs in (9, 15)
+        self.score_threshold = float(settings.DETECTOR_SCORE_THRESHOLD)
+        self.nms_threshold = float(settings.DETECTOR_NMS_THRESHOLD)
+        self._centers: dict[tuple[int, int, int], np.ndarray] = {}
+
+    def _anchor_centers(self, height: int, width: int, stride: int) -> np.ndarray:
+        key = (height, width, stride)
+        if key not in self._centers:
+            centers = np.stack(np.mgrid[:height, :width][::-1], axis=-1).astype(np.float32)
+            centers = (centers * stride).reshape(-1, 2)
+            if self.num_anchors > 1:
+                centers = np.repeat(centers, self.num_anchors, axis=0)
+            self._centers[key] = centers
+        return self._centers[key]
+
+    def _letterbox(self, image: np.ndarray) -> tuple[np.ndarray, float]:
+        in_w, in_h = self.input_size
+        h, w = image.shape[:2]
+        scale = min(in_w / w, in_h / h)
+        resized = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))))
+        canvas = np.zeros((in_h, in_w, 3), dtype=np.uint8)
+        canvas[: resized.shape[0], : resized.shape[1]] = resized
+        return canvas, scale
+
+    def _blob(self, canvases: list[np.ndarray]) -> np.ndarray:
+        return cv2.dnn.blobFromImages(canvases, 1.0 / 128.0, self.input_size, (127.5, 127.5, 127.5), swapRB=True)
+
+    def decode(self, outputs: list[np.ndarray], scale: float, min_size: int = 0) -> list[dict]:
+        """Turn one image's raw head outputs into faces in original pixels."""
+        in_w, in_h = self.input_size
+        all_scores, all_boxes, all_kps = [], [], []
+        for level, stride in enumerate(self.strides):
+            scores = outputs[level].reshape(-1)
+            distances = outputs[level + self.levels].reshape(-1, 4) * stride
+            centers = self._anchor_centers(in_h // stride, in_w // stride, stride)
+            keep = np.flatnonzero(scores >= self.score_threshold)
+            if keep.size == 0:
+                continue
+            c = centers[keep]
+            d = distances[keep]
+            all_scores.append(scores[keep])
+            all_boxes.append(np.concatenate([c - d[:, :2], c + d[:, 2:]], axis=1))
+            if self.has_landmarks:
+                k = outputs[level + 2 * self.levels].reshape(-1, 10)[keep] * stride
+                all_kps.append(k.reshape(-1, 5, 2) + c[:, None, :])
+        if not all_scores:
+            return []
+        scores = np.concatenate(all_scores)
+        boxes = np.concatenate(all_boxes) / scale
+        kps = np.concatenate(all_kps) / scale if all_kps else None
+
+        faces = []
+        for i in nms(boxes, scores, self.nms_threshold):
+            x1, y1, x2, y2 = boxes[i]
+            if min(x2 - x1, y2 - y1) < min_size:
+                continue
+            landmarks = {}
+            if kps is not None:
+                landmarks = {name: [float(px), float(py)] for name, (px, py) in zip(LANDMARK_NAMES, kps[i])}
+            faces.append(
+                {
+                    "box": [int(round(x1)), int(round(y1)), int(round(x2)), int(round(y2))],
+                    "score": float(scores[i]),
+                    "landmarks": landmarks,
+                }
+            )
+        return faces
+
+    def find_faces(self, images, grays, min_size=50):
+        if not images:
+            return []
+        letterboxed = [self._letterbox(image) for image in images]
+        groups = [letterboxed] if self.batched else [[item] for item in letterboxed]
+        out = []
+        for group in groups:
+            raw = self.session.run(None, {self.input_name: self._blob([canvas for canvas, _ in group])})
+            for n, (_, scale) in enumerate(group):
+                per_image = [r[n] for r in raw] if self.batched else raw
+                out.append(self.decode(per_image, scale, min_size=min_size))
+        return out
+
+
+DETECTOR_BACKENDS: dict[str, Callable[[], DetectorBackend]] = {
+    "scrfd": ScrfdOnnxBackend,
+    "retinaface": RetinaFaceBackend,
+    "haar": HaarBackend,
+}
+
+
+def register_detector_backend(name: str, factory: Callable[[], DetectorBackend]) -> None:
+    DETECTOR_BACKENDS[name] = factory
+
+
+def create_detector_backend(name: str | None = None) -> DetectorBackend:
+    name = (name or settings.DETECTOR_BACKEND).lower()
+    if name != "auto":
+        if name not in DETECTOR_BACKENDS:
+            raise FaceException(500, "DETECTOR_BACKEND_UNKNOWN", f"Unknown detector backend '{name}'")
+        return DETECTOR_BACKENDS[name]()
+
+    # auto: the ONNX model if it is present, then the retinaface package, then Haar.
+    if ort is not None and Path(settings.DETECTOR_MODEL_PATH).exists():
+        return ScrfdOnnxBackend()
+    if RetinaFace is not None:
+        return RetinaFaceBackend()
+    if not settings.RETINAFACE_FALLBACK_TO_HAAR:
+        raise FaceException(500, "RETINAFACE_UNAVAILABLE", "RetinaFace dependency is not installed")
+    return HaarBackend()
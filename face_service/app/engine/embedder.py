@@ -1,9 +1,11 @@
+import threading
 from pathlib import Path
 
 import numpy as np
 import cv2
 
 from app.core.config import settings
+from app.engine.onnx_session import create_session
 
 try:
     import onnxruntime as ort
@@ -11,17 +13,82 @@ except Exception:  # pragma: no cover
     ort = None
 
 
+FACE_SIZE = 112
+# (v - 127.5) / 128 for every uint8 value: cast, shift and scale in one cv2.LUT pass.
+_INPUT_LUT = ((np.arange(256, dtype=np.float32) - 127.5) / 128.0).reshape(1, 256)
+
+
+class _Buffers:
+    """One thread's reusable input/output arrays, sized to a full chunk."""
+
+    def __init__(self, rows: int, layout: str, dim: int):
+        self.rows = rows
+        self.layout = layout
+        shape = (rows, FACE_SIZE, FACE_SIZE, 3) if layout == "NHWC" else (rows, 3, FACE_SIZE, FACE_SIZE)
+        self.input = np.zeros(shape, dtype=np.float32)
+        self.output = np.zeros((rows, dim), dtype=np.float32)
+        self.resized = np.empty((FACE_SIZE, FACE_SIZE, 3), dtype=np.uint8)
+        self.rgb = np.empty((FACE_SIZE, FACE_SIZE, 3), dtype=np.uint8)
+        self.planar = np.empty((FACE_SIZE, FACE_SIZE, 3), dtype=np.float32)
+
+
+def _model_path() -> tuple[Path, str]:
+    if settings.EMBEDDING_PRECISION.lower() == "int8" and Path(settings.MODEL_INT8_PATH).exists():
+        return Path(settings.MODEL_INT8_PATH), "int8"
+    return Path(settings.MODEL_PATH), "fp32"
+
+
 class FaceEmbedder:
     def __init__(self):
-        self.model_path = Path(settings.MODEL_PATH)
+        self.model_path, self.precision = _model_path()
         self.session = None
         self.input_name = None
+        self.input_layout = "NHWC"
+        self.fixed_batch_size: int | None = None
+        self.max_batch_size = max(1, int(settings.EMBEDDING_MAX_BATCH_SIZE))
         self.dev_mode = True
+        self.output_name = None
+        self.output_dim = settings.EMBEDDING_DIM
+        self.io_binding = False
+        # Concurrent callers (camera workers, request threads) each get their own buffers.
+        self._local = threading.local()
+        # The session is opened on first use so importing this module stays cheap.
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        """Open the ONNX session. Runs on the first embedding, or from startup warm-up."""
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._load_session()
+            self._loaded = True
 
-        if ort is not None and self.model_path.exists():
-            self.session = ort.InferenceSession(str(self.model_path), providers=["CPUExecutionProvider"])
-            self.input_name = self.session.get_inputs()[0].name
-            self.dev_mode = False
+    def _ensure_loaded(self) -> None:
+        # An injected session (tests, benchmarks) counts as loaded.
+        if not self._loaded and self.session is None:
+            self.load()
+
+    def _load_session(self) -> None:
+        if ort is None or not self.model_path.exists():
+            return
+        self.session = create_session(self.model_path)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        shape = list(model_input.shape)
+        # ArcFace exports ship either NHWC (Face-Tech) or NCHW (insightface) inputs.
+        if len(shape) == 4 and shape[1] == 3:
+            self.input_layout = "NCHW"
+        # A symbolic/None batch axis is dynamic; an int means every run needs exactly that many rows.
+        if shape and isinstance(shape[0], int) and shape[0] > 0:
+            self.fixed_batch_size = int(shape[0])
+        model_output = self.session.get_outputs()[0]
+        self.output_name = model_output.name
+        if len(model_output.shape) == 2 and isinstance(model_output.shape[1], int):
+            self.output_dim = int(model_output.shape[1])
+        # Outputs are written straight into our buffer only when they are float32 already.
+        self.io_binding = bool(settings.EMBEDDING_IO_BINDING) and model_output.type == "tensor(float)"
+        self.dev_mode = False
 
     @staticmethod
     def _normalize(v: np.ndarray) -> np.ndarray:
@@ -30,7 +97,7 @@ class FaceEmbedder:
 
     @staticmethod
     def _face_tech_preprocess(face: np.ndarray) -> np.ndarray:
-        # Mirrors Face-Tech/Experiments/face_preprocessing.py
+        # Mirrors Face-Tech/Experiments/face_preprocessing.py; kept as the reference for _fill.
         face = cv2.resize(face, (112, 112))
         img = face.astype(np.float32)
         img = img[:, :, ::-1]  # BGR -> RGB
@@ -38,15 +105,72 @@ class FaceEmbedder:
         img = np.expand_dims(img, axis=0)  # NHWC
         return np.ascontiguousarray(img)
 
-    def embed(self, aligned_face: np.ndarray) -> np.ndarray:
+    def _chunk_size(self) -> int:
+        if self.fixed_batch_size is not None:
+            return self.fixed_batch_size
+        return self.max_batch_size
+
+    def _buffers(self) -> _Buffers:
+        buffers = getattr(self._local, "buffers", None)
+        rows = self._chunk_size()
+        if buffers is None or buffers.rows != rows or buffers.layout != self.input_layout:
+            buffers = _Buffers(rows, self.input_layout, self.output_dim)
+            self._local.buffers = buffers
+        return buffers
+
+    @staticmethod
+    def _fill(buffers: _Buffers, row: int, face: np.ndarray) -> None:
+        """Write one BGR face into its batch row as normalized RGB, without temporaries."""
+        if face.shape[:2] != (FACE_SIZE, FACE_SIZE):
+            face = cv2.resize(face, (FACE_SIZE, FACE_SIZE), dst=buffers.resized)
+        if buffers.layout == "NHWC":
+            cv2.cvtColor(face, cv2.COLOR_BGR2RGB, dst=buffers.rgb)
+            cv2.LUT(buffers.rgb, _INPUT_LUT, dst=buffers.input[row])
+        else:
+            # Channel swap and HWC -> CHW ride on the one copy into the planar row.
+            cv2.LUT(face, _INPUT_LUT, dst=buffers.planar)
+            np.copyto(buffers.input[row], buffers.planar.transpose(2, 0, 1)[::-1])
+
+    def _run_chunk(self, faces: list[np.ndarray]) -> np.ndarray:
+        count = len(faces)
+        buffers = self._buffers()
+        for row, face in enumerate(faces):
+            self._fill(buffers, row, face)
+        # Fixed-batch models always get the full buffer; rows past `count` are ignored.
+        rows = buffers.rows if self.fixed_batch_size is not None else count
+        x = buffers.input[:rows]
+        if not self.io_binding:
+            return self.session.run(None, {self.input_name: x})[0][:count]
+
+        binding = self.session.io_binding()
+        binding.bind_cpu_input(self.input_name, x)
+        out = buffers.output[:rows]
+        binding.bind_output(self.output_name, "cpu", 0, np.float32, list(out.shape), out.ctypes.data)
+        self.session.run_with_iobinding(binding)
+        return out[:count]
+
+    def embed_batch(self, aligned_faces: list[np.ndarray]) -> np.ndarray:
+        if not aligned_faces:
+            return np.zeros((0, settings.EMBEDDING_DIM), dtype=np.float32)
+
+        self._ensure_loaded()
         if self.dev_mode:
-            v = np.random.randn(1, settings.EMBEDDING_DIM).astype(np.float32)
-            return self._normalize(v)[0]
+            v = np.random.randn(len(aligned_faces), settings.EMBEDDING_DIM).astype(np.float32)
+            return self._normalize(v)
 
-        x = self._face_tech_preprocess(aligned_face)
-        out = self.session.run(None, {self.input_name: x})[0]
-        out = out.astype(np.float32)
-        return self._normalize(out)[0]
+        step = self._chunk_size()
+        result = None
+        for start in range(0, len(aligned_faces), step):
+            # Chunks come back as views of the reused output buffer; copy each out before the next run.
+            chunk = self._run_chunk(aligned_faces[start:start + step])
+            if result is None:
+                result = np.empty((len(aligned_faces), chunk.shape[1]), dtype=np.float32)
+            result[start:start + chunk.shape[0]] = chunk
+        result /= np.linalg.norm(result, axis=1, keepdims=True) + 1e-9
+        return result
+
+    def embed(self, aligned_face: np.ndarray) -> np.ndarray:
+        return self.embed_batch([aligned_face])[0]
 
 
 embedder = FaceEmbedder()
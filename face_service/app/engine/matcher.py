@@ -1,3 +1,7 @@
+from collections.abc import Sequence
+
+import numpy as np
+
 from app.core.config import settings
 from app.vector.embedding_store import EmbeddingStore
 from app.vector.id_map import IDMapStore
@@ -8,20 +12,50 @@ class FaceMatcher:
         self.store = store
         self.id_map = id_map
 
+    @staticmethod
+    def _thresholds(thresholds: float | Sequence[float] | None, count: int) -> np.ndarray:
+        if thresholds is None:
+            return np.full(count, float(settings.CONFIDENCE_THRESHOLD), dtype=np.float32)
+        if np.isscalar(thresholds):
+            return np.full(count, float(thresholds), dtype=np.float32)
+        out = np.asarray(thresholds, dtype=np.float32).reshape(-1)
+        if out.shape[0] != count:
+            raise ValueError(f"Expected {count} thresholds, got {out.shape[0]}")
+        return out
+
     def match(self, embedding, source_type: str, threshold_override: float | None = None) -> dict:
+        return self.match_batch(np.asarray(embedding).reshape(1, -1), threshold_override)[0]
+
+    def match_batch(
+        self,
+        embeddings: np.ndarray,
+        thresholds: float | Sequence[float] | None = None,
+        search_params: dict | None = None,
+    ) -> list[dict]:
+        if embeddings.ndim == 1:
+            embeddings = embeddings.reshape(1, -1)
+        count = embeddings.shape[0]
+        if count == 0:
+            return []
         if self.store.index.ntotal == 0:
-            return {"status": "unknown", "confidence": None, "payload": None}
+            return [{"status": "unknown", "confidence": None, "payload": None} for _ in range(count)]
 
-        scores, ids = self.store.search(embedding, top_k=1)
-        score = float(scores[0][0])
-        idx = int(ids[0][0])
-        threshold = float(threshold_override) if threshold_override is not None else float(settings.CONFIDENCE_THRESHOLD)
-        # Strict policy rule: match only when confidence > threshold.
-        if idx < 0 or score <= threshold:
-            return {"status": "unknown", "confidence": score, "payload": None}
+        # One matrix search for every face in the frame.
+        scores, ids = self.store.search(embeddings, top_k=1, **(search_params or {}))
+        best_scores = scores[:, 0].astype(np.float32)
+        best_ids = ids[:, 0].astype(np.int64)
+        limits = self._thresholds(thresholds, count)
 
-        payload = self.id_map.get(idx)
-        if payload is None:
-            return {"status": "unknown", "confidence": score, "payload": None}
+        # Strict policy rule: match only when confidence > threshold.
+        accepted = (best_ids >= 0) & (best_scores > limits)
+        payloads = self.id_map.get_many([int(i) for i in best_ids[accepted]]) if accepted.any() else []
+        payload_iter = iter(payloads)
 
-        return {"status": "matched", "confidence": score, "payload": payload}
+        out: list[dict] = []
+        for score, ok in zip(best_scores.tolist(), accepted.tolist()):
+            payload = next(payload_iter) if ok else None
+            if payload is None:
+                out.append({"status": "unknown", "confidence": score, "payload": None})
+            else:
+                out.append({"status": "matched", "confidence": score, "payload": payload})
+        return out
@@ -0,0 +1,80 @@
+import hashlib
+import os
+from pathlib import Path
+
+from app.core.config import settings
+
+try:
+    import onnxruntime as ort
+except Exception:  # pragma: no cover
+    ort = None
+
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+EXECUTION_MODES = {
+    "sequential": "ORT_SEQUENTIAL",
+    "parallel": "ORT_PARALLEL",
+}
+
+
+def _optimization_level(name: str):
+    key = GRAPH_OPTIMIZATION_LEVELS.get(name.lower(), GRAPH_OPTIMIZATION_LEVELS["all"])
+    return getattr(ort.GraphOptimizationLevel, key)
+
+
+def session_options(optimization_level: str | None = None):
+    options = ort.SessionOptions()
+    # 0 leaves the ONNX Runtime default (one thread per physical core).
+    if settings.ONNX_INTRA_OP_THREADS > 0:
+        options.intra_op_num_threads = int(settings.ONNX_INTRA_OP_THREADS)
+    if settings.ONNX_INTER_OP_THREADS > 0:
+        options.inter_op_num_threads = int(settings.ONNX_INTER_OP_THREADS)
+    mode = EXECUTION_MODES.get(settings.ONNX_EXECUTION_MODE.lower(), EXECUTION_MODES["sequential"])
+    options.execution_mode = getattr(ort.ExecutionMode, mode)
+    options.graph_optimization_level = _optimization_level(optimization_level or settings.ONNX_GRAPH_OPTIMIZATION_LEVEL)
+    options.enable_cpu_mem_arena = bool(settings.ONNX_ENABLE_CPU_MEM_ARENA)
+    options.enable_mem_pattern = bool(settings.ONNX_ENABLE_MEM_PATTERN)
+    return options
+
+
+def optimized_model_path(model_path: Path) -> Path | None:
+    """Where the optimized graph of `model_path` is cached, or None when caching is off.
+
+    The name carries the optimization level and a digest of the source file's
+    size/mtime and the ONNX Runtime version, so a new model or runtime never
+    picks up a stale graph.
+    """
+    if not settings.ONNX_OPTIMIZED_MODEL_DIR:
+        return None
+    level = settings.ONNX_GRAPH_OPTIMIZATION_LEVEL.lower()
+    if level == "disable":
+        return None
+    stat = model_path.stat()
+    digest = hashlib.sha1(f"{model_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{ort.__version__}".encode()).hexdigest()[:12]
+    return Path(settings.ONNX_OPTIMIZED_MODEL_DIR) / f"{model_path.stem}.{level}.{digest}.onnx"
+
+
+def create_session(model_path: str | Path):
+    model_path = Path(model_path)
+    providers = ["CPUExecutionProvider"]
+    cached = optimized_model_path(model_path)
+    if cached is None:
+        return ort.InferenceSession(str(model_path), sess_options=session_options(), providers=providers)
+    if cached.exists():
+        # Already optimized: skip the graph rewrites that made it.
+        return ort.InferenceSession(str(cached), sess_options=session_options("disable"), providers=providers)
+
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    # Pool workers may start together; each writes its own file and the last rename wins.
+    scratch = cached.with_name(f"{cached.name}.{os.getpid()}.tmp")
+    options = session_options()
+    options.optimized_model_filepath = str(scratch)
+    session = ort.InferenceSession(str(model_path), sess_options=options, providers=providers)
+    if scratch.exists():
+        os.replace(scratch, cached)
+    return session
@@ -0,0 +1,150 @@
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+
+
+def box_iou(a: list[int], b: list[int]) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(ix2 - ix1, 0) * max(iy2 - iy1, 0)
+    if inter == 0:
+        return 0.0
+    area_a = max(a[2] - a[0], 0) * max(a[3] - a[1], 0)
+    area_b = max(b[2] - b[0], 0) * max(b[3] - b[1], 0)
+    return inter / float(area_a + area_b - inter)
+
+
+def _new_track_id() -> str:
+    return f"trk_{uuid.uuid4().hex[:12]}"
+
+
+class FaceTrack:
+    def __init__(self, box: list[int], now: float):
+        self.track_id = _new_track_id()
+        self.box = list(box)
+        self.hits = 1
+        self.first_seen = now
+        self.last_seen = now
+        # Last recognition outcome for this face, reused for a bounded time and number of frames.
+        self.identity: dict | None = None
+        self.identity_at = now
+        self.reuses = 0
+
+    def confident(self, min_confidence: float) -> bool:
+        return (
+            self.identity is not None
+            and self.identity.get("status") == "matched"
+            and (self.identity.get("confidence") or 0.0) >= min_confidence
+        )
+
+
+class SourceTracks:
+    """IoU tracker for the faces seen by one camera.
+
+    Each detection is greedily paired with the live track it overlaps most;
+    unpaired detections open new tracks and tracks unseen for `max_age`
+    seconds are dropped.
+    """
+
+    def __init__(self, iou_threshold: float, max_age: float):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.tracks: list[FaceTrack] = []
+        self.last_update = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, boxes: list[list[int]], now: float | None = None) -> list[FaceTrack]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.last_update = now
+            self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+            pairs = sorted(
+                (
+                    (box_iou(box, track.box), d, t)
+                    for d, box in enumerate(boxes)
+                    for t, track in enumerate(self.tracks)
+                ),
+                key=lambda p: p[0],
+                reverse=True,
+            )
+            assigned: list[FaceTrack | None] = [None] * len(boxes)
+            used: set[int] = set()
+            for iou, d, t in pairs:
+                if iou < self.iou_threshold:
+                    break
+                if assigned[d] is not None or t in used:
+                    continue
+                track = self.tracks[t]
+                track.box = list(boxes[d])
+                track.hits += 1
+                track.last_seen = now
+                assigned[d] = track
+                used.add(t)
+            for d, box in enumerate(boxes):
+                if assigned[d] is None:
+                    track = FaceTrack(box, now)
+                    self.tracks.append(track)
+                    assigned[d] = track
+            return assigned
+
+    def reuse(self, track: FaceTrack, min_confidence: float, ttl: float, max_reuses: int) -> dict | None:
+        """The track's cached identity, or None once it is too old or reused too often to trust.
+
+        Tracks pair boxes by overlap only, so someone stepping into the spot
+        another person just left inherits their track; re-embedding
+        regularly is what notices the swap.
+        """
+        with self._lock:
+            if not track.confident(min_confidence):
+                return None
+            if track.last_seen - track.identity_at > ttl or track.reuses >= max_reuses:
+                return None
+            track.reuses += 1
+            return track.identity
+
+    def remember(self, track: FaceTrack, identity: dict) -> None:
+        with self._lock:
+            previous = track.identity
+            if previous and previous.get("status") == "matched" and identity.get("user_id") != previous.get("user_id"):
+                # A different face took over the box: report it under a new track so it is marked on its own.
+                track.track_id = _new_track_id()
+            track.identity = identity
+            track.identity_at = track.last_seen
+            track.reuses = 0
+
+
+class FaceTrackerRegistry:
+    """Tracks per (organization, camera); idle cameras are forgotten."""
+
+    def __init__(self):
+        self._sources: dict[tuple[str | None, str], SourceTracks] = {}
+        self._lock = threading.Lock()
+
+    def for_source(self, organization_id: str | None, source_id: str, source_type: str) -> SourceTracks | None:
+        # Uploaded photos are independent images; only camera streams have continuity.
+        if not settings.FACE_TRACKING_ENABLED or source_type == "upload_image":
+            return None
+        now = time.monotonic()
+        key = (organization_id, source_id)
+        with self._lock:
+            tracks = self._sources.get(key)
+            if tracks is None:
+                idle = [k for k, v in self._sources.items() if now - v.last_update > 10 * v.max_age]
+                for k in idle:
+                    del self._sources[k]
+                tracks = SourceTracks(settings.FACE_TRACK_IOU_THRESHOLD, settings.FACE_TRACK_MAX_AGE_SECONDS)
+                tracks.last_update = now
+                self._sources[key] = tracks
+            return tracks
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sources": len(self._sources),
+                "tracks": sum(len(v.tracks) for v in self._sources.values()),
+            }
+
+
+face_tracker = FaceTrackerRegistry()
@@ -2,10 +2,14 @@ import os
 import time
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 
 from app.api.v1 import router as v1_router
 from app.core.exceptions import register_exception_handlers
-from app.services import initialize_vector_state
+from app.engine.tracker import face_tracker
+from app.services import initialize_vector_state, shutdown_vector_state, vector_state_stats
+from app.services.inference_pool import inference_pool, stage_timings
+from app.services.warmup import start_warmup, warmup_state
 
 
 app = FastAPI(title="Smart Attendance Face API", version="0.1.0")
@@ -14,9 +18,34 @@ register_exception_handlers(app)
 app.include_router(v1_router)
 
 
+def _resident_memory_bytes() -> int | None:
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS, but still useful where /proc is unavailable (macOS reports bytes).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if os.uname().sysname == "Darwin" else peak * 1024)
+
+
 @app.on_event("startup")
 def on_startup() -> None:
     initialize_vector_state()
+    inference_pool.start()
+    start_warmup()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    inference_pool.shutdown()
+    shutdown_vector_state()
 
 
 @app.get("/health")
@@ -24,6 +53,15 @@ def health_check():
     return {"status": "ok", "service": "face_service"}
 
 
+@app.get("/ready")
+def readiness_check():
+    # 503 until warm-up finishes, so load balancers keep a cold instance out of rotation.
+    state = warmup_state.snapshot()
+    ready = state["status"] == "ready"
+    body = {"status": "ready" if ready else "not_ready", "service": "face_service", "warmup": state}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
 @app.get("/metrics")
 def metrics():
     uptime_seconds = int(time.time() - STARTED_AT)
@@ -32,4 +70,10 @@ def metrics():
         "uptime_seconds": uptime_seconds,
         "pid": os.getpid(),
         "route_count": len(app.routes),
+        "resident_memory_bytes": _resident_memory_bytes(),
+        "vector_index": vector_state_stats(),
+        "face_tracks": face_tracker.stats(),
+        "inference_pool": inference_pool.stats(),
+        "warmup": warmup_state.snapshot(),
+        "stage_latency_ms": stage_timings.stats(),
     }
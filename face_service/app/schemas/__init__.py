@@ -1,6 +1,16 @@
-from .face import FaceResult, RecognizeRequest, RecognizeResponse, RegisterRequest, RegisterResponse
+from .face import (
+    BatchFrameMeta,
+    BatchFrameResponse,
+    FaceResult,
+    RecognizeRequest,
+    RecognizeResponse,
+    RegisterRequest,
+    RegisterResponse,
+)
 
 __all__ = [
+    "BatchFrameMeta",
+    "BatchFrameResponse",
     "FaceResult",
     "RecognizeRequest",
     "RecognizeResponse",
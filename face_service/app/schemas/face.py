@@ -1,7 +1,9 @@
 from datetime import datetime
 
 from pydantic import BaseModel, Field
-from typing import Any
+from typing import Annotated, Any
+
+from app.vector.tenants import ORGANIZATION_ID_PATTERN
 
 
 class RegisterRequest(BaseModel):
@@ -15,6 +17,19 @@ class RecognizeRequest(BaseModel):
     timestamp: datetime
     image: str
     policy: dict[str, Any] = Field(default_factory=dict)
+    organization_id: str | None = Field(default=None, pattern=ORGANIZATION_ID_PATTERN)
+
+
+FaceBox = Annotated[list[int], Field(min_length=4, max_length=4)]
+
+
+class BatchFrameMeta(BaseModel):
+    source_type: str
+    source_id: str
+    timestamp: datetime | None = None
+    policy: dict[str, Any] = Field(default_factory=dict)
+    organization_id: str | None = Field(default=None, pattern=ORGANIZATION_ID_PATTERN)
+    face_boxes: list[FaceBox] | None = None
 
 
 class FaceResult(BaseModel):
@@ -27,6 +42,8 @@ class FaceResult(BaseModel):
     confidence: float | None = None
     action: str | None = None
     unknown_id: str | None = None
+    track_id: str | None = None
+    cached: bool = False
 
 
 class RecognizeResponse(BaseModel):
@@ -35,6 +52,11 @@ class RecognizeResponse(BaseModel):
     errors: list[dict] = []
 
 
+class BatchFrameResponse(RecognizeResponse):
+    frame_index: int
+    source_id: str
+
+
 class RegisterResponse(BaseModel):
     face_id: str
     user_id: str
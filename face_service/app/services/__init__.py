@@ -1,14 +1,31 @@
 from app.core.config import settings
-from app.engine.matcher import FaceMatcher
 from app.vector.embedding_store import EmbeddingStore
 from app.vector.id_map import IDMapStore
+from app.vector.tenants import TenantPartition, TenantVectorRegistry
 
 
 embedding_store = EmbeddingStore(settings.EMBEDDING_DIM, settings.FAISS_INDEX_PATH)
-id_map_store = IDMapStore(settings.FAISS_ID_MAP_PATH)
-matcher = FaceMatcher(embedding_store, id_map_store)
+id_map_store = IDMapStore(settings.FAISS_ID_MAP_DB_PATH, settings.FAISS_ID_MAP_PATH)
+# Requests without an organization_id keep using the original shared index.
+default_partition = TenantPartition(None, embedding_store, id_map_store)
+matcher = default_partition.matcher
+tenant_registry = TenantVectorRegistry(
+    settings.EMBEDDING_DIM,
+    settings.TENANT_INDEX_ROOT,
+    default_partition,
+    max_loaded=settings.TENANT_MAX_LOADED,
+    partitioned=settings.TENANT_PARTITIONING_ENABLED,
+)
 
 
 def initialize_vector_state() -> None:
-    embedding_store.load()
-    id_map_store.load()
+    default_partition.load()
+
+
+def shutdown_vector_state() -> None:
+    tenant_registry.close()
+    default_partition.close()
+
+
+def vector_state_stats() -> dict:
+    return tenant_registry.stats()
@@ -0,0 +1,241 @@
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import FaceException
+
+
+class StageTimings:
+    """Rolling latency per pipeline stage (detect, align, embed, match, ipc)."""
+
+    def __init__(self, window: int = 512):
+        self._samples: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.window = window
+
+    def record(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(stage, deque(maxlen=self.window)).append(ms)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for stage, samples in self._samples.items():
+                ordered = sorted(samples)
+                out[stage] = {
+                    "count": self._counts[stage],
+                    "avg_ms": round(sum(ordered) / len(ordered), 3),
+                    "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+                }
+            return out
+
+
+stage_timings = StageTimings()
+
+
+class SharedImage:
+    """A decoded frame copied once into shared memory; pool workers map it instead of unpickling pixels."""
+
+    def __init__(self, image: np.ndarray):
+        self._shm = shared_memory.SharedMemory(create=True, size=max(int(image.nbytes), 1))
+        np.ndarray(image.shape, dtype=image.dtype, buffer=self._shm.buf)[...] = image
+        self.ref = (self._shm.name, image.shape, image.dtype.str)
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _attach(ref: tuple) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    name, shape, dtype = ref
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+# --- worker process side -------------------------------------------------
+
+def _init_worker(intra_op_threads: int, warm_queue) -> None:
+    import cv2
+
+    # Each worker gets a fixed slice of the CPU instead of every library sizing itself to all cores.
+    settings.ONNX_INTRA_OP_THREADS = intra_op_threads
+    cv2.setNumThreads(1)
+    if settings.WARMUP_ENABLED:
+        from app.services.warmup import warm_up_models
+
+        # Runs before the worker takes any job, so no request lands on a cold worker.
+        warm_up_models()
+    warm_queue.put(os.getpid())
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def _worker_detect(ref: tuple, face_boxes, blur_threshold: float, policy: dict | None) -> dict:
+    from app.services.recognition_service import _detect_faces
+
+    shm, img = _attach(ref)
+    try:
+        start = time.perf_counter()
+        faces = _detect_faces(img, face_boxes, blur_threshold, policy)
+        return {"faces": faces, "ms": {"detect": (time.perf_counter() - start) * 1000.0}}
+    except FaceException as exc:
+        return {"error": (exc.status_code, exc.code, exc.message)}
+    finally:
+        del img
+        shm.close()
+
+
+def _worker_align_embed(ref: tuple, faces: list[tuple[list[int], dict | None]]) -> dict:
+    from app.engine.aligner import aligner
+    from app.engine.embedder import embedder
+
+    shm, img = _attach(ref)
+    try:
+        start = time.perf_counter()
+        aligned = [aligner.align(img, box, landmarks) for box, landmarks in faces]
+        aligned_at = time.perf_counter()
+        embeddings = embedder.embed_batch(aligned)
+        return {
+            "aligned": aligned,
+            "embeddings": embeddings,
+            "ms": {"align": (aligned_at - start) * 1000.0, "embed": (time.perf_counter() - aligned_at) * 1000.0},
+        }
+    finally:
+        del img
+        shm.close()
+
+
+def _detected_faces(out: dict) -> list[dict]:
+    if "error" in out:
+        raise FaceException(*out["error"])
+    return out["faces"]
+
+
+def _aligned_embeddings(out: dict) -> tuple[list[np.ndarray], np.ndarray]:
+    return out["aligned"], out["embeddings"]
+
+
+# --- API process side ----------------------------------------------------
+
+class InferencePool:
+    """Detection, alignment and embedding in worker processes.
+
+    Each of the `size` workers owns its own detector and embedder with ONNX
+    Runtime pinned to `intra_op_threads`, so concurrent requests do not
+    oversubscribe cores or contend on the GIL. Frames travel through shared
+    memory; matching stays in the API process next to the index.
+    """
+
+    def __init__(self, size: int, intra_op_threads: int):
+        self.size = max(0, int(size))
+        self.intra_op_threads = max(1, int(intra_op_threads))
+        self._executor: ProcessPoolExecutor | None = None
+        self._warm_queue = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self) -> None:
+        with self._lock:
+            if not self.enabled or self._executor is not None:
+                return
+            context = mp.get_context("spawn")
+            self._warm_queue = context.Queue()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.intra_op_threads, self._warm_queue),
+            )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def wait_until_warm(self, timeout: float) -> None:
+        """Block until every worker has finished its initializer (and with it, its warm-up)."""
+        self.start()
+        # Spawned workers start on demand, one per submit that finds none idle.
+        for _ in range(self.size):
+            self._executor.submit(_worker_pid)
+        deadline = time.monotonic() + timeout
+        warm: set[int] = set()
+        while len(warm) < self.size:
+            try:
+                warm.add(self._warm_queue.get(timeout=max(deadline - time.monotonic(), 0.0)))
+            except queue.Empty:
+                raise TimeoutError(f"{len(warm)}/{self.size} inference workers warm after {timeout:.0f}s") from None
+
+    def _done(self, _future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _submit(self, fn, unpack, *args) -> tuple[Future, float, Callable]:
+        self.start()
+        with self._lock:
+            self._in_flight += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        return future, time.perf_counter(), unpack
+
+    @staticmethod
+    def _unpack(submitted: tuple[Future, float, Callable], out: dict):
+        _, started, unpack = submitted
+        elapsed = (time.perf_counter() - started) * 1000.0
+        for stage, ms in out.get("ms", {}).items():
+            stage_timings.record(stage, ms)
+        # Whatever the worker did not spend computing was queueing, pickling and wake-ups.
+        stage_timings.record("ipc", max(elapsed - sum(out.get("ms", {}).values()), 0.0))
+        return unpack(out)
+
+    def result(self, submitted: tuple[Future, float, Callable]):
+        """Block until a submitted job is done and return its result (worker errors are raised)."""
+        return self._unpack(submitted, submitted[0].result())
+
+    async def result_async(self, submitted: tuple[Future, float, Callable]):
+        """`result` for the event loop: suspends the request instead of parking a thread on the job."""
+        return self._unpack(submitted, await asyncio.wrap_future(submitted[0]))
+
+    def submit_detect(self, image: SharedImage, face_boxes, blur_threshold: float, policy: dict | None):
+        """Detect faces in the worker; the result is the list of found faces."""
+        return self._submit(_worker_detect, _detected_faces, image.ref, face_boxes, blur_threshold, policy)
+
+    def submit_align_embed(self, image: SharedImage, faces: list[dict]):
+        """Align and embed faces in the worker; the result is (aligned crops, embeddings)."""
+        faces = [(face["box"], face.get("landmarks")) for face in faces]
+        return self._submit(_worker_align_embed, _aligned_embeddings, image.ref, faces)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+            running = self._executor is not None
+        return {
+            "enabled": self.enabled,
+            "running": running,
+            "workers": self.size,
+            "intra_op_threads": self.intra_op_threads,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.size, 0),
+        }
+
+
+inference_pool = InferencePool(settings.INFERENCE_POOL_SIZE, settings.INFERENCE_POOL_INTRA_OP_THREADS)
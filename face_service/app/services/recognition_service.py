@@ -1,9 +1,12 @@
 import base64
+import time
 import uuid
+from collections.abc import Generator
 from datetime import datetime
 
 import cv2
 import numpy as np
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
 from app.core.exceptions import FaceException
@@ -11,22 +14,28 @@ from app.engine.aligner import aligner
 from app.engine.detector import detector
 from app.engine.embedder import embedder
 from app.engine.matcher import FaceMatcher
+from app.engine.tracker import FaceTrack, SourceTracks
 from app.schemas.face import FaceResult, RecognizeRequest, RecognizeResponse
+from app.services.inference_pool import SharedImage, inference_pool, stage_timings
 from app.storage import get_storage_backend
 
 
+def decode_image_bytes(raw: bytes) -> np.ndarray:
+    # frombuffer wraps the request body without copying; imdecode reads it directly.
+    arr = np.frombuffer(raw, dtype=np.uint8)
+    img = cv2.imdecode(arr, cv2.IMREAD_COLOR) if arr.size else None
+    if img is None:
+        raise FaceException(400, "INVALID_IMAGE", "Could not decode image")
+    return img
+
+
 def _decode_base64_image(data: str) -> np.ndarray:
     encoded = data.split(",", 1)[1] if "," in data else data
     try:
         raw = base64.b64decode(encoded)
     except Exception as exc:
         raise FaceException(400, "INVALID_IMAGE", "Invalid base64 image") from exc
-
-    arr = np.frombuffer(raw, dtype=np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-    if img is None:
-        raise FaceException(400, "INVALID_IMAGE", "Could not decode base64 image")
-    return img
+    return decode_image_bytes(raw)
 
 
 def _save_unknown_face(image: np.ndarray, source_id: str, when: datetime) -> tuple[str, str]:
@@ -61,19 +70,107 @@ def _policy_float(policies: dict | None, key: str, fallback: float) -> float:
         return float(fallback)
 
 
+def _ann_search_params(policies: dict | None) -> dict:
+    # Zero/absent knobs fall back to FAISS_NPROBE / FAISS_EF_SEARCH inside the store.
+    return {
+        "nprobe": int(_policy_float(policies, "recognition.ann.nprobe", 0)),
+        "ef_search": int(_policy_float(policies, "recognition.ann.ef_search", 0)),
+    }
+
+
+def _image_frame(
+    img: np.ndarray,
+    *,
+    source_type: str,
+    source_id: str,
+    timestamp: datetime,
+    policy: dict | None,
+    matcher: FaceMatcher,
+    tracks: SourceTracks | None = None,
+    face_boxes: list[list[int]] | None = None,
+) -> dict:
+    return {
+        "img": img,
+        "source_type": source_type,
+        "source_id": source_id,
+        "timestamp": timestamp,
+        "policy": policy,
+        "matcher": matcher,
+        "tracks": tracks,
+        "face_boxes": face_boxes,
+    }
+
+
+def recognize_image(img: np.ndarray, **kwargs) -> RecognizeResponse:
+    return recognize_frames([_image_frame(img, **kwargs)], strict=True)[0]
+
+
+async def recognize_image_async(img: np.ndarray, **kwargs) -> RecognizeResponse:
+    return (await recognize_frames_async([_image_frame(img, **kwargs)], strict=True))[0]
+
+
+def _request_frame(payload: RecognizeRequest, img: np.ndarray, matcher: FaceMatcher) -> dict:
+    return _image_frame(
+        img,
+        source_type=payload.source_type,
+        source_id=payload.source_id,
+        timestamp=payload.timestamp,
+        policy=payload.policy,
+        matcher=matcher,
+    )
+
+
 def recognize(payload: RecognizeRequest, matcher: FaceMatcher) -> RecognizeResponse:
-    img = _decode_base64_image(payload.image)
-    blur_threshold = _policy_float(payload.policy, "quality.min_laplacian_variance", settings.QUALITY_MIN_LAPLACIAN_VARIANCE)
-    faces = detector.detect(img, min_laplacian_variance=blur_threshold)
+    return recognize_frames([_request_frame(payload, _decode_base64_image(payload.image), matcher)], strict=True)[0]
+
+
+async def recognize_async(payload: RecognizeRequest, matcher: FaceMatcher) -> RecognizeResponse:
+    img = await run_in_threadpool(_decode_base64_image, payload.image)
+    return (await recognize_frames_async([_request_frame(payload, img, matcher)], strict=True))[0]
+
+
+def _uses_hints(face_boxes: list[list[int]] | None) -> bool:
+    return bool(face_boxes) and settings.FACE_HINT_MODE in {"trust", "refine"}
+
+
+def _long_side(policy: dict | None) -> int:
+    return int(_policy_float(policy, "detection.long_side_px", settings.DETECTION_LONG_SIDE_PX))
+
+
+def _detect_faces(img: np.ndarray, face_boxes: list[list[int]] | None, blur_threshold: float, policy: dict | None) -> list[dict]:
+    # Boxes the caller already found (main_app's wall-camera check) spare a full-frame detection.
+    if _uses_hints(face_boxes) and settings.FACE_HINT_MODE == "trust":
+        return detector.faces_from_hints(img, face_boxes, min_laplacian_variance=blur_threshold)
+    if _uses_hints(face_boxes):
+        return detector.detect_in_regions(img, face_boxes, min_laplacian_variance=blur_threshold)
+    return detector.detect(img, min_laplacian_variance=blur_threshold, long_side=_long_side(policy))
+
+
+def _blur_threshold(frame: dict) -> float:
+    return _policy_float(frame["policy"], "quality.min_laplacian_variance", settings.QUALITY_MIN_LAPLACIAN_VARIANCE)
+
+
+def _detection_failed(exc: FaceException, strict: bool) -> tuple[list, list[dict], list]:
+    # One blurry camera must not fail every other frame in its batch.
+    if strict:
+        raise exc
+    return [], [{"code": exc.code, "message": exc.message}], []
+
+
+def _select_faces(frame: dict, faces: list[dict]) -> tuple[list, list[dict], list[tuple[int, dict, FaceTrack | None]]]:
+    """Split detected faces into finished results and the ones that still need an embedding."""
     if not faces:
-        return RecognizeResponse(source_type=payload.source_type, results=[], errors=[{"code": "NO_FACE_DETECTED"}])
+        return [], [{"code": "NO_FACE_DETECTED"}], []
 
-    results: list[FaceResult] = []
+    img = frame["img"]
+    policy = frame["policy"]
+    results: list[FaceResult | None] = [None] * len(faces)
     errors: list[dict] = []
+    candidates: list[tuple[int, dict]] = []
     for idx, found in enumerate(faces):
-        if payload.source_type == "wall_camera":
+        if frame["source_type"] == "wall_camera":
             ratio = _face_area_ratio(img, found["box"])
-            wall_min_ratio = _policy_float(payload.policy, "camera.wall.min_face_area_ratio", settings.WALL_MIN_FACE_AREA_RATIO)
+            wall_min_ratio = _policy_float(policy, "camera.wall.min_face_area_ratio", settings.WALL_MIN_FACE_AREA_RATIO)
             if ratio <= wall_min_ratio:
                 errors.append(
                     {
@@ -83,45 +180,281 @@ def recognize(payload: RecognizeRequest, matcher: FaceMatcher) -> RecognizeRespo
                         "observed_ratio": round(ratio, 4),
                     }
                 )
-                results.append(
-                    FaceResult(
-                        face_index=idx,
-                        status="unknown",
-                        confidence=None,
-                        action="ignored",
-                    )
+                results[idx] = FaceResult(
+                    face_index=idx,
+                    status="unknown",
+                    confidence=None,
+                    action="ignored",
                 )
                 continue
+        candidates.append((idx, found))
 
-        aligned = aligner.align(img, found["box"], found.get("landmarks"))
-        emb = embedder.embed(aligned)
-        threshold = _policy_float(payload.policy, "recognition.threshold", settings.CONFIDENCE_THRESHOLD)
-        hit = matcher.match(emb, payload.source_type, threshold_override=threshold)
-        if hit["status"] == "matched":
-            meta = hit["payload"]
-            results.append(
-                FaceResult(
-                    face_index=idx,
-                    status="matched",
-                    face_id=meta.get("face_id"),
-                    user_id=meta.get("user_id"),
-                    embedding_index=meta.get("embedding_index"),
-                    image_path=meta.get("image_path"),
-                    confidence=round(float(hit["confidence"]), 4),
-                    action=_action_for(payload.source_type, "matched"),
-                )
+    tracks: SourceTracks | None = frame.get("tracks")
+    assigned = tracks.update([found["box"] for _, found in candidates]) if tracks else [None] * len(candidates)
+    threshold = _policy_float(policy, "recognition.threshold", settings.CONFIDENCE_THRESHOLD)
+    recheck_below = max(settings.FACE_TRACK_RECHECK_CONFIDENCE, threshold)
+    pending: list[tuple[int, dict, FaceTrack | None]] = []
+    for (idx, found), track in zip(candidates, assigned):
+        if track is not None:
+            # A track is embedded once it is stable, then only while its identity is uncertain.
+            if track.hits < settings.FACE_TRACK_MIN_HITS:
+                results[idx] = FaceResult(face_index=idx, status="tracking", track_id=track.track_id, action="awaiting_track")
+                continue
+            identity = tracks.reuse(
+                track,
+                recheck_below,
+                settings.FACE_TRACK_IDENTITY_TTL_SECONDS,
+                settings.FACE_TRACK_IDENTITY_MAX_REUSES,
             )
+            if identity is not None:
+                results[idx] = FaceResult(**{**identity, "face_index": idx, "track_id": track.track_id, "cached": True})
+                continue
+        pending.append((idx, found, track))
+    return results, errors, pending
+
+
+def _embed_in_process(
+    frames: list[dict], strict: bool = False
+) -> tuple[list, list[tuple[int, int, np.ndarray, FaceTrack | None]], np.ndarray | None]:
+    start = time.perf_counter()
+    detected: dict[int, list[dict] | FaceException] = {}
+    full_frame: list[int] = []
+    for f, frame in enumerate(frames):
+        if frame["img"] is None:
+            continue
+        if not _uses_hints(frame.get("face_boxes")):
+            full_frame.append(f)
+            continue
+        try:
+            detected[f] = _detect_faces(frame["img"], frame["face_boxes"], _blur_threshold(frame), frame["policy"])
+        except FaceException as exc:
+            detected[f] = exc
+    if full_frame:
+        # Frames without hints are detected together, one backend call per detection scale.
+        found = detector.detect_batch(
+            [frames[f]["img"] for f in full_frame],
+            min_laplacian_variance=[_blur_threshold(frames[f]) for f in full_frame],
+            long_side=[_long_side(frames[f]["policy"]) for f in full_frame],
+            return_exceptions=True,
+        )
+        detected.update(zip(full_frame, found))
+    if detected:
+        stage_timings.record("detect", (time.perf_counter() - start) * 1000.0)
+
+    # Tracks are updated in frame order.
+    prepared = []
+    for f, frame in enumerate(frames):
+        outcome = detected.get(f)
+        if outcome is None:
+            prepared.append(([], [{"code": "INVALID_IMAGE"}], []))
+        elif isinstance(outcome, FaceException):
+            prepared.append(_detection_failed(outcome, strict))
         else:
-            unknown_id, unknown_path = _save_unknown_face(aligned, payload.source_id, payload.timestamp)
-            results.append(
-                FaceResult(
-                    face_index=idx,
-                    status="unknown",
-                    unknown_id=unknown_id,
-                    image_path=unknown_path,
-                    confidence=round(float(hit["confidence"]), 4) if hit["confidence"] is not None else None,
-                    action=_action_for(payload.source_type, "unknown"),
-                )
+            prepared.append(_select_faces(frame, outcome))
+
+    start = time.perf_counter()
+    faces = [
+        (f, idx, aligner.align(frames[f]["img"], found["box"], found.get("landmarks")), track)
+        for f, (_, _, pending) in enumerate(prepared)
+        for idx, found, track in pending
+    ]
+    if not faces:
+        return prepared, faces, None
+    aligned_at = time.perf_counter()
+    stage_timings.record("align", (aligned_at - start) * 1000.0)
+    # Every face from every frame goes through the embedder together.
+    embeddings = embedder.embed_batch([aligned for _, _, aligned, _ in faces])
+    stage_timings.record("embed", (time.perf_counter() - aligned_at) * 1000.0)
+    return prepared, faces, embeddings
+
+
+def _pool_steps(frames: list[dict], strict: bool = False) -> Generator[tuple, object, tuple]:
+    """Detection and alignment + embedding in the pool, for both the blocking and the async caller.
+
+    Yields every submitted job it needs the result of and expects that
+    result sent back; returns what `_embed_in_process` returns.
+    """
+    shared: dict[int, SharedImage] = {}
+    try:
+        for f, frame in enumerate(frames):
+            if frame["img"] is not None:
+                shared[f] = SharedImage(frame["img"])
+        detecting = {
+            f: inference_pool.submit_detect(image, frames[f].get("face_boxes"), _blur_threshold(frames[f]), frames[f]["policy"])
+            for f, image in shared.items()
+        }
+
+        # Tracks are updated here, in frame order, so worker scheduling cannot reorder a camera's history.
+        prepared = []
+        embedding: dict[int, tuple] = {}
+        for f, frame in enumerate(frames):
+            if f not in shared:
+                prepared.append(([], [{"code": "INVALID_IMAGE"}], []))
+                continue
+            try:
+                detected = yield detecting[f]
+            except FaceException as exc:
+                prepared.append(_detection_failed(exc, strict))
+                continue
+            prepared.append(_select_faces(frame, detected))
+            pending = prepared[f][2]
+            if pending:
+                embedding[f] = inference_pool.submit_align_embed(shared[f], [found for _, found, _ in pending])
+
+        faces, chunks = [], []
+        for f, submitted in embedding.items():
+            aligned, vectors = yield submitted
+            faces.extend((f, idx, crop, track) for (idx, _, track), crop in zip(prepared[f][2], aligned))
+            chunks.append(vectors)
+        return prepared, faces, np.vstack(chunks) if chunks else None
+    finally:
+        for image in shared.values():
+            image.close()
+
+
+def _embed_in_pool(
+    frames: list[dict], strict: bool = False
+) -> tuple[list, list[tuple[int, int, np.ndarray, FaceTrack | None]], np.ndarray | None]:
+    steps = _pool_steps(frames, strict)
+    try:
+        submitted = next(steps)
+        while True:
+            try:
+                outcome = inference_pool.result(submitted)
+            except FaceException as exc:
+                # Handed to the step that waited on it, which turns it into that frame's error.
+                submitted = steps.throw(exc)
+            else:
+                submitted = steps.send(outcome)
+    except StopIteration as done:
+        return done.value
+    finally:
+        steps.close()
+
+
+async def _embed_in_pool_async(
+    frames: list[dict], strict: bool = False
+) -> tuple[list, list[tuple[int, int, np.ndarray, FaceTrack | None]], np.ndarray | None]:
+    steps = _pool_steps(frames, strict)
+    try:
+        submitted = next(steps)
+        while True:
+            try:
+                outcome = await inference_pool.result_async(submitted)
+            except FaceException as exc:
+                submitted = steps.throw(exc)
+            else:
+                submitted = steps.send(outcome)
+    except StopIteration as done:
+        return done.value
+    finally:
+        steps.close()
+
+
+def _face_result(frame: dict, idx: int, aligned: np.ndarray, hit: dict, track: FaceTrack | None = None) -> FaceResult:
+    result = _match_result(frame, idx, aligned, hit, track)
+    if track is not None:
+        frame["tracks"].remember(track, result.model_dump(exclude={"face_index", "track_id", "cached"}))
+        result.track_id = track.track_id
+    return result
+
+
+def _match_result(frame: dict, idx: int, aligned: np.ndarray, hit: dict, track: FaceTrack | None) -> FaceResult:
+    source_type = frame["source_type"]
+    if hit["status"] == "matched":
+        meta = hit["payload"]
+        return FaceResult(
+            face_index=idx,
+            status="matched",
+            face_id=meta.get("face_id"),
+            user_id=meta.get("user_id"),
+            embedding_index=meta.get("embedding_index"),
+            image_path=meta.get("image_path"),
+            confidence=round(float(hit["confidence"]), 4),
+            action=_action_for(source_type, "matched"),
+        )
+    previous = track.identity if track is not None else None
+    if previous and previous.get("unknown_id"):
+        # Same unidentified face as before: keep one unknown record per track.
+        unknown_id, unknown_path = previous["unknown_id"], previous["image_path"]
+    else:
+        unknown_id, unknown_path = _save_unknown_face(aligned, frame["source_id"], frame["timestamp"])
+    return FaceResult(
+        face_index=idx,
+        status="unknown",
+        unknown_id=unknown_id,
+        image_path=unknown_path,
+        confidence=round(float(hit["confidence"]), 4) if hit["confidence"] is not None else None,
+        action=_action_for(source_type, "unknown"),
+    )
+
+
+def recognize_frames(frames: list[dict], strict: bool = False) -> list[RecognizeResponse]:
+    """Recognize several frames with one detection call per scale, one embedding pass and one search per gallery.
+
+    Each frame is a dict with `img` (None if it could not be decoded),
+    `source_type`, `source_id`, `timestamp`, `policy`, `matcher` and
+    optionally `tracks` (the camera's SourceTracks) and `face_boxes` (caller
+    detection hints). Responses come back in frame order. A frame that fails
+    detection (e.g. IMAGE_QUALITY_TOO_LOW) reports it in its own `errors`;
+    with `strict` the FaceException is raised instead, for single-image requests.
+
+    With INFERENCE_POOL_SIZE > 0 detection, alignment and embedding run in
+    the worker processes (one detection and one embedding pass per frame);
+    matching always happens here, against the leased gallery.
+    """
+    if inference_pool.enabled:
+        prepared, faces, embeddings = _embed_in_pool(frames, strict)
+    else:
+        prepared, faces, embeddings = _embed_in_process(frames, strict)
+    return _match_frames(frames, prepared, faces, embeddings)
+
+
+async def recognize_frames_async(frames: list[dict], strict: bool = False) -> list[RecognizeResponse]:
+    """`recognize_frames` for request handlers on the event loop.
+
+    Pool jobs are awaited, so a request waiting on a worker holds no
+    threadpool thread. Frame copies and track updates run on the loop;
+    matching (and all of the in-process pipeline) still runs in a thread.
+    """
+    if not inference_pool.enabled:
+        return await run_in_threadpool(recognize_frames, frames, strict)
+    prepared, faces, embeddings = await _embed_in_pool_async(frames, strict)
+    return await run_in_threadpool(_match_frames, frames, prepared, faces, embeddings)
+
+
+def _match_frames(
+    frames: list[dict],
+    prepared: list,
+    faces: list[tuple[int, int, np.ndarray, FaceTrack | None]],
+    embeddings: np.ndarray | None,
+) -> list[RecognizeResponse]:
+    if faces:
+        start = time.perf_counter()
+        # Frames sharing a gallery and search knobs are matched in one search; thresholds stay per frame.
+        groups: dict[tuple, list[int]] = {}
+        for row, (f, _, _, _) in enumerate(faces):
+            params = _ann_search_params(frames[f]["policy"])
+            key = (id(frames[f]["matcher"]), params["nprobe"], params["ef_search"])
+            groups.setdefault(key, []).append(row)
+
+        for rows in groups.values():
+            first = frames[faces[rows[0]][0]]
+            thresholds = [
+                _policy_float(frames[faces[row][0]]["policy"], "recognition.threshold", settings.CONFIDENCE_THRESHOLD)
+                for row in rows
+            ]
+            hits = first["matcher"].match_batch(
+                embeddings[rows],
+                thresholds,
+                search_params=_ann_search_params(first["policy"]),
             )
+            for row, hit in zip(rows, hits):
+                f, idx, aligned, track = faces[row]
+                prepared[f][0][idx] = _face_result(frames[f], idx, aligned, hit, track)
+        stage_timings.record("match", (time.perf_counter() - start) * 1000.0)
 
-    return RecognizeResponse(source_type=payload.source_type, results=results, errors=errors)
+    return [
+        RecognizeResponse(source_type=frame["source_type"], results=results, errors=errors)
+        for frame, (results, errors, _) in zip(frames, prepared)
+    ]
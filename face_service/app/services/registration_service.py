@@ -109,7 +109,7 @@ def register_faces(
         raise FaceException(400, "INVALID_IMAGE_COUNT", f"Provide {min_images} to {max_images} images")
 
     face_id = f"face_{user_id}"
-    vectors = []
+    aligned_faces = []
     payloads = []
     user_root = Path(settings.STORAGE_ROOT) / "images" / "users" / user_id
     original_dir = user_root / "original"
@@ -121,14 +121,14 @@ def register_faces(
         _save_image(img, original_dir / f"img_{i+1:03d}.jpg")
 
         blur_threshold = _policy_float(policies, "quality.min_laplacian_variance", settings.QUALITY_MIN_LAPLACIAN_VARIANCE)
-        faces = detector.detect(img, min_laplacian_variance=blur_threshold)
+        long_side = _policy_int(policies, "detection.long_side_px", settings.DETECTION_LONG_SIDE_PX)
+        faces = detector.detect(img, min_laplacian_variance=blur_threshold, long_side=long_side)
         best = _select_single_face(faces, upload.filename, policies)
         aligned = aligner.align(img, best["box"], best.get("landmarks"))
         aligned_file = aligned_dir / f"face_{i+1:03d}.png"
         _save_image(aligned, aligned_file)
 
-        emb = embedder.embed(aligned)
-        vectors.append(emb)
+        aligned_faces.append(aligned)
         payloads.append(
             {
                 "user_id": user_id,
@@ -138,8 +138,10 @@ def register_faces(
             }
         )
 
-    matrix = np.vstack(vectors).astype(np.float32)
-    ids = store.add(matrix)
+    matrix = embedder.embed_batch(aligned_faces).astype(np.float32)
+    # Commit payloads before the vectors become searchable so a concurrent
+    # recognition never matches an embedding it cannot resolve.
+    ids = store.reserve_ids(matrix.shape[0])
 
     metadata: list[dict] = []
     for idx, meta in zip(ids, payloads):
@@ -153,8 +155,9 @@ def register_faces(
             }
         )
 
-    store.save()
     id_map.save()
+    # The store logs the vectors durably; checkpoints happen in the background.
+    store.add(matrix, ids=ids)
     return {
         "face_id": face_id,
         "user_id": user_id,
@@ -168,16 +171,8 @@ def delete_face(face_id: str, store: EmbeddingStore, id_map: IDMapStore) -> dict
     if not remove_ids:
         raise FaceException(404, "FACE_NOT_FOUND", "Face ID not found")
 
-    old_map = id_map.data.copy()
-    keep_keys = [k for k in sorted(old_map.keys(), key=lambda x: int(x)) if int(k) not in set(remove_ids)]
-    keep_payloads = [old_map[k] for k in keep_keys]
-
-    store.rebuild_without(remove_ids)
-
-    id_map.data = {}
-    for new_idx, payload in enumerate(keep_payloads):
-        id_map.set(new_idx, payload)
-
-    store.save()
+    # Embedding IDs are stable: drop only this face's vectors, nothing is renumbered.
+    store.remove(remove_ids)
+    id_map.remove_ids(remove_ids)
     id_map.save()
     return {"status": "deleted", "face_id": face_id}
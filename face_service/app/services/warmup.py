@@ -0,0 +1,107 @@
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import FaceException
+from app.engine.detector import detector
+from app.engine.embedder import embedder
+from app.services.inference_pool import inference_pool
+
+
+class WarmupState:
+    """Progress of the startup warm-up, reported by /ready and /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = "pending"
+        self.error: str | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.steps_ms: dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def begin(self) -> None:
+        with self._lock:
+            self.status, self.error = "warming", None
+            self.started_at, self.finished_at = time.time(), None
+            self.steps_ms = {}
+
+    def step(self, name: str, started: float) -> None:
+        with self._lock:
+            self.steps_ms[name] = round((time.perf_counter() - started) * 1000.0, 3)
+
+    def finish(self, error: str | None = None) -> None:
+        with self._lock:
+            self.status = "failed" if error else "ready"
+            self.error = error
+            self.finished_at = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            duration = None
+            if self.started_at is not None and self.finished_at is not None:
+                duration = round(self.finished_at - self.started_at, 3)
+            return {
+                "status": self.status,
+                "error": self.error,
+                "duration_seconds": duration,
+                "steps_ms": dict(self.steps_ms),
+            }
+
+
+warmup_state = WarmupState()
+
+
+def warm_up_models(state: WarmupState | None = None) -> None:
+    """Load the detector and embedder and push dummy frames through both.
+
+    Runs every shape the first requests will use (one face and a full chunk)
+    so session creation, graph optimization and arena growth happen here.
+    Also called in each inference pool worker as it starts.
+    """
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    started = time.perf_counter()
+    detector.detect(frame, min_laplacian_variance=0, long_side=settings.DETECTION_LONG_SIDE_PX)
+    if state is not None:
+        state.step("detector", started)
+
+    started = time.perf_counter()
+    embedder.load()
+    face = frame[:112, :112].copy()
+    embedder.embed_batch([face])
+    embedder.embed_batch([face] * embedder._chunk_size())
+    if state is not None:
+        state.step("embedder", started)
+
+
+def _run(state: WarmupState) -> None:
+    state.begin()
+    try:
+        warm_up_models(state)
+        if inference_pool.enabled:
+            started = time.perf_counter()
+            inference_pool.wait_until_warm(settings.WARMUP_TIMEOUT_SECONDS)
+            state.step("inference_pool", started)
+    except FaceException as exc:
+        state.finish(f"{exc.code}: {exc.message}")
+    except Exception as exc:
+        state.finish(f"{type(exc).__name__}: {exc}")
+    else:
+        state.finish()
+
+
+def start_warmup(state: WarmupState = warmup_state) -> threading.Thread | None:
+    if not settings.WARMUP_ENABLED:
+        state.begin()
+        state.finish()
+        return None
+    thread = threading.Thread(target=_run, args=(state,), name="face-warmup", daemon=True)
+    thread.start()
+    return thread
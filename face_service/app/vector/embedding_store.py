@@ -1,88 +1,668 @@
+import io
+import json
+import os
+import threading
+import time
 from pathlib import Path
 
 import numpy as np
 
+from app.core.config import settings
+from app.vector.rwlock import ReadWriteLock
+from app.vector.wal import OP_ADD, OP_REMOVE, WriteAheadLog
+
 try:
     import faiss
 except Exception:  # pragma: no cover
     faiss = None
 
 
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _atomic_save_npy(path: Path, array: np.ndarray) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.save(fh, array)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
 class _MemoryIndex:
-    def __init__(self, dim: int):
+    """Brute-force inner-product index over NumPy arrays.
+
+    Used when FAISS is not installed, and for the flat layout when
+    FAISS_MMAP_LOAD is on. In that case the checkpointed vectors stay a
+    read-only `np.memmap` base shared through the page cache by every worker;
+    later adds go to a private growable buffer and removals of base rows are
+    masked out instead of copied.
+    """
+
+    _SEARCH_BLOCK_ROWS = 65536
+
+    def __init__(self, dim: int, use_float16: bool = False, capacity: int = 1024):
         self.dim = dim
-        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.dtype = np.float16 if use_float16 else np.float32
+        self._buffer = np.zeros((max(1, capacity), dim), dtype=self.dtype)
+        self._ids = np.zeros(max(1, capacity), dtype=np.int64)
+        self._count = 0
+        self._base: np.ndarray | None = None
+        self._base_ids = np.zeros(0, dtype=np.int64)
+        self._base_alive = np.zeros(0, dtype=bool)
+        self._base_alive_count = 0
+
+    @property
+    def is_mapped(self) -> bool:
+        return self._base is not None
+
+    @property
+    def mapped_bytes(self) -> int:
+        return int(self._base.nbytes) if self._base is not None else 0
 
     @property
     def ntotal(self) -> int:
-        return self.vectors.shape[0]
+        return self._base_alive_count + self._count
 
-    def add(self, embeddings: np.ndarray) -> None:
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._base is None:
+            return self._buffer[: self._count]
+        return np.concatenate([np.asarray(self._base[self._base_alive]), self._buffer[: self._count]])
+
+    @property
+    def ids(self) -> np.ndarray:
+        if self._base is None:
+            return self._ids[: self._count]
+        return np.concatenate([self._base_ids[self._base_alive], self._ids[: self._count]])
+
+    def _reserve(self, rows: int) -> None:
+        capacity = self._buffer.shape[0]
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=self.dtype)
+        grown[: self._count] = self._buffer[: self._count]
+        grown_ids = np.zeros(capacity, dtype=np.int64)
+        grown_ids[: self._count] = self._ids[: self._count]
+        self._buffer = grown
+        self._ids = grown_ids
+
+    def add_with_ids(self, embeddings: np.ndarray, ids: np.ndarray) -> None:
         if embeddings.size == 0:
             return
-        self.vectors = np.vstack([self.vectors, embeddings])
+        embeddings = embeddings.reshape(-1, self.dim)
+        end = self._count + embeddings.shape[0]
+        self._reserve(end)
+        self._buffer[self._count:end] = embeddings
+        self._ids[self._count:end] = ids
+        self._count = end
+
+    def add(self, embeddings: np.ndarray) -> None:
+        start = self.ntotal
+        rows = embeddings.reshape(-1, self.dim).shape[0]
+        self.add_with_ids(embeddings, np.arange(start, start + rows, dtype=np.int64))
+
+    def remove_ids(self, ids: np.ndarray) -> int:
+        removed = 0
+        if self._base is not None:
+            dead = self._base_alive & np.isin(self._base_ids, ids)
+            removed += int(dead.sum())
+            self._base_alive &= ~dead
+            self._base_alive_count -= removed
+
+        local = self._ids[: self._count]
+        keep = ~np.isin(local, ids)
+        kept = int(keep.sum())
+        if kept != self._count:
+            removed += self._count - kept
+            self._buffer[:kept] = self._buffer[: self._count][keep]
+            self._ids[:kept] = local[keep]
+            self._count = kept
+        return removed
+
+    def _block_similarities(self, queries: np.ndarray, rows: np.ndarray, out: np.ndarray) -> None:
+        if rows.dtype == np.float32 and not isinstance(rows, np.memmap):
+            out[:] = queries @ rows.T
+            return
+        # float16 has no BLAS path and memmaps should be streamed; upcast in bounded blocks.
+        for start in range(0, rows.shape[0], self._SEARCH_BLOCK_ROWS):
+            block = np.asarray(rows[start:start + self._SEARCH_BLOCK_ROWS], dtype=np.float32)
+            out[:, start:start + block.shape[0]] = queries @ block.T
 
     def search(self, query: np.ndarray, top_k: int):
+        query = np.asarray(query, dtype=np.float32).reshape(-1, self.dim)
+        nq = query.shape[0]
+        scores = np.zeros((nq, top_k), dtype=np.float32)
+        ids = -np.ones((nq, top_k), dtype=np.int64)
         if self.ntotal == 0:
-            return np.zeros((1, top_k), dtype=np.float32), -np.ones((1, top_k), dtype=np.int64)
-        sims = np.dot(self.vectors, query[0])
-        order = np.argsort(-sims)[:top_k]
-        scores = sims[order]
-        return scores.reshape(1, -1).astype(np.float32), order.reshape(1, -1).astype(np.int64)
+            return scores, ids
+
+        base_rows = 0 if self._base is None else self._base.shape[0]
+        width = base_rows + self._count
+        sims = np.empty((nq, width), dtype=np.float32)
+        if base_rows:
+            self._block_similarities(query, self._base, sims[:, :base_rows])
+            sims[:, :base_rows][:, ~self._base_alive] = -np.inf
+        if self._count:
+            self._block_similarities(query, self._buffer[: self._count], sims[:, base_rows:])
+        row_ids = self._ids[: self._count] if not base_rows else np.concatenate([self._base_ids, self._ids[: self._count]])
+
+        k = min(top_k, self.ntotal)
+        if k < width:
+            candidates = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(width), (nq, width))
+        candidate_scores = np.take_along_axis(sims, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        ids[:, :k] = row_ids[np.take_along_axis(candidates, order, axis=1)]
+        scores[:, :k] = np.take_along_axis(candidate_scores, order, axis=1)
+        return scores, ids
+
+    def reconstruct_n(self, start: int, n: int) -> np.ndarray:
+        return self.vectors[start:start + n].astype(np.float32)
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._base is None:
+            return self.vectors.copy(), self.ids.copy()
+        # Concatenating base and delta already produces fresh arrays.
+        return self.vectors, self.ids
+
+    @staticmethod
+    def write_snapshot(path: Path, vectors: np.ndarray, ids: np.ndarray) -> None:
+        # IDs first: an ids file without matching vectors is ignored on load, the reverse is not.
+        _atomic_save_npy(path.with_suffix(".ids.npy"), ids)
+        _atomic_save_npy(path, vectors)
+
+    def save(self, path: Path) -> None:
+        self.write_snapshot(path, *self.snapshot())
+
+    @classmethod
+    def load(cls, path: Path, dim: int, use_float16: bool = False, mmap: bool = False) -> "_MemoryIndex":
+        stored = np.load(path, mmap_mode="r" if mmap else None)
+        ids_path = path.with_suffix(".ids.npy")
+        ids = np.load(ids_path) if ids_path.exists() else None
+        if ids is None or ids.shape[0] != stored.shape[0]:
+            ids = np.arange(stored.shape[0], dtype=np.int64)
+        if mmap:
+            index = cls(dim, use_float16=use_float16)
+            index._base = stored
+            index._base_ids = np.asarray(ids, dtype=np.int64)
+            index._base_alive = np.ones(stored.shape[0], dtype=bool)
+            index._base_alive_count = int(stored.shape[0])
+            return index
+        index = cls(dim, use_float16=use_float16, capacity=max(1024, stored.shape[0]))
+        index.add_with_ids(stored, ids)
+        return index
+
 
-    def reconstruct(self, i: int) -> np.ndarray:
-        return self.vectors[i]
+def _factory_string(index_type: str) -> str:
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{settings.FAISS_IVF_NLIST},Flat"
+    if index_type == "hnsw":
+        return f"HNSW{settings.FAISS_HNSW_M},Flat"
+    if index_type == "ivf_pq":
+        return f"IVF{settings.FAISS_IVF_NLIST},PQ{settings.FAISS_PQ_M}x{settings.FAISS_PQ_NBITS}"
+    raise ValueError(f"Unsupported FAISS_INDEX_TYPE '{index_type}', expected one of {', '.join(INDEX_TYPES)}")
+
+
+def index_kind(index) -> str:
+    if faiss is None or isinstance(index, _MemoryIndex):
+        return "flat"
+    if isinstance(index, faiss.IndexIDMap):
+        index = index.index
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
 
 
 class EmbeddingStore:
-    def __init__(self, dim: int, index_path: str):
+    """Vector index keyed by stable 64-bit embedding IDs.
+
+    IDs are handed out from a monotonically increasing counter and never
+    renumbered, so `embedding_index` values stored by main_app stay valid
+    after other faces are deleted.
+
+    Every add/remove is appended to a write-ahead log before it is applied,
+    so a request only pays for one small fsync. `save()` writes a full
+    checkpoint (temp file + atomic rename) and is normally driven by the
+    background checkpointer; `load()` replays whatever the last checkpoint
+    missed.
+
+    Searches share a read lock and run in parallel. Writers are serialized
+    and hold the exclusive side only while a change is applied; IVF training
+    is built aside and swapped in. HNSW graphs cannot drop nodes, so removed
+    IDs are tombstoned, filtered out of searches, and compacted away in one
+    rebuild by the next checkpoint.
+    """
+
+    def __init__(self, dim: int, index_path: str, index_type: str | None = None):
         self.dim = dim
         self.index_path = Path(index_path)
+        self.index_type = (index_type or settings.FAISS_INDEX_TYPE).lower()
+        _factory_string(self.index_type)
+        self.mmap = bool(settings.FAISS_MMAP_LOAD)
+        # Flat galleries are kept as raw .npy files when memory-mapped so workers share the page cache.
+        self.use_npy_layout = faiss is None or (self.mmap and self.index_type == "flat")
+        self.next_id = 0
         self.index = self._new_index()
+        self.load_seconds = 0.0
+        self._npy_generation = 0
+        self.wal = WriteAheadLog(self.index_path.with_suffix(".wal"), fsync=settings.FAISS_WAL_FSYNC)
+        self._seq = 0
+        self._checkpoint_seq = 0
+        # `_lock` serializes writers (WAL order, ID allocation, checkpoints). `_rw` lets searches run
+        # in parallel and only excludes them while a finished change is applied or an index swapped in.
+        self._lock = threading.RLock()
+        self._rw = ReadWriteLock()
+        self._checkpoint_lock = threading.Lock()
+        self._checkpointer: threading.Thread | None = None
+        self._stop_checkpointer = threading.Event()
+        self._tombstones: set[int] = set()
+        self._tombstone_selector = None
+
+    @property
+    def requires_training(self) -> bool:
+        return faiss is not None and self.index_type in {"ivf_flat", "ivf_pq"}
+
+    @property
+    def train_min_vectors(self) -> int:
+        return int(settings.FAISS_IVF_TRAIN_MIN_VECTORS or 39 * settings.FAISS_IVF_NLIST)
+
+    def _npy_path(self, generation: int) -> Path:
+        # Each checkpoint gets a new file so a live memory map is never overwritten in place.
+        if generation <= 0:
+            return self.index_path.with_suffix(".npy")
+        return self.index_path.with_suffix(f".g{generation}.npy")
+
+    @property
+    def memory_index_path(self) -> Path:
+        return self._npy_path(self._npy_generation)
+
+    @property
+    def meta_path(self) -> Path:
+        return self.index_path.with_suffix(".meta.json")
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal) - len(self._tombstones)
 
     def _new_index(self):
-        if faiss is None:
-            return _MemoryIndex(self.dim)
-        return faiss.IndexFlatIP(self.dim)
+        if self.use_npy_layout:
+            return _MemoryIndex(self.dim, use_float16=settings.MEMORY_INDEX_FLOAT16)
+        if self.requires_training:
+            # IVF indexes need trained centroids; serve from a flat index until there is enough data.
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+        return self.build_index(np.zeros((0, self.dim), dtype=np.float32))
 
-    def load(self) -> None:
-        if faiss is not None and self.index_path.exists():
-            self.index = faiss.read_index(str(self.index_path))
+    def build_index(self, vectors: np.ndarray, ids: np.ndarray | None = None, index_type: str | None = None):
+        index_type = (index_type or self.index_type).lower()
+        if ids is None:
+            ids = np.arange(vectors.shape[0], dtype=np.int64)
+        index = faiss.index_factory(self.dim, _factory_string(index_type), faiss.METRIC_INNER_PRODUCT)
+        if isinstance(faiss.downcast_index(index), faiss.IndexIVF):
+            # IVF lists store arbitrary IDs natively; a hashtable direct map keeps reconstruct and remove cheap.
+            index.train(vectors)
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
         else:
+            index = faiss.IndexIDMap2(index)
+        if vectors.shape[0]:
+            index.add_with_ids(vectors, ids.astype(np.int64))
+        return index
+
+    def all_ids(self) -> np.ndarray:
+        if self.index.ntotal == 0:
+            return np.zeros(0, dtype=np.int64)
+        if isinstance(self.index, _MemoryIndex):
+            return self.index.ids.copy()
+        if isinstance(self.index, faiss.IndexIDMap):
+            ids = faiss.vector_to_array(self.index.id_map)
+            return ids[self._live(ids)] if self._tombstones else ids
+        ivf = faiss.extract_index_ivf(self.index)
+        invlists = ivf.invlists
+        return np.concatenate(
+            [
+                faiss.rev_swig_ptr(invlists.get_ids(i), invlists.list_size(i)).copy()
+                for i in range(ivf.nlist)
+                if invlists.list_size(i)
+            ]
+        ).astype(np.int64)
+
+    def ids_and_vectors(self) -> tuple[np.ndarray, np.ndarray]:
+        total = self.index.ntotal
+        ids = self.all_ids()
+        if total == 0:
+            return ids, np.zeros((0, self.dim), dtype=np.float32)
+        if isinstance(self.index, _MemoryIndex):
+            return ids, self.index.reconstruct_n(0, total)
+        if isinstance(self.index, faiss.IndexIDMap):
+            vectors = self.index.index.reconstruct_n(0, total)
+            if self._tombstones:
+                vectors = vectors[self._live(faiss.vector_to_array(self.index.id_map))]
+            return ids, vectors
+        return ids, self.index.reconstruct_batch(ids)
+
+    def _live(self, ids: np.ndarray) -> np.ndarray:
+        return ~np.isin(ids, np.fromiter(self._tombstones, dtype=np.int64, count=len(self._tombstones)))
+
+    def _set_tombstones(self, tombstones: set[int]) -> None:
+        # Callers hold the write side of `_rw`; searches pick the selector up under the read side.
+        self._tombstones = tombstones
+        if not tombstones:
+            self._tombstone_selector = None
+            return
+        batch = faiss.IDSelectorBatch(np.fromiter(tombstones, dtype=np.int64, count=len(tombstones)))
+        # IDSelectorNot does not own `batch`; keep both alive together.
+        self._tombstone_selector = (faiss.IDSelectorNot(batch), batch)
+
+    def _compact(self) -> None:
+        """Rebuild the HNSW graph without its tombstoned nodes while searches keep using the old one."""
+        ids, vectors = self.ids_and_vectors()
+        rebuilt = self.build_index(vectors, ids, "hnsw")
+        with self._rw.write():
+            self.index = rebuilt
+            self._set_tombstones(set())
+
+    def train(self, force: bool = False) -> bool:
+        """Move the store onto its configured ANN index, training on the vectors already enrolled."""
+        if not self.requires_training or index_kind(self.index) == self.index_type:
+            return False
+        if not force and self.index.ntotal < self.train_min_vectors:
+            return False
+        with self._lock:
+            ids, vectors = self.ids_and_vectors()
+            trained = self.build_index(vectors, ids)
+            with self._rw.write():
+                self.index = trained
+        return True
+
+    def _adopt_loaded_index(self, index):
+        kind = index_kind(index)
+        if isinstance(index, faiss.IndexIDMap):
+            return index
+        if kind in {"ivf_flat", "ivf_pq"}:
+            faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+            return index
+        # Indexes written before stable IDs used row positions as IDs; keep those values.
+        vectors = index.reconstruct_n(0, index.ntotal) if index.ntotal else np.zeros((0, self.dim), dtype=np.float32)
+        return self.build_index(vectors, np.arange(index.ntotal, dtype=np.int64), kind)
+
+    def _read_meta(self) -> dict:
+        if not self.meta_path.exists():
+            return {}
+        try:
+            meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        except (ValueError, json.JSONDecodeError):
+            return {}
+        return meta if isinstance(meta, dict) else {}
+
+    def _apply_meta(self, meta: dict) -> None:
+        ids = self.all_ids()
+        next_id = int(ids.max()) + 1 if ids.size else 0
+        try:
+            next_id = max(next_id, int(meta.get("next_id", 0)))
+            checkpoint_seq = int(meta.get("checkpoint_seq", 0))
+        except (TypeError, ValueError):
+            checkpoint_seq = 0
+        self.next_id = next_id
+        self._checkpoint_seq = checkpoint_seq
+        self._seq = checkpoint_seq
+
+    def _replay_wal(self) -> int:
+        present = set(self.all_ids().tolist())
+        replayed = 0
+        for op, seq, ids, vectors in self.wal.replay():
+            if seq <= self._checkpoint_seq:
+                continue
+            if op == OP_ADD:
+                # Replay is idempotent: the checkpoint may already hold rows its meta file predates.
+                fresh = np.array([i not in present for i in ids.tolist()], dtype=bool)
+                if fresh.any():
+                    self._apply_add(vectors[fresh], ids[fresh])
+                    present.update(ids[fresh].tolist())
+                if ids.size:
+                    self.next_id = max(self.next_id, int(ids.max()) + 1)
+            elif op == OP_REMOVE:
+                # HNSW removals are only tombstoned here; the checkpoint after replay rebuilds once.
+                self._apply_remove(ids)
+                present.difference_update(ids.tolist())
+            self._seq = max(self._seq, seq)
+            replayed += 1
+        return replayed
+
+    def _load_index(self) -> bool:
+        """Load the last checkpoint; returns True when it had to be converted to the current layout."""
+        if self.use_npy_layout:
+            path = self.memory_index_path
+            if path.exists():
+                self.index = _MemoryIndex.load(path, self.dim, settings.MEMORY_INDEX_FLOAT16, mmap=self.mmap)
+                return False
+            if faiss is not None and self.index_path.exists():
+                # Switching an existing FAISS flat index over to the memory-mapped layout.
+                self.index = self._adopt_loaded_index(faiss.read_index(str(self.index_path)))
+                ids, vectors = self.ids_and_vectors()
+                self.index = self._new_index()
+                self.index.add_with_ids(vectors, ids)
+                return True
+        elif self._npy_generation > 0 and self.memory_index_path.exists():
+            # The last checkpoint was written in the .npy layout (FAISS_MMAP_LOAD was on); any
+            # faiss.index next to it predates it. Convert back instead of loading the stale file.
+            stored = _MemoryIndex.load(self.memory_index_path, self.dim)
             self.index = self._new_index()
+            self.index.add_with_ids(stored.vectors.astype(np.float32), stored.ids)
+            self._npy_generation = 0
+            self.train()
+            return True
+        elif self.index_path.exists():
+            self.index = self._adopt_loaded_index(faiss.read_index(str(self.index_path)))
+            self.train()
+            return False
+        self.index = self._new_index()
+        return False
+
+    def load(self) -> None:
+        started = time.perf_counter()
+        with self._lock:
+            self.wal.close()
+            self._set_tombstones(set())
+            meta = self._read_meta()
+            self._npy_generation = int(meta.get("npy_generation", 0) or 0)
+            converted = self._load_index()
+            self._apply_meta(meta)
+            replayed = self._replay_wal()
+        self.load_seconds = time.perf_counter() - started
+        if replayed or converted or self.wal.rotated_path.exists():
+            # Fold recovered operations into a fresh checkpoint so the logs start clean.
+            self.save()
+
+    @property
+    def dirty(self) -> bool:
+        return self._seq != self._checkpoint_seq
+
+    def _remove_stale_generations(self) -> None:
+        current = {self.memory_index_path, self.memory_index_path.with_suffix(".ids.npy")}
+        for path in self.index_path.parent.glob(f"{self.index_path.stem}.g*.npy"):
+            if path in current:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                # Still mapped on platforms that lock mapped files; retried after the next checkpoint.
+                pass
 
     def save(self) -> None:
-        if faiss is None:
+        """Write a full checkpoint and drop the WAL records it covers."""
+        with self._checkpoint_lock:
+            with self._lock:
+                if self._tombstones:
+                    self._compact()
+                seq = self._seq
+                next_id = self.next_id
+                if isinstance(self.index, _MemoryIndex):
+                    snapshot = self.index.snapshot()
+                else:
+                    snapshot = faiss.serialize_index(self.index)
+                # New operations go to a fresh log while the snapshot is written.
+                self.wal.rotate()
+
+            generation = self._npy_generation
+            if isinstance(snapshot, tuple):
+                generation += 1
+                _MemoryIndex.write_snapshot(self._npy_path(generation), *snapshot)
+            else:
+                _atomic_write(self.index_path, snapshot.tobytes())
+            meta = {"next_id": next_id, "checkpoint_seq": seq, "npy_generation": generation}
+            _atomic_write(self.meta_path, json.dumps(meta).encode("utf-8"))
+            self.wal.discard_rotated()
+
+            with self._lock:
+                self._npy_generation = generation
+                self._checkpoint_seq = seq
+                if self.mmap and isinstance(snapshot, tuple) and self._seq == seq:
+                    # Nothing changed while writing: swap private rows for the freshly mapped file.
+                    mapped = _MemoryIndex.load(self.memory_index_path, self.dim, settings.MEMORY_INDEX_FLOAT16, mmap=True)
+                    with self._rw.write():
+                        self.index = mapped
+            if isinstance(snapshot, tuple) or generation == 0:
+                # Also drops the .npy checkpoints left behind when a store leaves that layout.
+                self._remove_stale_generations()
+
+    def stats(self) -> dict:
+        index = self.index
+        return {
+            "vectors": self.ntotal,
+            "tombstones": len(self._tombstones),
+            "index_type": index_kind(index),
+            "layout": "npy" if isinstance(index, _MemoryIndex) else "faiss",
+            "mmap": bool(isinstance(index, _MemoryIndex) and index.is_mapped),
+            "mapped_bytes": index.mapped_bytes if isinstance(index, _MemoryIndex) else 0,
+            "load_seconds": round(self.load_seconds, 4),
+            "wal_bytes": self.wal.size_bytes(),
+            "dirty": self.dirty,
+        }
+
+    def _checkpoint_loop(self, interval_seconds: float) -> None:
+        while not self._stop_checkpointer.wait(interval_seconds):
+            if self.dirty:
+                self.save()
+
+    def start_checkpointer(self, interval_seconds: float | None = None) -> None:
+        interval = float(interval_seconds if interval_seconds is not None else settings.FAISS_CHECKPOINT_INTERVAL_SECONDS)
+        if interval <= 0 or (self._checkpointer is not None and self._checkpointer.is_alive()):
             return
-        self.index_path.parent.mkdir(parents=True, exist_ok=True)
-        faiss.write_index(self.index, str(self.index_path))
+        self._stop_checkpointer.clear()
+        self._checkpointer = threading.Thread(
+            target=self._checkpoint_loop,
+            args=(interval,),
+            daemon=True,
+            name=f"faiss-checkpoint-{self.index_path.stem}",
+        )
+        self._checkpointer.start()
 
-    def add(self, embeddings: np.ndarray) -> list[int]:
+    def stop_checkpointer(self, final_checkpoint: bool = True) -> None:
+        self._stop_checkpointer.set()
+        if self._checkpointer is not None:
+            self._checkpointer.join()
+            self._checkpointer = None
+        if final_checkpoint and self.dirty:
+            self.save()
+        self.wal.close()
+
+    def _apply_add(self, embeddings: np.ndarray, ids: np.ndarray) -> None:
+        with self._rw.write():
+            self.index.add_with_ids(embeddings, ids)
+        self.train()
+
+    def _apply_remove(self, ids: np.ndarray) -> int:
+        if index_kind(self.index) != "hnsw":
+            with self._rw.write():
+                return int(self.index.remove_ids(ids))
+
+        # HNSW graphs cannot drop nodes; hide them from searches until the next checkpoint compacts.
+        doomed = np.unique(ids)
+        doomed = doomed[np.isin(doomed, self.all_ids())]
+        if doomed.size:
+            with self._rw.write():
+                self._set_tombstones(self._tombstones | set(doomed.tolist()))
+        return int(doomed.size)
+
+    def reserve_ids(self, count: int) -> list[int]:
+        """Allocate IDs up front so callers can publish payloads before the vectors become searchable."""
+        with self._lock:
+            start = self.next_id
+            self.next_id += int(count)
+        return list(range(start, start + int(count)))
+
+    def add(self, embeddings: np.ndarray, ids: list[int] | None = None) -> list[int]:
+        """Append vectors under new IDs, or under `ids` from `reserve_ids` / another store."""
         if embeddings.dtype != np.float32:
             embeddings = embeddings.astype(np.float32)
-        start = self.index.ntotal
-        self.index.add(embeddings)
-        end = self.index.ntotal
-        return list(range(start, end))
+        with self._lock:
+            if ids is None:
+                ids = np.arange(self.next_id, self.next_id + embeddings.shape[0], dtype=np.int64)
+            else:
+                ids = np.asarray(ids, dtype=np.int64)
+            if ids.size == 0:
+                return []
+            self.wal.append(OP_ADD, self._seq + 1, ids, embeddings)
+            self._seq += 1
+            self.next_id = max(self.next_id, int(ids.max()) + 1)
+            self._apply_add(embeddings, ids)
+        return [int(i) for i in ids]
+
+    def remove(self, remove_ids: list[int]) -> int:
+        if not remove_ids:
+            return 0
+        ids = np.asarray(remove_ids, dtype=np.int64)
+        with self._lock:
+            self.wal.append(OP_REMOVE, self._seq + 1, ids)
+            self._seq += 1
+            return self._apply_remove(ids)
+
+    def _search_params(self, index, nprobe: int | None, ef_search: int | None):
+        kind = index_kind(index)
+        if kind in {"ivf_flat", "ivf_pq"}:
+            return faiss.SearchParametersIVF(nprobe=max(1, int(nprobe or settings.FAISS_NPROBE)))
+        if kind == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=max(1, int(ef_search or settings.FAISS_EF_SEARCH)))
+            if self._tombstone_selector is not None:
+                params.sel = self._tombstone_selector[0]
+            return params
+        return None
 
-    def search(self, embedding: np.ndarray, top_k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    def search(
+        self,
+        embedding: np.ndarray,
+        top_k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
         if embedding.ndim == 1:
             embedding = embedding.reshape(1, -1)
         if embedding.dtype != np.float32:
             embedding = embedding.astype(np.float32)
-        scores, ids = self.index.search(embedding, top_k)
-        return scores, ids
-
-    def rebuild_without(self, remove_ids: list[int]) -> None:
-        if not remove_ids:
-            return
-
-        total = self.index.ntotal
-        keep = [i for i in range(total) if i not in set(remove_ids)]
-        if not keep:
-            self.index = self._new_index()
-            return
-
-        vectors = np.vstack([self.index.reconstruct(i) for i in keep]).astype(np.float32)
-        self.index = self._new_index()
-        self.index.add(vectors)
+        with self._rw.read():
+            index = self.index
+            params = self._search_params(index, nprobe, ef_search) if faiss is not None else None
+            if params is not None:
+                return index.search(embedding, top_k, params=params)
+            return index.search(embedding, top_k)
@@ -1,61 +1,170 @@
 import json
+import sqlite3
+import threading
 from pathlib import Path
 
 
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS id_map (
+        embedding_id INTEGER PRIMARY KEY,
+        face_id TEXT,
+        user_id TEXT,
+        payload TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_id_map_face_id ON id_map (face_id)",
+    "CREATE INDEX IF NOT EXISTS ix_id_map_user_id ON id_map (user_id)",
+)
+
+# SQLite caps bound parameters per statement; stay well below the oldest default (999).
+_MAX_PARAMS = 500
+
+
 class IDMapStore:
-    def __init__(self, path: str):
+    """Embedding ID -> payload map persisted in SQLite.
+
+    Lookups are indexed queries, so nothing is parsed up front. `set` and
+    `remove_ids` are staged per thread and `save` commits them in a single
+    transaction, so a registration or deletion lands completely or not at all
+    and concurrent lookups only ever see committed rows.
+    """
+
+    def __init__(self, path: str, legacy_json_path: str | None = None):
         self.path = Path(path)
-        self.data: dict[str, dict] = {}
+        self.legacy_json_path = Path(legacy_json_path) if legacy_json_path else None
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    @property
+    def _pending_upserts(self) -> dict[int, dict]:
+        if not hasattr(self._local, "upserts"):
+            self._local.upserts = {}
+        return self._local.upserts
+
+    @property
+    def _pending_deletes(self) -> set[int]:
+        if not hasattr(self._local, "deletes"):
+            self._local.deletes = set()
+        return self._local.deletes
+
+    def _clear_pending(self) -> None:
+        self._local.upserts = {}
+        self._local.deletes = set()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
 
     def load(self) -> None:
-        if not self.path.exists():
-            self.data = {}
-            return
-        raw = self.path.read_text(encoding="utf-8-sig").strip()
-        if not raw:
-            self.data = {}
-            self.save()
-            return
+        self._connect()
+        self._clear_pending()
+        if self.legacy_json_path is not None:
+            self.migrate_json(self.legacy_json_path)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    def migrate_json(self, json_path: Path) -> int:
+        """One-shot import of the legacy id_map.json; the file is renamed once imported."""
+        if not json_path.exists():
+            return 0
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM id_map LIMIT 1").fetchone() is not None:
+            return 0
 
+        raw = json_path.read_text(encoding="utf-8-sig").strip()
         try:
-            parsed = json.loads(raw)
+            parsed = json.loads(raw) if raw else {}
         except json.JSONDecodeError:
-            # Recover from partially deleted/corrupted state files.
-            self.data = {}
-            self.save()
-            return
-
-        if isinstance(parsed, dict):
-            self.data = parsed
-            return
+            parsed = {}
+        if not isinstance(parsed, dict):
+            parsed = {}
 
-        self.data = {}
-        self.save()
+        rows = [_row(int(k), v) for k, v in parsed.items() if isinstance(v, dict)]
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO id_map VALUES (?, ?, ?, ?)", rows)
+        json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        return len(rows)
 
     def save(self) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.path.write_text(json.dumps(self.data, indent=2), encoding="utf-8")
+        if not self._pending_upserts and not self._pending_deletes:
+            return
+        conn = self._connect()
+        with conn:
+            ids = sorted(self._pending_deletes)
+            for start in range(0, len(ids), _MAX_PARAMS):
+                chunk = ids[start:start + _MAX_PARAMS]
+                conn.execute(f"DELETE FROM id_map WHERE embedding_id IN ({','.join('?' * len(chunk))})", chunk)
+            conn.executemany(
+                "INSERT OR REPLACE INTO id_map VALUES (?, ?, ?, ?)",
+                [_row(k, v) for k, v in self._pending_upserts.items()],
+            )
+        self._clear_pending()
 
     def set(self, index_id: int, payload: dict) -> None:
-        self.data[str(index_id)] = payload
+        index_id = int(index_id)
+        self._pending_deletes.discard(index_id)
+        self._pending_upserts[index_id] = payload
 
     def get(self, index_id: int) -> dict | None:
-        return self.data.get(str(index_id))
+        return self.get_many([index_id])[0]
+
+    def get_many(self, index_ids: list[int]) -> list[dict | None]:
+        wanted = [int(i) for i in index_ids]
+        found: dict[int, dict] = {}
+        stored = [i for i in set(wanted) if i not in self._pending_upserts and i not in self._pending_deletes]
+        if stored:
+            conn = self._connect()
+            for start in range(0, len(stored), _MAX_PARAMS):
+                chunk = stored[start:start + _MAX_PARAMS]
+                cursor = conn.execute(
+                    f"SELECT embedding_id, payload FROM id_map WHERE embedding_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for embedding_id, payload in cursor:
+                    found[int(embedding_id)] = json.loads(payload)
+        found.update({i: self._pending_upserts[i] for i in wanted if i in self._pending_upserts})
+        return [found.get(i) for i in wanted]
 
     def remove_ids(self, index_ids: list[int]) -> None:
-        to_remove = {str(idx) for idx in index_ids}
-        self.data = {k: v for k, v in self.data.items() if k not in to_remove}
+        for idx in index_ids:
+            self._pending_upserts.pop(int(idx), None)
+            self._pending_deletes.add(int(idx))
 
-    def find_indices_by_face_id(self, face_id: str) -> list[int]:
-        out: list[int] = []
-        for k, v in self.data.items():
-            if v.get("face_id") == face_id:
-                out.append(int(k))
+    def _find_indices(self, column: str, value: str) -> list[int]:
+        conn = self._connect()
+        out = {int(row[0]) for row in conn.execute(f"SELECT embedding_id FROM id_map WHERE {column} = ?", (value,))}
+        out -= self._pending_deletes | set(self._pending_upserts)
+        out |= {k for k, v in self._pending_upserts.items() if v.get(column) == value}
         return sorted(out)
 
+    def find_indices_by_face_id(self, face_id: str) -> list[int]:
+        return self._find_indices("face_id", face_id)
+
     def find_indices_by_user_id(self, user_id: str) -> list[int]:
-        out: list[int] = []
-        for k, v in self.data.items():
-            if v.get("user_id") == user_id:
-                out.append(int(k))
-        return sorted(out)
+        return self._find_indices("user_id", user_id)
+
+    def count(self) -> int:
+        conn = self._connect()
+        return int(conn.execute("SELECT COUNT(*) FROM id_map").fetchone()[0])
+
+
+def _row(index_id: int, payload: dict) -> tuple:
+    return (int(index_id), payload.get("face_id"), payload.get("user_id"), json.dumps(payload))
@@ -0,0 +1,185 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.engine.matcher import FaceMatcher
+from app.vector.embedding_store import EmbeddingStore
+from app.vector.id_map import IDMapStore
+
+
+ORGANIZATION_ID_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+_ORGANIZATION_ID_RE = re.compile(ORGANIZATION_ID_PATTERN)
+
+
+class TenantPartition:
+    def __init__(self, organization_id: str | None, store: EmbeddingStore, id_map: IDMapStore):
+        self.organization_id = organization_id
+        self.store = store
+        self.id_map = id_map
+        self.matcher = FaceMatcher(store, id_map)
+        self.leases = 0
+        self.requests = 0
+        self.last_used = time.monotonic()
+
+    def load(self) -> None:
+        self.store.load()
+        self.id_map.load()
+        self.store.start_checkpointer()
+
+    def close(self) -> None:
+        self.store.stop_checkpointer(final_checkpoint=True)
+        self.id_map.close()
+
+    def stats(self) -> dict:
+        return {
+            **self.store.stats(),
+            "requests": self.requests,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+class TenantVectorRegistry:
+    """One embedding store + ID map per organization, loaded on first use.
+
+    Each organization's gallery lives under `<root>/<organization_id>/`, so a
+    search only scans that tenant's faces. At most `max_loaded` partitions
+    stay in memory; the least recently used idle one is checkpointed and
+    closed when another has to be loaded. Requests without an organization
+    use the default partition (the pre-partitioning shared index), and so do
+    all requests while `partitioned` is off.
+    """
+
+    def __init__(self, dim: int, root: str, default: TenantPartition, max_loaded: int = 32, partitioned: bool = True):
+        self.dim = dim
+        self.partitioned = partitioned
+        self.root = Path(root)
+        self.default = default
+        self.max_loaded = max(1, int(max_loaded))
+        self._partitions: OrderedDict[str, TenantPartition] = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-organization loads in progress, and evicted partitions still checkpointing.
+        # Both are waited on outside `_lock` so one cold tenant never blocks the others.
+        self._loading: dict[str, Future] = {}
+        self._closing: dict[str, threading.Event] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def _partition_for(self, organization_id: str) -> TenantPartition:
+        directory = self.root / organization_id
+        store = EmbeddingStore(self.dim, str(directory / "faiss.index"))
+        id_map = IDMapStore(str(directory / "id_map.sqlite3"))
+        return TenantPartition(organization_id, store, id_map)
+
+    def _take_evictions(self) -> list[TenantPartition]:
+        evicted = []
+        for organization_id in list(self._partitions):
+            if len(self._partitions) <= self.max_loaded:
+                break
+            partition = self._partitions[organization_id]
+            if partition.leases:
+                continue
+            del self._partitions[organization_id]
+            self._closing[organization_id] = threading.Event()
+            evicted.append(partition)
+        self.evictions += len(evicted)
+        return evicted
+
+    def _close_evicted(self, evicted: list[TenantPartition]) -> None:
+        for partition in evicted:
+            try:
+                partition.close()
+            finally:
+                # Only now may the organization be reloaded: the final checkpoint rewrote its WAL and meta.
+                with self._lock:
+                    done = self._closing.pop(partition.organization_id)
+                done.set()
+
+    def _pin(self, organization_id: str, partition: TenantPartition) -> list[TenantPartition]:
+        # Caller holds `_lock`.
+        self._partitions.move_to_end(organization_id)
+        partition.leases += 1
+        return self._take_evictions()
+
+    def _acquire(self, organization_id: str | None) -> TenantPartition:
+        if not organization_id or not self.partitioned:
+            partition = self.default
+            with self._lock:
+                partition.leases += 1
+            return partition
+        if not _ORGANIZATION_ID_RE.match(organization_id):
+            raise ValueError(f"Invalid organization_id '{organization_id}'")
+
+        while True:
+            loading = closing = None
+            with self._lock:
+                partition = self._partitions.get(organization_id)
+                if partition is not None:
+                    evicted = self._pin(organization_id, partition)
+                else:
+                    closing = self._closing.get(organization_id)
+                    loading = self._loading.get(organization_id)
+                    if closing is None and loading is None:
+                        loading = self._loading[organization_id] = Future()
+                        break
+            if partition is not None:
+                self._close_evicted(evicted)
+                return partition
+            if closing is not None:
+                closing.wait()
+            else:
+                # Another request is loading this organization; its failure is ours too.
+                loading.result()
+
+        try:
+            partition = self._partition_for(organization_id)
+            partition.load()
+        except BaseException as exc:
+            with self._lock:
+                self._loading.pop(organization_id)
+            loading.set_exception(exc)
+            raise
+        with self._lock:
+            self._loading.pop(organization_id)
+            self._partitions[organization_id] = partition
+            self.loads += 1
+            evicted = self._pin(organization_id, partition)
+        loading.set_result(None)
+        self._close_evicted(evicted)
+        return partition
+
+    @contextmanager
+    def lease(self, organization_id: str | None) -> Iterator[TenantPartition]:
+        """Pin an organization's partition for the duration of a request."""
+        partition = self._acquire(organization_id)
+        try:
+            yield partition
+        finally:
+            with self._lock:
+                partition.leases -= 1
+                partition.requests += 1
+                partition.last_used = time.monotonic()
+
+    def close(self) -> None:
+        with self._lock:
+            partitions = list(self._partitions.values())
+            self._partitions.clear()
+        for partition in partitions:
+            partition.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            partitions = list(self._partitions.items())
+        return {
+            "partitioned": self.partitioned,
+            "loaded": len(partitions),
+            "max_loaded": self.max_loaded,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "default": self.default.stats(),
+            "tenants": {organization_id: partition.stats() for organization_id, partition in partitions},
+        }
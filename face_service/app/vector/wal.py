@@ -0,0 +1,99 @@
+import os
+import struct
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+
+OP_ADD = 1
+OP_REMOVE = 2
+
+# magic, op, seq, row count, dim, payload crc32
+_HEADER = struct.Struct("<4sBQIII")
+_MAGIC = b"FWAL"
+
+
+class WriteAheadLog:
+    """Append-only log of vector adds/removes, fsync'd per record.
+
+    A checkpoint rotates the live file to `<wal>.checkpoint` while the index
+    is serialized and deletes it once the new index file is in place, so a
+    crash at any point leaves every operation in either the index or a log.
+    Replay stops at the first torn or corrupt record.
+    """
+
+    def __init__(self, path: Path, fsync: bool = True):
+        self.path = path
+        self.rotated_path = path.with_name(path.name + ".checkpoint")
+        self.fsync = fsync
+        self._fh = None
+
+    def _open(self):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "ab")
+        return self._fh
+
+    def append(self, op: int, seq: int, ids: np.ndarray, vectors: np.ndarray | None = None) -> None:
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        body = ids.tobytes()
+        dim = 0
+        if vectors is not None:
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            dim = int(vectors.shape[1])
+            body += vectors.tobytes()
+        header = _HEADER.pack(_MAGIC, op, seq, ids.shape[0], dim, zlib.crc32(body))
+        fh = self._open()
+        fh.write(header + body)
+        fh.flush()
+        if self.fsync:
+            os.fsync(fh.fileno())
+
+    def rotate(self) -> None:
+        self.close()
+        if self.path.exists():
+            if self.rotated_path.exists():
+                # A previous checkpoint never finished; keep both logs by concatenating.
+                with open(self.rotated_path, "ab") as dst, open(self.path, "rb") as src:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                self.path.unlink()
+            else:
+                os.replace(self.path, self.rotated_path)
+
+    def discard_rotated(self) -> None:
+        self.rotated_path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def replay(self) -> Iterator[tuple[int, int, np.ndarray, np.ndarray | None]]:
+        for path in (self.rotated_path, self.path):
+            if path.exists():
+                yield from _read_records(path)
+
+    def size_bytes(self) -> int:
+        return sum(p.stat().st_size for p in (self.rotated_path, self.path) if p.exists())
+
+
+def _read_records(path: Path) -> Iterator[tuple[int, int, np.ndarray, np.ndarray | None]]:
+    raw = path.read_bytes()
+    offset = 0
+    while offset + _HEADER.size <= len(raw):
+        magic, op, seq, count, dim, crc = _HEADER.unpack_from(raw, offset)
+        size = count * 8 + count * dim * 4
+        start = offset + _HEADER.size
+        body = raw[start:start + size]
+        if magic != _MAGIC or len(body) != size or zlib.crc32(body) != crc:
+            return
+        ids = np.frombuffer(body, dtype=np.int64, count=count)
+        vectors = None
+        if dim:
+            vectors = np.frombuffer(body, dtype=np.float32, offset=count * 8).reshape(count, dim)
+        yield op, seq, ids, vectors
+        offset = start + size
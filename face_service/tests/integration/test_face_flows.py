@@ -1,10 +1,16 @@
+import json
 import os
+import time
 import unittest
 
 os.environ["STORAGE_ROOT"] = "./storage_test"
 os.environ["FAISS_INDEX_PATH"] = "./storage_test/embeddings/faiss.index"
 os.environ["FAISS_ID_MAP_PATH"] = "./storage_test/embeddings/id_map.json"
+os.environ["FAISS_ID_MAP_DB_PATH"] = "./storage_test/embeddings/id_map.sqlite3"
+os.environ["TENANT_INDEX_ROOT"] = "./storage_test/embeddings/tenants"
 
+import cv2
+import numpy as np
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -16,8 +22,11 @@ class FaceServiceIntegrationTests(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         cls._orig_register = faces_api.register_faces_service
-        cls._orig_recognize = faces_api.recognize
+        cls._orig_recognize = faces_api.recognize_async
         cls._orig_delete = faces_api.delete_face_service
+        cls._orig_recognize_image = faces_api.recognize_image_async
+        cls._orig_recognize_frames = faces_api.recognize_frames_async
+        cls.raw_calls = []
 
         def fake_register(user_id, images, store, id_map, policies=None):
             return {
@@ -31,7 +40,7 @@ class FaceServiceIntegrationTests(unittest.TestCase):
                 ],
             }
 
-        def fake_recognize(payload, matcher):
+        async def fake_recognize(payload, matcher):
             return RecognizeResponse(
                 source_type=payload.source_type,
                 results=[
@@ -49,12 +58,28 @@ class FaceServiceIntegrationTests(unittest.TestCase):
                 errors=[],
             )
 
+        async def fake_recognize_image(img, *, source_type, source_id, timestamp, policy, matcher, tracks=None, face_boxes=None):
+            cls.raw_calls.append({"shape": img.shape, "source_id": source_id, "policy": policy})
+            return await fake_recognize(type("Payload", (), {"source_type": source_type})(), matcher)
+
+        async def fake_recognize_frames(frames):
+            return [
+                RecognizeResponse(
+                    source_type=frame["source_type"],
+                    results=[],
+                    errors=[] if frame["img"] is not None else [{"code": "INVALID_IMAGE"}],
+                )
+                for frame in frames
+            ]
+
         def fake_delete(face_id, store, id_map):
             return {"status": "deleted", "face_id": face_id}
 
         faces_api.register_faces_service = fake_register
-        faces_api.recognize = fake_recognize
+        faces_api.recognize_async = fake_recognize
         faces_api.delete_face_service = fake_delete
+        faces_api.recognize_image_async = fake_recognize_image
+        faces_api.recognize_frames_async = fake_recognize_frames
 
         cls.client_ctx = TestClient(app)
         cls.client = cls.client_ctx.__enter__()
@@ -62,8 +87,10 @@ class FaceServiceIntegrationTests(unittest.TestCase):
     @classmethod
     def tearDownClass(cls):
         faces_api.register_faces_service = cls._orig_register
-        faces_api.recognize = cls._orig_recognize
+        faces_api.recognize_async = cls._orig_recognize
         faces_api.delete_face_service = cls._orig_delete
+        faces_api.recognize_image_async = cls._orig_recognize_image
+        faces_api.recognize_frames_async = cls._orig_recognize_frames
         cls.client_ctx.__exit__(None, None, None)
 
     def test_register_recognize_delete_flow(self):
@@ -97,6 +124,75 @@ class FaceServiceIntegrationTests(unittest.TestCase):
         self.assertEqual(delete.status_code, 200)
         self.assertEqual(delete.json()["data"]["status"], "deleted")
 
+    def test_raw_recognize_decodes_body_bytes(self):
+        ok, encoded = cv2.imencode(".jpg", np.zeros((48, 64, 3), dtype=np.uint8))
+        self.assertTrue(ok)
+        resp = self.client.post(
+            "/faces/recognize/raw",
+            content=encoded.tobytes(),
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Source-Type": "camera",
+                "X-Source-Id": "CAM_2",
+                "X-Timestamp": "2026-02-27T10:00:00",
+                "X-Policy": json.dumps({"recognition.threshold": 0.7}),
+            },
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["data"]["results"][0]["status"], "matched")
+        self.assertEqual(self.raw_calls[-1]["shape"], (48, 64, 3))
+        self.assertEqual(self.raw_calls[-1]["policy"], {"recognition.threshold": 0.7})
+
+        bad = self.client.post(
+            "/faces/recognize/raw",
+            content=b"not an image",
+            headers={"X-Source-Type": "camera", "X-Source-Id": "CAM_2"},
+        )
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(bad.json()["code"], "INVALID_IMAGE")
+
+    def test_batch_recognize_keeps_frame_order(self):
+        ok, encoded = cv2.imencode(".jpg", np.zeros((32, 32, 3), dtype=np.uint8))
+        self.assertTrue(ok)
+        metadata = [
+            {"source_type": "camera", "source_id": "CAM_1"},
+            {"source_type": "camera", "source_id": "CAM_2"},
+            {"source_type": "wall_camera", "source_id": "CAM_3"},
+        ]
+        resp = self.client.post(
+            "/faces/recognize/batch",
+            data={"metadata": json.dumps(metadata)},
+            files=[
+                ("frames", ("1.jpg", encoded.tobytes(), "image/jpeg")),
+                ("frames", ("2.jpg", b"broken", "image/jpeg")),
+                ("frames", ("3.jpg", encoded.tobytes(), "image/jpeg")),
+            ],
+        )
+        self.assertEqual(resp.status_code, 200)
+        frames = resp.json()["data"]["frames"]
+        self.assertEqual([f["source_id"] for f in frames], ["CAM_1", "CAM_2", "CAM_3"])
+        self.assertEqual([f["frame_index"] for f in frames], [0, 1, 2])
+        self.assertEqual(frames[1]["errors"], [{"code": "INVALID_IMAGE"}])
+
+        mismatched = self.client.post(
+            "/faces/recognize/batch",
+            data={"metadata": json.dumps(metadata[:1])},
+            files=[("frames", ("1.jpg", encoded.tobytes(), "image/jpeg"))] * 2,
+        )
+        self.assertEqual(mismatched.status_code, 400)
+        self.assertEqual(mismatched.json()["code"], "INVALID_BATCH_METADATA")
+
+    def test_ready_reports_ready_once_warm_up_finishes(self):
+        deadline = time.monotonic() + 30
+        ready = self.client.get("/ready")
+        while ready.status_code == 503 and ready.json()["warmup"]["status"] == "warming" and time.monotonic() < deadline:
+            time.sleep(0.05)
+            ready = self.client.get("/ready")
+
+        self.assertEqual(ready.status_code, 200, ready.json())
+        self.assertEqual(ready.json()["status"], "ready")
+        self.assertIn("embedder", ready.json()["warmup"]["steps_ms"])
+
 
 if __name__ == "__main__":
     unittest.main()
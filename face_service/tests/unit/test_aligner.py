@@ -0,0 +1,60 @@
+import unittest
+
+import cv2
+import numpy as np
+
+from app.engine.aligner import ARCFACE_TEMPLATE, LANDMARK_ORDER, FaceAligner
+
+
+def _previous_align(image, box, landmarks):
+    """The aligner this module replaced: full-frame rotation, padded crop, resize."""
+    x1, y1, x2, y2 = box
+    left_eye, right_eye = landmarks["left_eye"], landmarks["right_eye"]
+    angle = np.degrees(np.arctan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0])) - 180.0
+    center = (int((left_eye[0] + right_eye[0]) / 2.0), int((left_eye[1] + right_eye[1]) / 2.0))
+    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+    image = cv2.warpAffine(image, M, (image.shape[1], image.shape[0]), flags=cv2.INTER_CUBIC)
+    pts = [(int(M[0, 0] * x + M[0, 1] * y + M[0, 2]), int(M[1, 0] * x + M[1, 1] * y + M[1, 2])) for x, y in [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]]
+    x1, y1 = min(p[0] for p in pts), min(p[1] for p in pts)
+    x2, y2 = max(p[0] for p in pts), max(p[1] for p in pts)
+    pad = int((x2 - x1) * 0.1)
+    h, w = image.shape[:2]
+    return cv2.resize(image[max(0, y1 - pad):min(h, y2 + pad), max(0, x1 - pad):min(w, x2 + pad)], (112, 112))
+
+
+class FaceAlignerTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        small = rng.integers(0, 255, (60, 80, 3), dtype=np.uint8)
+        self.image = cv2.resize(small, (800, 600), interpolation=cv2.INTER_CUBIC)
+
+    def test_template_mode_maps_landmarks_onto_the_arcface_template(self):
+        angle, scale, shift = np.radians(15), 2.5, np.array([300.0, 200.0])
+        R = scale * np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        points = ARCFACE_TEMPLATE @ R.T + shift
+        landmarks = {name: point.tolist() for name, point in zip(LANDMARK_ORDER, points)}
+
+        M = FaceAligner("template").transform(self.image, [300, 200, 580, 480], landmarks)
+        mapped = points @ M[:, :2].T + M[:, 2]
+
+        np.testing.assert_allclose(mapped, ARCFACE_TEMPLATE, atol=1e-6)
+        self.assertEqual(FaceAligner("template").align(self.image, [300, 200, 580, 480], landmarks).shape, (112, 112, 3))
+
+    def test_legacy_mode_matches_the_previous_full_frame_warp(self):
+        box = [250, 150, 450, 390]
+        landmarks = {"right_eye": [300.0, 230.0], "left_eye": [400.0, 250.0]}
+        expected = _previous_align(self.image, box, landmarks).astype(np.float32)
+        actual = FaceAligner("legacy").align(self.image, box, landmarks).astype(np.float32)
+
+        self.assertLess(float(np.abs(expected - actual).mean()), 3.0)
+
+    def test_without_landmarks_the_padded_box_is_resized(self):
+        box = [100, 120, 300, 320]
+        expected = cv2.resize(self.image[100:340, 80:320], (112, 112)).astype(np.float32)
+        actual = FaceAligner("template").align(self.image, box).astype(np.float32)
+
+        self.assertLess(float(np.abs(expected - actual).mean()), 1.0)
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "ALIGNMENT_MODE"):
+            FaceAligner("templat")
@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import FaceException
+from app.engine.detector import FaceDetector
+from app.engine.detector_backends import DetectorBackend
+
+
+class _FakeBackend(DetectorBackend):
+    def __init__(self, faces):
+        self.faces = faces
+        self.calls: list[tuple[list[tuple[int, int]], int]] = []
+
+    def find_faces(self, images, grays, min_size=50):
+        self.calls.append(([g.shape[:2] for g in grays], min_size))
+        return [[{**face, "landmarks": dict(face["landmarks"])} for face in self.faces] for _ in images]
+
+
+class DetectorHintTests(unittest.TestCase):
+    def setUp(self):
+        self.backend = _FakeBackend([{"box": [10, 20, 50, 60], "score": 0.9, "landmarks": {"left_eye": [20.0, 30.0]}}])
+        self.detector = FaceDetector(self.backend)
+        self._orig_margin = settings.FACE_HINT_MARGIN
+        settings.FACE_HINT_MARGIN = 0.25
+        self.image = np.zeros((400, 600, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        settings.FACE_HINT_MARGIN = self._orig_margin
+
+    def test_refine_detects_inside_the_expanded_hint_and_maps_back(self):
+        faces = self.detector.detect_in_regions(self.image, [[200, 100, 300, 200]], min_laplacian_variance=0)
+
+        self.assertEqual(self.backend.calls, [([(150, 150)], 50)])
+        self.assertEqual(faces[0]["box"], [185, 95, 225, 135])
+        self.assertEqual(faces[0]["landmarks"]["left_eye"], [195.0, 105.0])
+
+    def test_trust_uses_clipped_hints_without_detection(self):
+        faces = self.detector.faces_from_hints(self.image, [[-10, 350, 80, 450], [5, 5, 5, 9]], min_laplacian_variance=0)
+
+        self.assertEqual(self.backend.calls, [])
+        self.assertEqual([f["box"] for f in faces], [[0, 350, 80, 400]])
+
+
+class DownscaledDetectionTests(unittest.TestCase):
+    def test_detects_on_a_resized_copy_and_returns_original_coordinates(self):
+        backend = _FakeBackend([{"box": [100, 50, 200, 150], "score": 0.9, "landmarks": {"nose": [150.0, 100.0]}}])
+        image = np.zeros((2000, 4000, 3), dtype=np.uint8)
+        faces = FaceDetector(backend).detect(image, min_laplacian_variance=0, long_side=1000)
+
+        self.assertEqual(backend.calls, [([(500, 1000)], 24)])
+        self.assertEqual(faces[0]["box"], [400, 200, 800, 600])
+        self.assertEqual(faces[0]["landmarks"]["nose"], [600.0, 400.0])
+
+    def test_small_images_and_zero_limit_keep_full_resolution(self):
+        backend = _FakeBackend([])
+        detector = FaceDetector(backend)
+        detector.detect(np.zeros((300, 400, 3), dtype=np.uint8), min_laplacian_variance=0, long_side=1000)
+        detector.detect(np.zeros((3000, 4000, 3), dtype=np.uint8), min_laplacian_variance=0, long_side=0)
+
+        self.assertEqual(backend.calls, [([(300, 400)], 50), ([(3000, 4000)], 50)])
+
+    def test_batch_shares_backend_calls_per_detection_scale(self):
+        backend = _FakeBackend([{"box": [0, 0, 10, 10], "score": 0.9, "landmarks": {}}])
+        images = [np.zeros((300, 400, 3), dtype=np.uint8), np.zeros((200, 200, 3), dtype=np.uint8), np.zeros((2000, 2000, 3), dtype=np.uint8)]
+        faces = FaceDetector(backend).detect_batch(images, min_laplacian_variance=0, long_side=1000)
+
+        self.assertEqual(backend.calls, [([(300, 400), (200, 200)], 50), ([(1000, 1000)], 25)])
+        self.assertEqual([f[0]["box"] for f in faces], [[0, 0, 10, 10], [0, 0, 10, 10], [0, 0, 20, 20]])
+
+    def test_blurry_image_fails_alone_when_exceptions_are_returned(self):
+        backend = _FakeBackend([{"box": [0, 0, 10, 10], "score": 0.9, "landmarks": {}}])
+        sharp = np.random.default_rng(0).integers(0, 255, (200, 200, 3), dtype=np.uint8)
+        flat = np.full((200, 200, 3), 128, dtype=np.uint8)
+        faces = FaceDetector(backend).detect_batch([flat, sharp, flat], min_laplacian_variance=[80.0, 80.0, 0.0], return_exceptions=True)
+
+        self.assertIsInstance(faces[0], FaceException)
+        self.assertEqual(faces[0].code, "IMAGE_QUALITY_TOO_LOW")
+        self.assertEqual([f[0]["box"] for f in faces[1:]], [[0, 0, 10, 10], [0, 0, 10, 10]])
+        self.assertEqual(backend.calls, [([(200, 200), (200, 200)], 50)])
+        with self.assertRaises(FaceException):
+            FaceDetector(backend).detect_batch([flat, sharp], min_laplacian_variance=80.0)
@@ -0,0 +1,119 @@
+import ctypes
+import unittest
+
+import numpy as np
+
+from app.engine.embedder import FaceEmbedder, _Buffers
+
+
+class _FakeSession:
+    def __init__(self, dim: int = 8):
+        self.dim = dim
+        self.batch_shapes: list[tuple] = []
+
+    def run(self, outputs, feeds):
+        x = next(iter(feeds.values()))
+        self.batch_shapes.append(x.shape)
+        # Deterministic per-row output so results can be compared across batch sizes.
+        flat = x.reshape(x.shape[0], -1)
+        return [np.repeat(flat.mean(axis=1, keepdims=True), self.dim, axis=1) + np.arange(self.dim)]
+
+
+class _FakeBinding:
+    def __init__(self):
+        self.inputs = {}
+        self.output = None
+
+    def bind_cpu_input(self, name, arr):
+        self.inputs[name] = arr
+
+    def bind_output(self, name, device_type="cpu", device_id=0, element_type=None, shape=None, buffer_ptr=None):
+        self.output = (tuple(shape), buffer_ptr)
+
+
+class _BindingSession(_FakeSession):
+    def __init__(self, dim: int = 8):
+        super().__init__(dim)
+        self.output_ptrs: list[int] = []
+
+    def io_binding(self):
+        return _FakeBinding()
+
+    def run_with_iobinding(self, binding):
+        shape, ptr = binding.output
+        self.output_ptrs.append(ptr)
+        result = self.run(None, binding.inputs)[0].astype(np.float32)
+        buf = (ctypes.c_float * result.size).from_address(ptr)
+        np.frombuffer(buf, dtype=np.float32).reshape(shape)[...] = result
+
+
+def _embedder(session: _FakeSession, fixed_batch_size=None, max_batch_size=4, layout="NHWC") -> FaceEmbedder:
+    emb = FaceEmbedder()
+    emb.session = session
+    emb.input_name = "input"
+    emb.input_layout = layout
+    emb.fixed_batch_size = fixed_batch_size
+    emb.max_batch_size = max_batch_size
+    emb.dev_mode = False
+    return emb
+
+
+class EmbedderBatchingTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.faces = [rng.integers(0, 255, (112, 112, 3), dtype=np.uint8) for _ in range(6)]
+
+    def test_embed_batch_chunks_by_max_batch_size(self):
+        session = _FakeSession()
+        out = _embedder(session, max_batch_size=4).embed_batch(self.faces)
+        self.assertEqual(out.shape, (6, 8))
+        self.assertEqual([s[0] for s in session.batch_shapes], [4, 2])
+        np.testing.assert_allclose(np.linalg.norm(out, axis=1), 1.0, rtol=1e-5)
+
+    def test_fixed_batch_axis_is_padded_and_trimmed(self):
+        session = _FakeSession()
+        out = _embedder(session, fixed_batch_size=4, layout="NCHW").embed_batch(self.faces)
+        self.assertEqual(out.shape, (6, 8))
+        self.assertEqual(session.batch_shapes, [(4, 3, 112, 112), (4, 3, 112, 112)])
+
+    def test_batch_matches_single_face_embedding(self):
+        emb = _embedder(_FakeSession())
+        batched = emb.embed_batch(self.faces)
+        single = np.vstack([emb.embed(face) for face in self.faces])
+        np.testing.assert_allclose(batched, single, rtol=1e-5)
+
+
+class EmbedderBufferTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.faces = [rng.integers(0, 255, (112, 112, 3), dtype=np.uint8) for _ in range(5)]
+        self.faces.append(rng.integers(0, 255, (90, 130, 3), dtype=np.uint8))
+
+    def test_fused_fill_matches_the_reference_preprocessing(self):
+        for layout in ("NHWC", "NCHW"):
+            buffers = _Buffers(len(self.faces), layout, 8)
+            for row, face in enumerate(self.faces):
+                FaceEmbedder._fill(buffers, row, face)
+                expected = FaceEmbedder._face_tech_preprocess(face)[0]
+                if layout == "NCHW":
+                    expected = expected.transpose(2, 0, 1)
+                np.testing.assert_array_equal(buffers.input[row], expected)
+
+    def test_io_binding_reuses_one_output_buffer(self):
+        session = _BindingSession()
+        emb = _embedder(session, max_batch_size=4)
+        emb.io_binding = True
+        emb.output_name = "embedding"
+        emb.output_dim = 8
+
+        bound = emb.embed_batch(self.faces)
+        again = emb.embed_batch(self.faces)
+        plain = _embedder(_FakeSession(), max_batch_size=4).embed_batch(self.faces)
+
+        np.testing.assert_allclose(bound, plain, rtol=1e-6)
+        np.testing.assert_array_equal(bound, again)
+        self.assertEqual(len(set(session.output_ptrs)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,365 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.vector import embedding_store as embedding_store_module
+from app.vector.embedding_store import EmbeddingStore, _MemoryIndex, index_kind
+
+
+def _unit(rows: int, dim: int, seed: int) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@unittest.skipIf(embedding_store_module.faiss is None, "faiss is not installed")
+class AnnIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._orig = (settings.FAISS_IVF_NLIST, settings.FAISS_IVF_TRAIN_MIN_VECTORS, settings.FAISS_HNSW_M)
+        settings.FAISS_IVF_NLIST = 4
+        settings.FAISS_IVF_TRAIN_MIN_VECTORS = 200
+        settings.FAISS_HNSW_M = 8
+
+    def tearDown(self):
+        settings.FAISS_IVF_NLIST, settings.FAISS_IVF_TRAIN_MIN_VECTORS, settings.FAISS_HNSW_M = self._orig
+        self.tmp.cleanup()
+
+    def _store(self, index_type: str) -> EmbeddingStore:
+        return EmbeddingStore(16, str(Path(self.tmp.name) / f"{index_type}.index"), index_type=index_type)
+
+    def test_ivf_serves_flat_until_enough_vectors_then_trains(self):
+        store = self._store("ivf_flat")
+        vectors = _unit(300, 16, 1)
+        first = store.add(vectors[:150])
+        self.assertEqual(index_kind(store.index), "flat")
+        second = store.add(vectors[150:])
+        self.assertEqual(index_kind(store.index), "ivf_flat")
+        self.assertEqual(first + second, list(range(300)))
+
+        _, ids = store.search(vectors[[7, 250]], top_k=1, nprobe=4)
+        self.assertEqual(ids[:, 0].tolist(), [7, 250])
+
+    def test_trained_index_survives_reload(self):
+        store = self._store("ivf_flat")
+        store.add(_unit(300, 16, 2))
+        store.save()
+        reloaded = self._store("ivf_flat")
+        reloaded.load()
+        self.assertEqual(index_kind(reloaded.index), "ivf_flat")
+        self.assertEqual(reloaded.index.ntotal, 300)
+
+    def test_hnsw_honours_ef_search(self):
+        store = self._store("hnsw")
+        vectors = _unit(100, 16, 3)
+        store.add(vectors)
+        self.assertEqual(index_kind(store.index), "hnsw")
+        _, ids = store.search(vectors[:3], top_k=1, ef_search=32)
+        self.assertEqual(ids[:, 0].tolist(), [0, 1, 2])
+
+    def test_ids_stay_stable_across_deletes(self):
+        for index_type in ("flat", "ivf_flat", "hnsw"):
+            with self.subTest(index_type=index_type):
+                settings.FAISS_IVF_TRAIN_MIN_VECTORS = 100
+                store = self._store(index_type)
+                vectors = _unit(300, 16, 11)
+                ids = store.add(vectors)
+                self.assertEqual(store.remove(ids[10:20]), 10)
+                self.assertEqual(store.ntotal, 290)
+                later = store.add(_unit(2, 16, 12))
+                self.assertEqual(later, [300, 301])
+                _, found = store.search(vectors[[5, 25, 299]], top_k=1, nprobe=4, ef_search=64)
+                self.assertEqual(found[:, 0].tolist(), [5, 25, 299])
+
+    def test_hnsw_removals_are_tombstoned_until_the_checkpoint_compacts(self):
+        store = self._store("hnsw")
+        vectors = _unit(100, 16, 14)
+        store.add(vectors)
+        graph = store.index
+        self.assertEqual(store.remove([3, 4, 4, 500]), 2)
+        self.assertEqual(store.remove([3]), 0)
+
+        self.assertIs(store.index, graph)
+        self.assertEqual(store.ntotal, 98)
+        _, found = store.search(vectors[[3, 4, 5]], top_k=3, ef_search=64)
+        self.assertFalse(np.isin(found, [3, 4]).any())
+        self.assertEqual(found[2, 0], 5)
+
+        store.save()
+        self.assertIsNot(store.index, graph)
+        self.assertEqual((store.index.ntotal, store.stats()["tombstones"]), (98, 0))
+        self.assertNotIn(3, store.all_ids().tolist())
+        store.wal.close()
+
+    def test_hnsw_wal_removals_replay_as_one_rebuild(self):
+        store = self._store("hnsw")
+        store.add(_unit(50, 16, 15))
+        store.save()
+        for face in ([1, 2], [7], [30, 31]):
+            store.remove(face)
+        store.wal.close()
+
+        recovered = self._store("hnsw")
+        builds = []
+        build_index = recovered.build_index
+        recovered.build_index = lambda *args, **kwargs: builds.append(args) or build_index(*args, **kwargs)
+        recovered.load()
+        recovered.wal.close()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(recovered.index.ntotal, 45)
+        self.assertEqual(sorted(recovered.all_ids().tolist()), [i for i in range(50) if i not in (1, 2, 7, 30, 31)])
+
+    def test_next_id_is_not_reused_after_reload(self):
+        store = self._store("flat")
+        ids = store.add(_unit(5, 16, 13))
+        store.remove(ids[-2:])
+        store.save()
+        reloaded = self._store("flat")
+        reloaded.load()
+        self.assertEqual(reloaded.add(_unit(1, 16, 14)), [5])
+
+    def test_legacy_positional_index_keeps_row_ids(self):
+        legacy = embedding_store_module.faiss.IndexFlatIP(16)
+        vectors = _unit(4, 16, 15)
+        legacy.add(vectors)
+        path = Path(self.tmp.name) / "flat.index"
+        embedding_store_module.faiss.write_index(legacy, str(path))
+        store = self._store("flat")
+        store.load()
+        self.assertEqual(sorted(store.all_ids().tolist()), [0, 1, 2, 3])
+        _, found = store.search(vectors[2], top_k=1)
+        self.assertEqual(int(found[0, 0]), 2)
+        self.assertEqual(store.next_id, 4)
+
+    def test_unknown_index_type_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self._store("lsh")
+
+
+class WriteAheadLogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "faiss.index")
+        self.stores: list[EmbeddingStore] = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.wal.close()
+        self.tmp.cleanup()
+
+    def _store(self) -> EmbeddingStore:
+        store = EmbeddingStore(16, self.path, index_type="flat")
+        self.stores.append(store)
+        return store
+
+    def test_unsaved_operations_are_replayed_on_load(self):
+        vectors = _unit(6, 16, 20)
+        store = self._store()
+        ids = store.add(vectors[:4])
+        store.save()
+        store.add(vectors[4:])
+        store.remove(ids[:1])
+
+        recovered = self._store()
+        recovered.load()
+        self.assertEqual(sorted(recovered.all_ids().tolist()), [1, 2, 3, 4, 5])
+        self.assertEqual(recovered.next_id, 6)
+        self.assertFalse(recovered.dirty)
+        self.assertEqual(recovered.wal.size_bytes(), 0)
+
+    def test_torn_tail_record_is_ignored(self):
+        store = self._store()
+        store.add(_unit(2, 16, 21))
+        store.add(_unit(2, 16, 22))
+        store.wal.close()
+        raw = store.wal.path.read_bytes()
+        store.wal.path.write_bytes(raw[:-10])
+
+        recovered = self._store()
+        recovered.load()
+        self.assertEqual(sorted(recovered.all_ids().tolist()), [0, 1])
+
+    def test_replay_skips_rows_already_in_checkpoint(self):
+        store = self._store()
+        store.add(_unit(3, 16, 23))
+        store.wal.close()
+        wal_bytes = store.wal.path.read_bytes()
+        store.save()
+        # Crash after the index was renamed into place but before the log was dropped.
+        store.wal.path.write_bytes(wal_bytes)
+        store.meta_path.write_text('{"next_id": 0, "checkpoint_seq": 0}', encoding="utf-8")
+
+        recovered = self._store()
+        recovered.load()
+        self.assertEqual(recovered.ntotal, 3)
+        self.assertEqual(recovered.next_id, 3)
+
+    def test_background_checkpointer_writes_index(self):
+        store = self._store()
+        store.start_checkpointer(interval_seconds=0.01)
+        store.add(_unit(2, 16, 24))
+        store.stop_checkpointer(final_checkpoint=True)
+        self.assertFalse(store.dirty)
+        self.assertTrue(store.meta_path.exists())
+        self.assertEqual(store.wal.size_bytes(), 0)
+
+
+class MemoryIndexTests(unittest.TestCase):
+    def test_buffer_grows_by_doubling_and_keeps_rows(self):
+        index = _MemoryIndex(16, capacity=4)
+        vectors = _unit(37, 16, 4)
+        for start in range(0, 37, 5):
+            index.add(vectors[start:start + 5])
+        self.assertEqual(index.ntotal, 37)
+        self.assertEqual(index._buffer.shape[0], 64)
+        np.testing.assert_array_equal(index.reconstruct_n(0, 37), vectors)
+
+    def test_multi_query_top_k_matches_full_sort(self):
+        index = _MemoryIndex(16)
+        gallery = _unit(200, 16, 5)
+        index.add(gallery)
+        queries = _unit(6, 16, 6)
+        scores, ids = index.search(queries, 5)
+        expected = np.argsort(-(queries @ gallery.T), axis=1)[:, :5]
+        np.testing.assert_array_equal(ids, expected)
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
+
+    def test_short_gallery_pads_missing_results(self):
+        index = _MemoryIndex(16)
+        index.add(_unit(2, 16, 7))
+        _, ids = index.search(_unit(1, 16, 8), 4)
+        self.assertEqual(ids[0, 2:].tolist(), [-1, -1])
+
+    def test_remove_ids_compacts_and_keeps_ids(self):
+        index = _MemoryIndex(16)
+        gallery = _unit(10, 16, 16)
+        index.add_with_ids(gallery, np.arange(10, 20))
+        self.assertEqual(index.remove_ids(np.array([11, 12, 99])), 2)
+        _, ids = index.search(gallery[[0, 5]], 1)
+        self.assertEqual(ids[:, 0].tolist(), [10, 15])
+
+    def test_float16_storage_searches_in_float32(self):
+        index = _MemoryIndex(16, use_float16=True)
+        gallery = _unit(50, 16, 9)
+        index.add(gallery)
+        self.assertEqual(index.vectors.dtype, np.float16)
+        scores, ids = index.search(gallery[:3], 1)
+        self.assertEqual(ids[:, 0].tolist(), [0, 1, 2])
+        self.assertEqual(scores.dtype, np.float32)
+
+    def test_fallback_store_persists_to_npy(self):
+        original = embedding_store_module.faiss
+        embedding_store_module.faiss = None
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = str(Path(tmp) / "faiss.index")
+                store = EmbeddingStore(16, path)
+                store.add(_unit(10, 16, 10))
+                store.save()
+                self.assertTrue(store.memory_index_path.exists())
+
+                reloaded = EmbeddingStore(16, path)
+                reloaded.load()
+                self.assertEqual(reloaded.index.ntotal, 10)
+        finally:
+            embedding_store_module.faiss = original
+
+
+class MemoryMappedLoadTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.tmp.name) / "faiss.index")
+        self._orig = settings.FAISS_MMAP_LOAD
+        settings.FAISS_MMAP_LOAD = True
+
+    def tearDown(self):
+        settings.FAISS_MMAP_LOAD = self._orig
+        self.tmp.cleanup()
+
+    def _reload(self) -> EmbeddingStore:
+        store = EmbeddingStore(16, self.path, index_type="flat")
+        store.load()
+        return store
+
+    def test_checkpoint_is_mapped_after_reload(self):
+        store = EmbeddingStore(16, self.path, index_type="flat")
+        vectors = _unit(40, 16, 20)
+        store.add(vectors)
+        store.save()
+        self.assertTrue(store.index.is_mapped)
+
+        reloaded = self._reload()
+        stats = reloaded.stats()
+        self.assertTrue(stats["mmap"])
+        self.assertEqual(stats["mapped_bytes"], 40 * 16 * 4)
+        _, ids = reloaded.search(vectors[[3, 30]], top_k=1)
+        self.assertEqual(ids[:, 0].tolist(), [3, 30])
+
+    def test_adds_and_removes_on_top_of_mapped_base(self):
+        store = EmbeddingStore(16, self.path, index_type="flat")
+        vectors = _unit(30, 16, 21)
+        store.add(vectors[:20])
+        store.save()
+
+        store = self._reload()
+        self.assertEqual(store.add(vectors[20:]), list(range(20, 30)))
+        self.assertEqual(store.remove([2, 25]), 2)
+        self.assertEqual(store.ntotal, 28)
+        _, ids = store.search(vectors[[2, 5, 25, 27]], top_k=1)
+        self.assertNotIn(2, ids[:, 0].tolist())
+        self.assertEqual(ids[1, 0], 5)
+        self.assertEqual(ids[3, 0], 27)
+
+        store.save()
+        reloaded = self._reload()
+        self.assertEqual(sorted(reloaded.all_ids().tolist()), [i for i in range(30) if i not in (2, 25)])
+        generations = sorted(p.name for p in Path(self.tmp.name).glob("faiss.g*.npy"))
+        self.assertEqual(len(generations), 2)
+
+    @unittest.skipIf(embedding_store_module.faiss is None, "faiss is not installed")
+    def test_existing_faiss_flat_index_is_converted(self):
+        settings.FAISS_MMAP_LOAD = False
+        store = EmbeddingStore(16, self.path, index_type="flat")
+        vectors = _unit(12, 16, 22)
+        store.add(vectors)
+        store.save()
+
+        settings.FAISS_MMAP_LOAD = True
+        reloaded = self._reload()
+        self.assertTrue(reloaded.index.is_mapped)
+        self.assertEqual(reloaded.all_ids().tolist(), list(range(12)))
+
+    @unittest.skipIf(embedding_store_module.faiss is None, "faiss is not installed")
+    def test_npy_checkpoint_is_converted_back_when_mmap_is_turned_off(self):
+        settings.FAISS_MMAP_LOAD = False
+        store = EmbeddingStore(16, self.path, index_type="flat")
+        vectors = _unit(20, 16, 23)
+        store.add(vectors[:5])
+        store.save()
+
+        # Enrolled while mapped: only the .npy checkpoint has these rows, faiss.index is stale.
+        settings.FAISS_MMAP_LOAD = True
+        store = self._reload()
+        store.add(vectors[5:])
+        store.remove([1])
+        store.save()
+
+        settings.FAISS_MMAP_LOAD = False
+        reloaded = self._reload()
+        self.assertEqual(reloaded.stats()["layout"], "faiss")
+        self.assertEqual(sorted(reloaded.all_ids().tolist()), [i for i in range(20) if i != 1])
+        _, ids = reloaded.search(vectors[[0, 19]], top_k=1)
+        self.assertEqual(ids[:, 0].tolist(), [0, 19])
+        self.assertEqual(list(Path(self.tmp.name).glob("faiss.g*.npy")), [])
+
+        # The converted checkpoint is now the source of truth for the next restart.
+        reloaded.add(_unit(1, 16, 24))
+        reloaded.save()
+        self.assertEqual(self._reload().ntotal, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
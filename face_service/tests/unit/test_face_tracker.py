@@ -0,0 +1,159 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from app.core.config import settings
+from app.engine.tracker import FaceTrackerRegistry, SourceTracks, box_iou
+from app.services import recognition_service
+
+
+class SourceTracksTests(unittest.TestCase):
+    def test_overlapping_boxes_keep_their_track(self):
+        tracks = SourceTracks(iou_threshold=0.3, max_age=3.0)
+        first = tracks.update([[0, 0, 100, 100], [300, 0, 400, 100]], now=0.0)
+        second = tracks.update([[310, 5, 410, 105], [5, 5, 105, 105]], now=1.0)
+
+        self.assertIs(second[0], first[1])
+        self.assertIs(second[1], first[0])
+        self.assertEqual([t.hits for t in second], [2, 2])
+
+    def test_tracks_expire_after_max_age(self):
+        tracks = SourceTracks(iou_threshold=0.3, max_age=3.0)
+        first = tracks.update([[0, 0, 100, 100]], now=0.0)
+        later = tracks.update([[0, 0, 100, 100]], now=5.0)
+
+        self.assertIsNot(later[0], first[0])
+        self.assertEqual(len(tracks.tracks), 1)
+
+    def test_cached_identity_expires_by_age_and_reuse_count(self):
+        tracks = SourceTracks(iou_threshold=0.3, max_age=30.0)
+        track = tracks.update([[0, 0, 100, 100]], now=0.0)[0]
+        tracks.remember(track, {"status": "matched", "confidence": 0.97, "user_id": "emp_1"})
+
+        self.assertIsNotNone(tracks.reuse(track, 0.9, ttl=2.0, max_reuses=2))
+        self.assertIsNotNone(tracks.reuse(track, 0.9, ttl=2.0, max_reuses=2))
+        self.assertIsNone(tracks.reuse(track, 0.9, ttl=2.0, max_reuses=2))
+        tracks.remember(track, {"status": "matched", "confidence": 0.97, "user_id": "emp_1"})
+        tracks.update([[0, 0, 100, 100]], now=3.0)
+        self.assertIsNone(tracks.reuse(track, 0.9, ttl=2.0, max_reuses=2))
+
+    def test_iou(self):
+        self.assertAlmostEqual(box_iou([0, 0, 10, 10], [5, 0, 15, 10]), 1 / 3)
+        self.assertEqual(box_iou([0, 0, 10, 10], [20, 20, 30, 30]), 0.0)
+
+    def test_uploads_are_not_tracked(self):
+        registry = FaceTrackerRegistry()
+        self.assertIsNone(registry.for_source("acme", "UPLOAD", "upload_image"))
+        self.assertIs(registry.for_source("acme", "CAM_1", "wall_camera"), registry.for_source("acme", "CAM_1", "wall_camera"))
+        self.assertIsNot(registry.for_source("acme", "CAM_1", "wall_camera"), registry.for_source("globex", "CAM_1", "wall_camera"))
+
+
+class _Matcher:
+    def __init__(self, confidence: float, user_id: str = "emp_1"):
+        self.confidence = confidence
+        self.user_id = user_id
+        self.searches = 0
+
+    def match_batch(self, embeddings, thresholds=None, search_params=None):
+        self.searches += len(embeddings)
+        payload = {"user_id": self.user_id, "face_id": f"face_{self.user_id}"}
+        if self.confidence <= thresholds[0]:
+            return [{"status": "unknown", "confidence": self.confidence, "payload": None} for _ in embeddings]
+        return [{"status": "matched", "confidence": self.confidence, "payload": payload} for _ in embeddings]
+
+
+class TrackedRecognitionTests(unittest.TestCase):
+    def setUp(self):
+        self.embedded = 0
+        self.saved_unknowns = 0
+
+        def embed_batch(faces):
+            self.embedded += len(faces)
+            return np.zeros((len(faces), 4), dtype=np.float32)
+
+        def save_unknown(image, source_id, when):
+            self.saved_unknowns += 1
+            return f"unk_{self.saved_unknowns}", f"unknown_{self.saved_unknowns}.png"
+
+        self._patches = [
+            (recognition_service.detector, "detect_batch", lambda images, **kwargs: [[{"box": [10, 10, 60, 60]}] for _ in images]),
+            (recognition_service.aligner, "align", lambda img, box, landmarks=None: 0),
+            (recognition_service.embedder, "embed_batch", embed_batch),
+            (recognition_service, "_save_unknown_face", save_unknown),
+        ]
+        self._originals = [(obj, name, getattr(obj, name)) for obj, name, _ in self._patches]
+        for obj, name, value in self._patches:
+            setattr(obj, name, value)
+
+    def tearDown(self):
+        for obj, name, value in self._originals:
+            setattr(obj, name, value)
+
+    def _recognize(self, matcher, tracks):
+        return recognition_service.recognize_image(
+            np.zeros((100, 100, 3), dtype=np.uint8),
+            source_type="ceiling_camera",
+            source_id="CAM_1",
+            timestamp=datetime.utcnow(),
+            policy={"recognition.threshold": 0.8},
+            matcher=matcher,
+            tracks=tracks,
+        ).results[0]
+
+    def test_stable_confident_track_is_re_embedded_only_after_max_reuses(self):
+        matcher = _Matcher(confidence=0.97)
+        tracks = SourceTracks(iou_threshold=0.3, max_age=30.0)
+        results = [self._recognize(matcher, tracks) for _ in range(10)]
+
+        reuses = settings.FACE_TRACK_IDENTITY_MAX_REUSES
+        self.assertEqual(self.embedded, -(-10 // (reuses + 1)))
+        self.assertEqual(results[0].status, "matched")
+        self.assertEqual([r.cached for r in results[: reuses + 2]], [False] + [True] * reuses + [False])
+        self.assertTrue(all(r.user_id == "emp_1" for r in results))
+        self.assertEqual({r.track_id for r in results}, {results[0].track_id})
+
+    def test_new_face_in_the_same_box_is_not_reported_as_the_old_one(self):
+        matcher = _Matcher(confidence=0.97)
+        tracks = SourceTracks(iou_threshold=0.3, max_age=30.0)
+        first = self._recognize(matcher, tracks)
+        # Someone else steps into the box; the detector sees the same spot, so the track carries on.
+        matcher.user_id = "emp_2"
+        later = [self._recognize(matcher, tracks) for _ in range(settings.FACE_TRACK_IDENTITY_MAX_REUSES + 1)]
+
+        self.assertEqual(first.user_id, "emp_1")
+        self.assertTrue(all(r.cached and r.user_id == "emp_1" for r in later[:-1]))
+        self.assertFalse(later[-1].cached)
+        self.assertEqual(later[-1].user_id, "emp_2")
+        self.assertNotEqual(later[-1].track_id, first.track_id)
+
+    def test_face_seen_in_a_single_frame_is_recognized(self):
+        matcher = _Matcher(confidence=0.97)
+        result = self._recognize(matcher, SourceTracks(iou_threshold=0.3, max_age=30.0))
+
+        self.assertEqual(result.status, "matched")
+        self.assertEqual(result.user_id, "emp_1")
+        self.assertIsNotNone(result.track_id)
+
+    def test_track_waits_for_min_hits_before_embedding(self):
+        original = settings.FACE_TRACK_MIN_HITS
+        settings.FACE_TRACK_MIN_HITS = 2
+        try:
+            matcher = _Matcher(confidence=0.97)
+            tracks = SourceTracks(iou_threshold=0.3, max_age=30.0)
+            results = [self._recognize(matcher, tracks) for _ in range(3)]
+        finally:
+            settings.FACE_TRACK_MIN_HITS = original
+
+        self.assertEqual([r.status for r in results], ["tracking", "matched", "matched"])
+        self.assertEqual(self.embedded, 1)
+
+    def test_low_confidence_track_is_rechecked_and_keeps_one_unknown(self):
+        matcher = _Matcher(confidence=0.5)
+        tracks = SourceTracks(iou_threshold=0.3, max_age=30.0)
+        results = [self._recognize(matcher, tracks) for _ in range(4)]
+
+        self.assertEqual(self.embedded, 4)
+        self.assertEqual([r.status for r in results], ["unknown"] * 4)
+        self.assertEqual(self.saved_unknowns, 1)
+        self.assertEqual({r.unknown_id for r in results}, {"unk_1"})
@@ -0,0 +1,63 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.vector.id_map import IDMapStore
+
+
+def _payload(idx: int, user: str) -> dict:
+    return {"user_id": user, "face_id": f"face_{user}", "embedding_index": idx}
+
+
+class IDMapStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.stores: list[IDMapStore] = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.tmp.cleanup()
+
+    def _store(self, legacy: Path | None = None) -> IDMapStore:
+        store = IDMapStore(str(self.root / "id_map.sqlite3"), str(legacy) if legacy else None)
+        store.load()
+        self.stores.append(store)
+        return store
+
+    def test_staged_changes_persist_only_after_save(self):
+        store = self._store()
+        store.set(3, _payload(3, "emp_1"))
+        self.assertEqual(store.get(3)["user_id"], "emp_1")
+        self.assertIsNone(self._store().get(3))
+
+        store.save()
+        self.assertEqual(self._store().get(3)["user_id"], "emp_1")
+
+    def test_lookups_by_face_and_user_id(self):
+        store = self._store()
+        for idx, user in [(1, "emp_1"), (2, "emp_1"), (7, "emp_2")]:
+            store.set(idx, _payload(idx, user))
+        store.save()
+        self.assertEqual(store.find_indices_by_face_id("face_emp_1"), [1, 2])
+        self.assertEqual(store.find_indices_by_user_id("emp_2"), [7])
+
+        store.remove_ids([2])
+        self.assertEqual(store.find_indices_by_face_id("face_emp_1"), [1])
+        store.save()
+        self.assertEqual(store.get_many([1, 2, 7]), [_payload(1, "emp_1"), None, _payload(7, "emp_2")])
+
+    def test_legacy_json_is_migrated_once(self):
+        legacy = self.root / "id_map.json"
+        legacy.write_text(json.dumps({"0": _payload(0, "emp_1"), "4": _payload(4, "emp_2")}), encoding="utf-8")
+        store = self._store(legacy)
+        self.assertEqual(store.count(), 2)
+        self.assertFalse(legacy.exists())
+        self.assertTrue((self.root / "id_map.json.migrated").exists())
+        self.assertEqual(store.get(4)["user_id"], "emp_2")
+
+
+if __name__ == "__main__":
+    unittest.main()
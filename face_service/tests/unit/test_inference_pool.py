@@ -0,0 +1,146 @@
+import asyncio
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.exceptions import FaceException
+from app.services import recognition_service
+from app.services.inference_pool import InferencePool, SharedImage, StageTimings, _attach
+
+
+class StageTimingsTests(unittest.TestCase):
+    def test_reports_count_average_and_p95_per_stage(self):
+        timings = StageTimings(window=100)
+        for ms in range(1, 101):
+            timings.record("embed", float(ms))
+        timings.record("detect", 4.0)
+
+        stats = timings.stats()
+
+        self.assertEqual(stats["embed"], {"count": 100, "avg_ms": 50.5, "p95_ms": 95.0})
+        self.assertEqual(stats["detect"]["count"], 1)
+
+
+class SharedImageTests(unittest.TestCase):
+    def test_workers_see_the_same_pixels(self):
+        image = np.random.default_rng(0).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+        shared = SharedImage(image)
+        try:
+            shm, view = _attach(shared.ref)
+            np.testing.assert_array_equal(view, image)
+            del view
+            shm.close()
+        finally:
+            shared.close()
+
+
+class InferencePoolTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = InferencePool(size=1, intra_op_threads=1)
+        cls.pool.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_disabled_pool_reports_zero_workers(self):
+        stats = InferencePool(size=0, intra_op_threads=1).stats()
+        self.assertFalse(stats["enabled"])
+        self.assertEqual(stats["workers"], 0)
+
+    def test_worker_aligns_and_embeds_from_shared_memory(self):
+        image = SharedImage(np.zeros((200, 200, 3), dtype=np.uint8))
+        try:
+            aligned, embeddings = self.pool.result(
+                self.pool.submit_align_embed(image, [{"box": [20, 20, 120, 120]}, {"box": [50, 50, 150, 150]}])
+            )
+        finally:
+            image.close()
+
+        self.assertEqual([crop.shape for crop in aligned], [(112, 112, 3), (112, 112, 3)])
+        self.assertEqual(embeddings.shape, (2, settings.EMBEDDING_DIM))
+        self.assertEqual(self.pool.stats()["in_flight"], 0)
+
+    def test_worker_errors_are_raised_as_face_exceptions(self):
+        # A flat frame fails the blur gate inside the worker.
+        image = SharedImage(np.full((200, 200, 3), 128, dtype=np.uint8))
+        try:
+            with self.assertRaises(FaceException) as ctx:
+                self.pool.result(self.pool.submit_detect(image, None, 80.0, {}))
+        finally:
+            image.close()
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_recognize_frames_runs_through_the_pool(self):
+        original = recognition_service.inference_pool
+        recognition_service.inference_pool = self.pool
+        try:
+            noise = np.random.default_rng(1).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+            out = recognition_service.recognize_frames(
+                [
+                    {
+                        "img": noise,
+                        "source_type": "camera",
+                        "source_id": "CAM_1",
+                        "timestamp": datetime.utcnow(),
+                        "policy": {"quality.min_laplacian_variance": 0},
+                        "matcher": None,
+                    },
+                    {"img": None, "source_type": "camera", "source_id": "CAM_2", "timestamp": datetime.utcnow(), "policy": {}, "matcher": None},
+                ]
+            )
+        finally:
+            recognition_service.inference_pool = original
+
+        self.assertEqual(out[0].errors, [{"code": "NO_FACE_DETECTED"}])
+        self.assertEqual(out[1].errors, [{"code": "INVALID_IMAGE"}])
+
+    def test_a_blurry_frame_only_fails_itself_in_the_pool(self):
+        original = recognition_service.inference_pool
+        recognition_service.inference_pool = self.pool
+        frame = {"source_type": "camera", "source_id": "CAM_1", "timestamp": datetime.utcnow(), "matcher": None}
+        try:
+            out = recognition_service.recognize_frames(
+                [
+                    {**frame, "img": np.full((120, 160, 3), 128, dtype=np.uint8), "policy": {"quality.min_laplacian_variance": 80}},
+                    {**frame, "img": np.random.default_rng(3).integers(0, 255, (120, 160, 3), dtype=np.uint8), "policy": {"quality.min_laplacian_variance": 0}},
+                ]
+            )
+        finally:
+            recognition_service.inference_pool = original
+
+        self.assertEqual(out[0].errors[0]["code"], "IMAGE_QUALITY_TOO_LOW")
+        self.assertEqual(out[1].errors, [{"code": "NO_FACE_DETECTED"}])
+
+    def test_async_recognition_awaits_pool_jobs(self):
+        original = recognition_service.inference_pool
+        recognition_service.inference_pool = self.pool
+        frames = [
+            {
+                "img": np.random.default_rng(2).integers(0, 255, (120, 160, 3), dtype=np.uint8),
+                "source_type": "camera",
+                "source_id": f"CAM_{i}",
+                "timestamp": datetime.utcnow(),
+                "policy": {"quality.min_laplacian_variance": 0},
+                "matcher": None,
+            }
+            for i in range(3)
+        ]
+
+        async def concurrent_requests():
+            return await asyncio.gather(*(recognition_service.recognize_frames_async([frame]) for frame in frames))
+
+        try:
+            out = asyncio.run(concurrent_requests())
+        finally:
+            recognition_service.inference_pool = original
+
+        self.assertEqual([responses[0].errors for responses in out], [[{"code": "NO_FACE_DETECTED"}]] * 3)
+        self.assertEqual(self.pool.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
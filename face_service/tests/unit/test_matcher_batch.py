@@ -0,0 +1,53 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.engine.matcher import FaceMatcher
+from app.vector.embedding_store import EmbeddingStore
+from app.vector.id_map import IDMapStore
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    return (v / np.linalg.norm(v, axis=1, keepdims=True)).astype(np.float32)
+
+
+class MatcherBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.store = EmbeddingStore(16, str(root / "faiss.index"))
+        self.id_map = IDMapStore(str(root / "id_map.sqlite3"))
+        rng = np.random.default_rng(3)
+        self.gallery = _unit(rng.standard_normal((5, 16)))
+        for idx in self.store.add(self.gallery):
+            self.id_map.set(idx, {"user_id": f"emp_{idx}", "face_id": f"face_emp_{idx}", "embedding_index": idx})
+        self.matcher = FaceMatcher(self.store, self.id_map)
+
+    def tearDown(self):
+        self.id_map.close()
+        self.tmp.cleanup()
+
+    def test_match_batch_agrees_with_single_match(self):
+        queries = np.vstack([self.gallery[2], self.gallery[4], _unit(np.ones((1, 16)))[0]])
+        batched = self.matcher.match_batch(queries, 0.9)
+        single = [self.matcher.match(q, "camera", threshold_override=0.9) for q in queries]
+        self.assertEqual([h["status"] for h in batched], [h["status"] for h in single])
+        self.assertEqual(batched[0]["payload"]["user_id"], "emp_2")
+        self.assertEqual(batched[1]["payload"]["user_id"], "emp_4")
+        self.assertEqual(batched[2]["status"], "unknown")
+
+    def test_match_batch_applies_per_face_thresholds(self):
+        queries = np.vstack([self.gallery[0], self.gallery[1]])
+        hits = self.matcher.match_batch(queries, [0.5, 1.5])
+        self.assertEqual([h["status"] for h in hits], ["matched", "unknown"])
+
+    def test_match_batch_on_empty_index(self):
+        empty = FaceMatcher(EmbeddingStore(16, str(Path(self.tmp.name) / "empty.index")), self.id_map)
+        hits = empty.match_batch(self.gallery[:2], 0.5)
+        self.assertEqual(hits, [{"status": "unknown", "confidence": None, "payload": None}] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
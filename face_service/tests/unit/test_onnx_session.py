@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import onnxruntime as ort
+
+from app.core.config import settings
+from app.engine import onnx_session
+
+
+class SessionOptionsTests(unittest.TestCase):
+    def setUp(self):
+        self._saved = {
+            name: getattr(settings, name)
+            for name in (
+                "ONNX_INTRA_OP_THREADS",
+                "ONNX_INTER_OP_THREADS",
+                "ONNX_EXECUTION_MODE",
+                "ONNX_GRAPH_OPTIMIZATION_LEVEL",
+                "ONNX_ENABLE_MEM_PATTERN",
+                "ONNX_OPTIMIZED_MODEL_DIR",
+            )
+        }
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        for name, value in self._saved.items():
+            setattr(settings, name, value)
+        self.tmp.cleanup()
+
+    def test_settings_are_applied(self):
+        settings.ONNX_INTRA_OP_THREADS = 2
+        settings.ONNX_INTER_OP_THREADS = 1
+        settings.ONNX_EXECUTION_MODE = "parallel"
+        settings.ONNX_GRAPH_OPTIMIZATION_LEVEL = "extended"
+        settings.ONNX_ENABLE_MEM_PATTERN = False
+
+        options = onnx_session.session_options()
+
+        self.assertEqual(options.intra_op_num_threads, 2)
+        self.assertEqual(options.inter_op_num_threads, 1)
+        self.assertEqual(options.execution_mode, ort.ExecutionMode.ORT_PARALLEL)
+        self.assertEqual(options.graph_optimization_level, ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED)
+        self.assertFalse(options.enable_mem_pattern)
+
+    def test_cache_name_follows_the_source_model(self):
+        settings.ONNX_OPTIMIZED_MODEL_DIR = self.tmp.name
+        settings.ONNX_GRAPH_OPTIMIZATION_LEVEL = "all"
+        model = Path(self.tmp.name) / "arc.onnx"
+        model.write_bytes(b"v1")
+
+        first = onnx_session.optimized_model_path(model)
+        self.assertEqual(first.parent, Path(self.tmp.name))
+        self.assertTrue(first.name.startswith("arc.all."))
+        self.assertEqual(onnx_session.optimized_model_path(model), first)
+
+        model.write_bytes(b"v2-longer")
+        os.utime(model, ns=(1, 1))
+        self.assertNotEqual(onnx_session.optimized_model_path(model), first)
+
+    def test_cache_is_off_without_a_directory_or_optimization(self):
+        model = Path(self.tmp.name) / "arc.onnx"
+        model.write_bytes(b"v1")
+        settings.ONNX_OPTIMIZED_MODEL_DIR = ""
+        self.assertIsNone(onnx_session.optimized_model_path(model))
+        settings.ONNX_OPTIMIZED_MODEL_DIR = self.tmp.name
+        settings.ONNX_GRAPH_OPTIMIZATION_LEVEL = "disable"
+        self.assertIsNone(onnx_session.optimized_model_path(model))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,12 +41,12 @@ class PolicyRuleTests(unittest.TestCase):
 
     def test_wall_camera_ratio_rejects_face(self):
         original_decode = recognition_service._decode_base64_image
-        original_detect = recognition_service.detector.detect
+        original_detect = recognition_service.detector.detect_batch
         original_align = recognition_service.aligner.align
         original_embed = recognition_service.embedder.embed
         try:
             recognition_service._decode_base64_image = lambda _: np.zeros((100, 100, 3), dtype=np.uint8)
-            recognition_service.detector.detect = lambda img, min_laplacian_variance=None: [{"box": [0, 0, 10, 10]}]
+            recognition_service.detector.detect_batch = lambda images, **kwargs: [[{"box": [0, 0, 10, 10]}] for _ in images]
             recognition_service.aligner.align = lambda img, box: img
             recognition_service.embedder.embed = lambda aligned: np.zeros((512,), dtype=np.float32)
 
@@ -62,7 +62,7 @@ class PolicyRuleTests(unittest.TestCase):
             self.assertEqual(out.errors[0]["code"], "WALL_FACE_RATIO_TOO_LOW")
         finally:
             recognition_service._decode_base64_image = original_decode
-            recognition_service.detector.detect = original_detect
+            recognition_service.detector.detect_batch = original_detect
             recognition_service.aligner.align = original_align
             recognition_service.embedder.embed = original_embed
 
@@ -70,7 +70,7 @@ class PolicyRuleTests(unittest.TestCase):
         original_detect = registration_service.detector.detect
         original_save = registration_service._save_image
         try:
-            registration_service.detector.detect = lambda img, min_laplacian_variance=None: [
+            registration_service.detector.detect = lambda img, min_laplacian_variance=None, long_side=None: [
                 {"box": [10, 10, 130, 130]},
                 {"box": [140, 10, 260, 130]},
             ]
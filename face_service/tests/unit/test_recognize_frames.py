@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from app.core.exceptions import FaceException
+from app.services import recognition_service
+
+
+class _RecordingMatcher:
+    def __init__(self, user_prefix: str):
+        self.user_prefix = user_prefix
+        self.calls: list[tuple[int, list[float]]] = []
+
+    def match_batch(self, embeddings, thresholds=None, search_params=None):
+        self.calls.append((embeddings.shape[0], list(thresholds)))
+        payload = {"user_id": f"{self.user_prefix}_user", "face_id": f"face_{self.user_prefix}_user"}
+        return [{"status": "matched", "confidence": 0.95, "payload": payload} for _ in embeddings]
+
+
+class RecognizeFramesTests(unittest.TestCase):
+    def setUp(self):
+        self.embed_calls: list[int] = []
+
+        def detect(img, min_laplacian_variance=None, long_side=None):
+            # The frame's first pixel says how many faces it contains.
+            return [{"box": [0, 0, 8, 8]} for _ in range(int(img[0, 0, 0]))]
+
+        def embed_batch(faces):
+            self.embed_calls.append(len(faces))
+            return np.zeros((len(faces), 4), dtype=np.float32)
+
+        self._originals = (
+            recognition_service.detector.detect_batch,
+            recognition_service.aligner.align,
+            recognition_service.embedder.embed_batch,
+        )
+        recognition_service.detector.detect_batch = lambda images, **kwargs: [detect(img) for img in images]
+        recognition_service.aligner.align = lambda img, box, landmarks=None: 0
+        recognition_service.embedder.embed_batch = embed_batch
+
+    def tearDown(self):
+        (
+            recognition_service.detector.detect_batch,
+            recognition_service.aligner.align,
+            recognition_service.embedder.embed_batch,
+        ) = self._originals
+
+    def _frame(self, faces: int | None, matcher, threshold: float = 0.8, source_type: str = "camera") -> dict:
+        return {
+            "img": None if faces is None else np.full((8, 8, 3), faces, dtype=np.uint8),
+            "source_type": source_type,
+            "source_id": "CAM_1",
+            "timestamp": datetime.utcnow(),
+            "policy": {"recognition.threshold": threshold},
+            "matcher": matcher,
+        }
+
+    def test_one_embedding_pass_and_one_search_per_gallery(self):
+        acme, globex = _RecordingMatcher("acme"), _RecordingMatcher("globex")
+
+        out = recognition_service.recognize_frames(
+            [
+                self._frame(2, acme, threshold=0.7),
+                self._frame(0, acme),
+                self._frame(None, globex),
+                self._frame(1, globex),
+                self._frame(3, acme, threshold=0.9),
+            ]
+        )
+
+        self.assertEqual(self.embed_calls, [6])
+        self.assertEqual(acme.calls, [(5, [0.7, 0.7, 0.9, 0.9, 0.9])])
+        self.assertEqual(globex.calls, [(1, [0.8])])
+        self.assertEqual([len(r.results) for r in out], [2, 0, 0, 1, 3])
+        self.assertEqual(out[1].errors, [{"code": "NO_FACE_DETECTED"}])
+        self.assertEqual(out[2].errors, [{"code": "INVALID_IMAGE"}])
+        self.assertEqual(out[3].results[0].user_id, "globex_user")
+        self.assertEqual([r.face_index for r in out[4].results], [0, 1, 2])
+
+    def test_a_blurry_frame_only_fails_itself(self):
+        def detect_batch(images, min_laplacian_variance=None, long_side=None, return_exceptions=False):
+            # A frame whose first pixel is 9 stands in for one below its blur threshold.
+            blurry = FaceException(400, "IMAGE_QUALITY_TOO_LOW", "Image blur variance too low: 1.00")
+            return [blurry if img[0, 0, 0] == 9 else [{"box": [0, 0, 8, 8]}] for img in images]
+
+        recognition_service.detector.detect_batch = detect_batch
+        acme = _RecordingMatcher("acme")
+        out = recognition_service.recognize_frames([self._frame(1, acme), self._frame(9, acme), self._frame(1, acme)])
+
+        self.assertEqual([len(r.results) for r in out], [1, 0, 1])
+        self.assertEqual(out[1].errors[0]["code"], "IMAGE_QUALITY_TOO_LOW")
+        self.assertEqual(acme.calls, [(2, [0.8, 0.8])])
+        with self.assertRaises(FaceException):
+            recognition_service.recognize_frames([self._frame(9, acme)], strict=True)
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from app.engine.detector_backends import LANDMARK_NAMES, ScrfdOnnxBackend, nms
+
+
+class _Node:
+    def __init__(self, name, shape):
+        self.name = name
+        self.shape = shape
+
+
+class _FakeSession:
+    """Stands in for an SCRFD export with a 64x64 input and 9 outputs (scores, boxes, keypoints).
+
+    Like the common exports, the input batch axis is dynamic; only `batched_outputs`
+    exports keep it on the outputs, the others concatenate every image's anchors.
+    """
+
+    def __init__(self, batched_outputs=False):
+        self.batched_outputs = batched_outputs
+        self.inputs_seen = []
+
+    def get_inputs(self):
+        return [_Node("input.1", ["N", 3, 64, 64])]
+
+    def get_outputs(self):
+        shape = ["N", "A", "C"] if self.batched_outputs else ["A", "C"]
+        return [_Node(f"out{i}", shape) for i in range(9)]
+
+    def run(self, names, feeds):
+        blob = feeds["input.1"]
+        self.inputs_seen.append(blob.shape)
+        per_image = []
+        for _ in range(blob.shape[0]):
+            rows = [8 * 8 * 2, 4 * 4 * 2, 2 * 2 * 2]
+            scores = [np.zeros((r, 1), np.float32) for r in rows]
+            boxes = [np.zeros((r, 4), np.float32) for r in rows]
+            kps = [np.zeros((r, 10), np.float32) for r in rows]
+            # Anchor (x=2, y=3) at stride 8, both anchor slots: a strong and a weaker duplicate.
+            row = (3 * 8 + 2) * 2
+            scores[0][row] = 0.9
+            scores[0][row + 1] = 0.6
+            boxes[0][row] = boxes[0][row + 1] = [1.0, 1.0, 1.0, 1.0]
+            kps[0][row] = [-0.5, -0.5, 0.5, -0.5, 0, 0, -0.5, 0.5, 0.5, 0.5]
+            per_image.append(scores + boxes + kps)
+        if self.batched_outputs:
+            return [np.stack([img[i] for img in per_image]) for i in range(9)]
+        return [np.concatenate([img[i] for img in per_image]) for i in range(9)]
+
+
+class ScrfdBackendTests(unittest.TestCase):
+    def test_decodes_boxes_landmarks_and_suppresses_duplicates(self):
+        backend = ScrfdOnnxBackend(session=_FakeSession())
+        image = np.zeros((128, 128, 3), dtype=np.uint8)
+        faces = backend.find_faces([image], [image[:, :, 0]], min_size=0)[0]
+
+        self.assertEqual(len(faces), 1)
+        # Centre (16, 24) in the 64px input, +-8 px, scaled back x2 to the 128px image.
+        self.assertEqual(faces[0]["box"], [16, 32, 48, 64])
+        self.assertAlmostEqual(faces[0]["score"], 0.9, places=5)
+        self.assertEqual(list(faces[0]["landmarks"]), list(LANDMARK_NAMES))
+        self.assertEqual(faces[0]["landmarks"]["right_eye"], [24.0, 40.0])
+        self.assertEqual(faces[0]["landmarks"]["nose"], [32.0, 48.0])
+
+    def test_batched_outputs_run_once_per_batch(self):
+        session = _FakeSession(batched_outputs=True)
+        backend = ScrfdOnnxBackend(session=session)
+        images = [np.zeros((64, 64, 3), dtype=np.uint8), np.zeros((32, 64, 3), dtype=np.uint8)]
+        found = backend.find_faces(images, [i[:, :, 0] for i in images], min_size=0)
+
+        self.assertTrue(backend.batched)
+        self.assertEqual(session.inputs_seen, [(2, 3, 64, 64)])
+        self.assertEqual([f[0]["box"] for f in found], [[8, 16, 24, 32], [8, 16, 24, 32]])
+
+    def test_two_dimensional_outputs_run_per_image_despite_a_dynamic_input_batch(self):
+        session = _FakeSession()
+        backend = ScrfdOnnxBackend(session=session)
+        images = [np.zeros((64, 64, 3), dtype=np.uint8), np.zeros((32, 64, 3), dtype=np.uint8)]
+        found = backend.find_faces(images, [i[:, :, 0] for i in images], min_size=0)
+
+        self.assertFalse(backend.batched)
+        self.assertEqual(session.inputs_seen, [(1, 3, 64, 64), (1, 3, 64, 64)])
+        self.assertEqual([len(f) for f in found], [1, 1])
+        self.assertEqual([f[0]["box"] for f in found], [[8, 16, 24, 32], [8, 16, 24, 32]])
+
+    def test_min_size_drops_small_faces(self):
+        backend = ScrfdOnnxBackend(session=_FakeSession())
+        image = np.zeros((64, 64, 3), dtype=np.uint8)
+        self.assertEqual(backend.find_faces([image], [image[:, :, 0]], min_size=50), [[]])
+
+
+class NmsTests(unittest.TestCase):
+    def test_keeps_best_of_overlapping_boxes(self):
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 0, 10, 9]], dtype=np.float32)
+        scores = np.array([0.8, 0.9, 0.7, 0.3], dtype=np.float32)
+
+        self.assertEqual(nms(boxes, scores, 0.4).tolist(), [1, 2])
+        self.assertEqual(nms(np.zeros((0, 4)), np.zeros(0), 0.4).tolist(), [])
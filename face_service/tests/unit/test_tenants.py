@@ -0,0 +1,156 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import settings
+from app.vector.embedding_store import EmbeddingStore
+from app.vector.id_map import IDMapStore
+from app.vector.tenants import TenantPartition, TenantVectorRegistry
+
+
+def _unit(rows: int, dim: int, seed: int) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+class TenantVectorRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._orig_interval = settings.FAISS_CHECKPOINT_INTERVAL_SECONDS
+        settings.FAISS_CHECKPOINT_INTERVAL_SECONDS = 0
+        root = Path(self.tmp.name)
+        default = TenantPartition(
+            None,
+            EmbeddingStore(16, str(root / "faiss.index"), index_type="flat"),
+            IDMapStore(str(root / "id_map.sqlite3")),
+        )
+        default.load()
+        self.registry = TenantVectorRegistry(16, str(root / "tenants"), default, max_loaded=2)
+
+    def tearDown(self):
+        self.registry.close()
+        self.registry.default.close()
+        settings.FAISS_CHECKPOINT_INTERVAL_SECONDS = self._orig_interval
+        self.tmp.cleanup()
+
+    def _enroll(self, organization_id: str | None, vectors: np.ndarray) -> list[int]:
+        with self.registry.lease(organization_id) as partition:
+            ids = partition.store.add(vectors)
+            for i in ids:
+                partition.id_map.set(i, {"user_id": f"{organization_id}-{i}", "face_id": f"face_{i}"})
+            partition.id_map.save()
+            return ids
+
+    def test_searches_only_see_their_own_organization(self):
+        acme = _unit(5, 16, 1)
+        globex = _unit(5, 16, 2)
+        self._enroll("acme", acme)
+        self._enroll("globex", globex)
+
+        with self.registry.lease("acme") as partition:
+            self.assertEqual(partition.store.ntotal, 5)
+            result = partition.matcher.match(globex[0], "upload_image", threshold_override=0.99)
+            self.assertEqual(result["status"], "unknown")
+            result = partition.matcher.match(acme[3], "upload_image")
+            self.assertEqual(result["payload"]["user_id"], "acme-3")
+        with self.registry.lease(None) as partition:
+            self.assertEqual(partition.store.ntotal, 0)
+
+    def test_idle_partitions_are_evicted_lru_and_reload_from_disk(self):
+        self._enroll("a", _unit(3, 16, 3))
+        self._enroll("b", _unit(3, 16, 4))
+        with self.registry.lease("a"):
+            pass
+        self._enroll("c", _unit(3, 16, 5))
+
+        stats = self.registry.stats()
+        self.assertEqual(sorted(stats["tenants"]), ["a", "c"])
+        self.assertEqual(stats["evictions"], 1)
+
+        with self.registry.lease("b") as partition:
+            self.assertEqual(partition.store.ntotal, 3)
+            self.assertEqual(partition.id_map.count(), 3)
+
+    def test_leased_partitions_are_not_evicted(self):
+        with self.registry.lease("a"), self.registry.lease("b"), self.registry.lease("c"):
+            self.assertEqual(self.registry.stats()["loaded"], 3)
+        with self.registry.lease("d"):
+            pass
+        self.assertEqual(self.registry.stats()["loaded"], 2)
+
+    def test_reload_waits_for_the_evicted_partition_to_finish_closing(self):
+        events = []
+        closing = threading.Event()
+        original_partition_for = self.registry._partition_for
+
+        def partition_for(organization_id):
+            partition = original_partition_for(organization_id)
+            original_close, original_load = partition.close, partition.load
+
+            def slow_close():
+                closing.set()
+                time.sleep(0.2)
+                original_close()
+                events.append(("closed", organization_id))
+
+            def load():
+                events.append(("load", organization_id))
+                original_load()
+
+            partition.close, partition.load = slow_close, load
+            return partition
+
+        self.registry._partition_for = partition_for
+        self._enroll("a", _unit(3, 16, 6))
+        self._enroll("b", _unit(3, 16, 7))
+        evicting = threading.Thread(target=self._enroll, args=("c", _unit(3, 16, 8)))
+        evicting.start()
+        closing.wait(5)
+        with self.registry.lease("a") as partition:
+            self.assertEqual(partition.store.ntotal, 3)
+        evicting.join()
+
+        self.assertLess(events.index(("closed", "a")), events.index(("load", "a"), 1))
+
+    def test_cold_load_does_not_block_other_tenants(self):
+        self._enroll("warm", _unit(2, 16, 9))
+        release = threading.Event()
+        original_partition_for = self.registry._partition_for
+
+        def partition_for(organization_id):
+            partition = original_partition_for(organization_id)
+            if organization_id == "cold":
+                original_load = partition.load
+                partition.load = lambda: (release.wait(5), original_load())
+            return partition
+
+        self.registry._partition_for = partition_for
+        cold = threading.Thread(target=lambda: self.registry.lease("cold").__enter__())
+        cold.start()
+        try:
+            time.sleep(0.05)
+            started = time.monotonic()
+            with self.registry.lease("warm") as partition:
+                self.assertEqual(partition.store.ntotal, 2)
+            self.assertLess(time.monotonic() - started, 1.0)
+        finally:
+            release.set()
+            cold.join()
+
+    def test_unpartitioned_registry_serves_every_organization_from_the_default(self):
+        self._enroll(None, _unit(4, 16, 10))
+        self.registry.partitioned = False
+
+        with self.registry.lease("acme") as partition:
+            self.assertIs(partition, self.registry.default)
+            self.assertEqual(partition.store.ntotal, 4)
+        self.assertEqual(self.registry.stats()["loaded"], 0)
+
+    def test_rejects_organization_ids_that_are_not_path_safe(self):
+        with self.assertRaises(ValueError):
+            with self.registry.lease("../other"):
+                pass
@@ -0,0 +1,145 @@
+import io
+import random
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.engine.matcher import FaceMatcher
+from app.schemas.face import RecognizeRequest
+from app.services import recognition_service, registration_service
+from app.vector import embedding_store as embedding_store_module
+from app.vector.embedding_store import EmbeddingStore
+from app.vector.id_map import IDMapStore
+
+
+DIM = 32
+IDENTITIES = 90
+PRE_ENROLLED = 30
+POLICIES = {
+    "enrollment.images.min_count": 3,
+    "quality.min_image_width": 8,
+    "quality.min_image_height": 8,
+    "quality.min_face_width_px": 8,
+    "quality.min_face_height_px": 8,
+    "quality.min_laplacian_variance": 0,
+    "recognition.threshold": 0.9,
+}
+
+
+@unittest.skipIf(embedding_store_module.faiss is None, "faiss is not installed")
+class ConcurrentRecognizeRegisterTests(unittest.TestCase):
+    """Recognitions run while other users enroll and get deleted; no result may mix snapshots."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((IDENTITIES, DIM)).astype(np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        # Images carry their identity in the first pixel; the fake embedder maps it back to a vector.
+        def image_for(identity: int) -> np.ndarray:
+            return np.full((16, 16, 3), identity, dtype=np.uint8)
+
+        self._patches = [
+            (registration_service, "_decode_upload", lambda upload: image_for(int(upload.filename))),
+            (registration_service, "_save_image", lambda image, path: None),
+            (recognition_service, "_decode_base64_image", lambda data: image_for(int(data))),
+            (recognition_service, "_save_unknown_face", lambda image, source_id, when: ("unk", "unused.png")),
+            (registration_service.detector, "detect", lambda img, min_laplacian_variance=None, long_side=None: [{"box": [0, 0, 16, 16]}]),
+            (recognition_service.detector, "detect_batch", lambda images, **kwargs: [[{"box": [0, 0, 16, 16]}] for _ in images]),
+            (registration_service.aligner, "align", lambda img, box, landmarks=None: img),
+            (registration_service.embedder, "embed_batch", lambda faces: self.vectors[[int(f[0, 0, 0]) for f in faces]]),
+        ]
+        self._originals = [(obj, name, getattr(obj, name)) for obj, name, _ in self._patches]
+        for obj, name, value in self._patches:
+            setattr(obj, name, value)
+        self._orig_interval = settings.FAISS_CHECKPOINT_INTERVAL_SECONDS
+        settings.FAISS_CHECKPOINT_INTERVAL_SECONDS = 0
+
+    def tearDown(self):
+        for obj, name, value in self._originals:
+            setattr(obj, name, value)
+        settings.FAISS_CHECKPOINT_INTERVAL_SECONDS = self._orig_interval
+        self.tmp.cleanup()
+
+    def _register(self, identity: int, store: EmbeddingStore, id_map: IDMapStore) -> None:
+        images = [UploadFile(filename=str(identity), file=io.BytesIO(b"")) for _ in range(3)]
+        registration_service.register_faces(f"emp_{identity}", images, store, id_map, POLICIES)
+
+    def _run(self, index_type: str) -> None:
+        root = Path(self.tmp.name) / index_type
+        store = EmbeddingStore(DIM, str(root / "faiss.index"), index_type=index_type)
+        id_map = IDMapStore(str(root / "id_map.sqlite3"))
+        id_map.load()
+        matcher = FaceMatcher(store, id_map)
+        for identity in range(PRE_ENROLLED):
+            self._register(identity, store, id_map)
+
+        stop = threading.Event()
+        failures: list[str] = []
+        checked = [0]
+
+        def reader(seed: int) -> None:
+            rnd = random.Random(seed)
+            try:
+                while not stop.is_set():
+                    identity = rnd.randrange(IDENTITIES)
+                    payload = RecognizeRequest(
+                        source_type="upload_image",
+                        source_id="CAM_1",
+                        timestamp=datetime.utcnow(),
+                        image=str(identity),
+                        policy=POLICIES,
+                    )
+                    result = recognition_service.recognize(payload, matcher).results[0]
+                    checked[0] += 1
+                    if result.status == "matched":
+                        if result.user_id != f"emp_{identity}" or result.embedding_index is None:
+                            failures.append(f"query {identity} matched {result.user_id}/{result.embedding_index}")
+                    elif identity < PRE_ENROLLED:
+                        failures.append(f"pre-enrolled identity {identity} was not matched")
+            except Exception as exc:
+                failures.append(f"reader crashed: {exc!r}")
+
+        def writer() -> None:
+            try:
+                for identity in range(PRE_ENROLLED, IDENTITIES):
+                    self._register(identity, store, id_map)
+                    if identity % 3 == 0:
+                        registration_service.delete_face(f"face_emp_{identity}", store, id_map)
+            except Exception as exc:
+                failures.append(f"writer crashed: {exc!r}")
+
+        readers = [threading.Thread(target=reader, args=(seed,)) for seed in range(4)]
+        for thread in readers:
+            thread.start()
+        started = time.monotonic()
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        writer_thread.join()
+        # Let readers keep hammering the final state briefly as well.
+        while time.monotonic() - started < 0.5:
+            time.sleep(0.05)
+        stop.set()
+        for thread in readers:
+            thread.join()
+        store.wal.close()
+        id_map.close()
+
+        self.assertEqual(failures[:5], [])
+        self.assertGreater(checked[0], 100)
+        deleted = len([i for i in range(PRE_ENROLLED, IDENTITIES) if i % 3 == 0])
+        self.assertEqual(store.ntotal, 3 * (IDENTITIES - deleted))
+
+    def test_flat_index(self):
+        self._run("flat")
+
+    def test_hnsw_index_rebuilds_without_blocking_searches(self):
+        self._run("hnsw")
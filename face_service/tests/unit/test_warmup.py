@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.exceptions import FaceException
+from app.services import warmup
+
+SERVICE_ROOT = Path(__file__).resolve().parents[2]
+
+
+class WarmupTests(unittest.TestCase):
+    def setUp(self):
+        self._enabled = settings.WARMUP_ENABLED
+        self._warm_up_models = warmup.warm_up_models
+
+    def tearDown(self):
+        settings.WARMUP_ENABLED = self._enabled
+        warmup.warm_up_models = self._warm_up_models
+
+    def test_not_ready_until_warm_up_completes(self):
+        state = warmup.WarmupState()
+        self.assertFalse(state.ready)
+        warmup.warm_up_models = lambda s: s.step("embedder", 0.0)
+
+        warmup.start_warmup(state).join(timeout=5)
+
+        self.assertTrue(state.ready)
+        self.assertIn("embedder", state.snapshot()["steps_ms"])
+
+    def test_failed_warm_up_stays_not_ready(self):
+        def broken(_state):
+            raise FaceException(500, "DETECTOR_MODEL_UNAVAILABLE", "SCRFD model not found")
+
+        state = warmup.WarmupState()
+        warmup.warm_up_models = broken
+        warmup.start_warmup(state).join(timeout=5)
+
+        self.assertFalse(state.ready)
+        self.assertEqual(state.snapshot()["status"], "failed")
+        self.assertIn("DETECTOR_MODEL_UNAVAILABLE", state.snapshot()["error"])
+
+    def test_disabled_warm_up_is_ready_immediately(self):
+        settings.WARMUP_ENABLED = False
+        state = warmup.WarmupState()
+        self.assertIsNone(warmup.start_warmup(state))
+        self.assertTrue(state.ready)
+
+    def test_importing_the_app_loads_no_models(self):
+        # A fresh interpreter, so models loaded by other tests cannot hide an eager load.
+        probe = (
+            "import app.main\n"
+            "from app.engine.detector import detector\n"
+            "from app.engine.embedder import embedder\n"
+            "print(detector._backend is None, embedder.session is None and not embedder._loaded)\n"
+        )
+        out = subprocess.run([sys.executable, "-c", probe], cwd=SERVICE_ROOT, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "True True")
+
+
+if __name__ == "__main__":
+    unittest.main()
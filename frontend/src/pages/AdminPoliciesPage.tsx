@@ -16,9 +16,12 @@ type PolicyField = {
 
 const POLICY_FIELDS: PolicyField[] = [
   { key: 'recognition.threshold', label: 'Recognition Threshold', help: '0 to 1. Higher value means stricter matching.', min: 0, max: 1, step: 0.01 },
+  { key: 'recognition.ann.nprobe', label: 'ANN nprobe', help: 'IVF lists probed per search. Higher is more accurate and slower.', min: 1, step: 1, integer: true },
+  { key: 'recognition.ann.ef_search', label: 'ANN efSearch', help: 'HNSW search breadth. Higher is more accurate and slower.', min: 1, step: 1, integer: true },
   { key: 'attendance.min_time_minutes', label: 'Minimum Work Minutes', help: 'Minutes needed to mark present.', min: 0, step: 1, integer: true },
   { key: 'retention.days', label: 'Retention Days', help: 'Days to keep attendance/face metadata.', min: 1, step: 1, integer: true },
   { key: 'camera.stream.sampling_fps', label: 'Camera Sampling FPS', help: 'Frames sampled per second from stream.', min: 1, step: 1, integer: true },
+  { key: 'camera.motion.min_changed_ratio', label: 'Motion Gate Ratio', help: '0 to 1. Share of pixels that must change before a frame is recognized. 0 sends every frame.', min: 0, max: 1, step: 0.001 },
   { key: 'camera.wall.min_face_area_ratio', label: 'Min Face Area Ratio', help: '0 to 1. Minimum frame ratio for face area.', min: 0, max: 1, step: 0.01 },
   { key: 'enrollment.images.min_count', label: 'Enrollment Min Images', help: 'Minimum images required for enrollment.', min: 0, step: 1, integer: true },
   { key: 'enrollment.images.max_count', label: 'Enrollment Max Images', help: 'Maximum images accepted for enrollment.', min: 0, step: 1, integer: true },
@@ -27,6 +30,7 @@ const POLICY_FIELDS: PolicyField[] = [
   { key: 'quality.min_face_width_px', label: 'Min Face Width (px)', help: 'Minimum detected face width.', min: 0, step: 1, integer: true },
   { key: 'quality.min_face_height_px', label: 'Min Face Height (px)', help: 'Minimum detected face height.', min: 0, step: 1, integer: true },
   { key: 'quality.min_laplacian_variance', label: 'Min Laplacian Variance', help: 'Image sharpness threshold.', min: 0, step: 0.1 },
+  { key: 'detection.long_side_px', label: 'Detection Long Side (px)', help: 'Faces are detected on a copy resized to this long side. 0 uses full resolution.', min: 0, step: 1, integer: true },
   { key: 'quality.max_yaw_degrees', label: 'Max Yaw Degrees', help: 'Maximum left/right face rotation.', min: 0, step: 1, integer: true },
   { key: 'quality.max_pitch_degrees', label: 'Max Pitch Degrees', help: 'Maximum up/down face rotation.', min: 0, step: 1, integer: true },
 ];
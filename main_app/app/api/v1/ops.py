@@ -154,7 +154,12 @@ async def upload_image(
         if not register_images:
             raise AppException(400, "IMAGE_REQUIRED", "At least one image is required for registration")
 
-        result = await face_client.register_faces(user_id=user_id, files=register_images, policies=policies)
+        result = await face_client.register_faces(
+            user_id=user_id,
+            files=register_images,
+            policies=policies,
+            organization_id=current_user["organization_id"],
+        )
         if "error" in result:
             status_code = result["error"].get("status_code", 502)
             detail = _upstream_error_text(result)
@@ -184,6 +189,7 @@ async def upload_image(
         timestamp=ts,
         image=recognize_image,
         policies=policies,
+        organization_id=current_user["organization_id"],
     )
     if "error" in result:
         status_code = result["error"].get("status_code", 502)
@@ -21,6 +21,34 @@ class Settings(BaseSettings):
 
     # Face Service
     FACE_SERVICE_URL: str = "http://localhost:8001"
+    # One pooled keep-alive client per process (async for API calls, sync for camera workers).
+    FACE_SERVICE_MAX_CONNECTIONS: int = 100
+    FACE_SERVICE_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    FACE_SERVICE_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    # Needs the optional `h2` package; silently stays on HTTP/1.1 without it.
+    FACE_SERVICE_HTTP2: bool = False
+    FACE_SERVICE_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    FACE_SERVICE_TIMEOUT_SECONDS: float = 30.0
+    FACE_SERVICE_RECOGNIZE_TIMEOUT_SECONDS: float = 60.0
+    FACE_SERVICE_REGISTER_TIMEOUT_SECONDS: float = 120.0
+    FACE_SERVICE_DELETE_TIMEOUT_SECONDS: float = 10.0
+    # Retries on 502/503/504 and on transport errors for delete; recognize retries only connection failures.
+    FACE_SERVICE_RETRIES: int = 2
+    FACE_SERVICE_RETRY_BACKOFF_SECONDS: float = 0.2
+    # Capture threads hand sampled frames to a shared pool of recognition workers.
+    CAMERA_RECOGNITION_WORKERS: int = 4
+    CAMERA_QUEUE_MAX_SIZE: int = 64
+    # How often capture threads re-read camera.stream.sampling_fps.
+    CAMERA_SAMPLING_REFRESH_SECONDS: float = 30.0
+    # Skip recognition for sampled frames that barely differ from the previous one.
+    CAMERA_MOTION_GATING: bool = True
+    CAMERA_MOTION_DOWNSCALE_WIDTH: int = 160
+    CAMERA_MOTION_HOLD_SECONDS: float = 3.0
+    # Coalesce camera frames into /faces/recognize/batch calls.
+    CAMERA_RECOGNITION_BATCHING: bool = False
+    CAMERA_BATCH_MAX_FRAMES: int = 16
+    CAMERA_BATCH_MAX_WAIT_MS: float = 50.0
+    CAMERA_BATCH_MAX_IN_FLIGHT: int = 2
 
     # Storage
     STORAGE_ROOT: str = "./storage"
@@ -8,7 +8,8 @@ from app.api.v1 import router as v1_router
 from app.core.config import settings
 from app.core.database import SessionLocal, init_db
 from app.core.exceptions import register_exception_handlers
-from app.services import camera_worker_service
+from app.services import camera_worker_service, face_client
+from app.services.recognition_batcher import recognition_batcher
 from app.services.auth_service import seed_roles
 
 
@@ -37,9 +38,17 @@ def on_startup() -> None:
         seed_roles(db)
     finally:
         db.close()
+    face_client.open_clients()
     camera_worker_service.bootstrap_all_enabled_workers()
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    camera_worker_service.shutdown_camera_workers()
+    recognition_batcher.stop()
+    await face_client.close_clients()
+
+
 @app.get("/health")
 def health_check():
     return {"status": "ok", "service": "main_app"}
@@ -53,4 +62,6 @@ def metrics():
         "uptime_seconds": uptime_seconds,
         "pid": os.getpid(),
         "route_count": len(app.routes),
+        "camera_pool": camera_worker_service.pool_status(),
+        "camera_batching": camera_worker_service.batching_status(),
     }
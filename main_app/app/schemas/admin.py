@@ -26,6 +26,7 @@ class CameraConfigBody(BaseModel):
     location: str | None = None
     gate_id: str | None = None
     direction: str = Field(default="both", pattern="^(entry|exit|both)$")
+    sampling_fps: float | None = Field(default=None, gt=0, le=30)
     enabled: bool = True
 
 
@@ -35,6 +36,7 @@ class CameraUpdateBody(BaseModel):
     location: str | None = None
     gate_id: str | None = None
     direction: str | None = Field(default=None, pattern="^(entry|exit|both)$")
+    sampling_fps: float | None = Field(default=None, gt=0, le=30)
     enabled: bool | None = None
 
 
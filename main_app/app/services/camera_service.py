@@ -25,6 +25,7 @@ def upsert_camera(db: Session, organization_id: str, camera: dict) -> dict:
         "location": camera.get("location"),
         "gate_id": camera.get("gate_id"),
         "direction": camera.get("direction", "both"),
+        "sampling_fps": camera.get("sampling_fps"),
         "enabled": bool(camera.get("enabled", True)),
     }
     if row is None:
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-import base64
 import threading
 import time
+from collections import deque
 from datetime import datetime, timezone
 
 import cv2
-import httpx
 
 from app.core.config import settings
 from app.models import Event, SystemConfig
@@ -14,6 +13,8 @@ import app.services.attendance_service as attendance_service
 import app.services.face_metadata_service as face_metadata_service
 import app.services.policy_service as policy_service
 from app.services.camera_service import list_cameras
+from app.services.face_client import RETRY_CONNECT_ERRORS, raw_recognize_headers, request_sync
+from app.services.recognition_batcher import recognition_batcher
 from app.core.database import SessionLocal
 
 
@@ -21,6 +22,9 @@ _workers: dict[str, "CameraWorker"] = {}
 _lock = threading.Lock()
 _wall_face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
 _recent_camera_events: dict[tuple[str, str, str], float] = {}
+# face_service track ids already turned into attendance, with the time they were marked.
+_marked_tracks: dict[tuple[str, str, str], float] = {}
+_MARKED_TRACK_TTL_SECONDS = 3600.0
 _event_guard_lock = threading.Lock()
 
 
@@ -36,6 +40,12 @@ def _event(db, organization_id: str, event_type: str, severity: str, metadata: d
     db.commit()
 
 
+def _prune_marked_tracks(now_ts: float) -> None:
+    stale = [key for key, marked_at in _marked_tracks.items() if now_ts - marked_at > _MARKED_TRACK_TTL_SECONDS]
+    for key in stale:
+        del _marked_tracks[key]
+
+
 def _validate_wall_frame(frame, min_face_area_ratio: float) -> tuple[bool, dict]:
     if frame is None:
         return False, {"reason": "empty_frame"}
@@ -68,24 +78,266 @@ def _validate_wall_frame(frame, min_face_area_ratio: float) -> tuple[bool, dict]
         "faces_detected": count,
         "face_area_ratio": round(face_area_ratio, 4),
         "required_ratio": float(min_face_area_ratio),
+        "face_box": [int(x), int(y), int(x + w), int(y + h)],
     }
 
 
+class FrameJob:
+    __slots__ = ("worker", "frame", "captured_at")
+
+    def __init__(self, worker: "CameraWorker", frame, captured_at: datetime):
+        self.worker = worker
+        self.frame = frame
+        self.captured_at = captured_at
+
+
+class FrameQueue:
+    """Bounded queue shared by every camera.
+
+    A camera never has more than one frame waiting: a newer frame replaces
+    its queued one. When the queue is full the oldest job is dropped, so
+    recognition always works on recent frames instead of a growing backlog.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = max(1, int(maxsize))
+        self._items: deque[FrameJob] = deque()
+        self._cond = threading.Condition()
+
+    def put(self, job: FrameJob) -> FrameJob | None:
+        """Queue a job and return the one it displaced, if any."""
+        with self._cond:
+            dropped = None
+            for queued in self._items:
+                if queued.worker is job.worker:
+                    self._items.remove(queued)
+                    dropped = queued
+                    break
+            if dropped is None and len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+            self._items.append(job)
+            self._cond.notify()
+            return dropped
+
+    def get(self, timeout: float) -> FrameJob | None:
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def depth(self, worker: "CameraWorker | None" = None) -> int:
+        with self._cond:
+            if worker is None:
+                return len(self._items)
+            return sum(1 for job in self._items if job.worker is worker)
+
+    def purge(self, worker: "CameraWorker") -> int:
+        """Drop the job a camera still has queued; returns how many were removed."""
+        with self._cond:
+            kept = deque(job for job in self._items if job.worker is not worker)
+            removed = len(self._items) - len(kept)
+            self._items = kept
+            return removed
+
+
+class RecognitionPool:
+    """Worker threads shared across cameras: validation, recognition, DB writes and events."""
+
+    def __init__(self, size: int, queue_size: int):
+        self.size = max(1, int(size))
+        self.queue = FrameQueue(queue_size)
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def ensure_started(self) -> None:
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads:
+                return
+            self._stop_event.clear()
+            for i in range(self.size):
+                thread = threading.Thread(target=self._run, daemon=True, name=f"camera-recognition-{i}")
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, job: FrameJob) -> None:
+        dropped = self.queue.put(job)
+        job.worker.count("frames_enqueued")
+        if dropped is not None:
+            # Usually another camera's job, so only its own stats lock makes this safe.
+            dropped.worker.count("frames_dropped")
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            job = self.queue.get(timeout=0.5)
+            if job is None or job.worker.stopped:
+                continue
+            try:
+                job.worker.process(job.frame, job.captured_at)
+                job.worker.count("frames_processed")
+            except Exception as exc:
+                job.worker.count("frames_failed", last_error=str(exc))
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout=2.0)
+
+
+_pool = RecognitionPool(settings.CAMERA_RECOGNITION_WORKERS, settings.CAMERA_QUEUE_MAX_SIZE)
+
+
+class FrameSampler:
+    """Decides which grabbed frames get decoded, and measures the rate actually achieved."""
+
+    WINDOW_SECONDS = 10.0
+
+    def __init__(self, fps: float):
+        self.fps = fps
+        self._next_due = 0.0
+        self._sampled: deque[float] = deque()
+        # The capture thread appends samples while status requests read the rate.
+        self._sampled_lock = threading.Lock()
+
+    @property
+    def fps(self) -> float:
+        return self._fps
+
+    @fps.setter
+    def fps(self, value: float) -> None:
+        self._fps = value if value and value > 0 else 1.0
+        self._interval = 1.0 / self._fps
+
+    def due(self, now: float) -> bool:
+        if now < self._next_due:
+            return False
+        # Stay on the fixed schedule, but never try to catch up after a stall.
+        self._next_due += self._interval
+        if self._next_due <= now:
+            self._next_due = now + self._interval
+        with self._sampled_lock:
+            self._sampled.append(now)
+            while self._sampled and now - self._sampled[0] > self.WINDOW_SECONDS:
+                self._sampled.popleft()
+        return True
+
+    def effective_fps(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._sampled_lock:
+            sampled = tuple(self._sampled)
+        recent = [t for t in sampled if now - t <= self.WINDOW_SECONDS]
+        if len(recent) < 2:
+            return 0.0
+        span = max(now - recent[0], 1e-6)
+        return round((len(recent) - 1) / span, 2)
+
+
+class MotionGate:
+    """Cheap change detector run on sampled frames before they are queued.
+
+    Frames are downscaled to grayscale and compared with the previous sample;
+    a frame passes when the fraction of changed pixels reaches
+    `min_changed_ratio` (0 disables gating). After motion, frames keep passing
+    for `hold_seconds` so a person who stops in front of the camera is still
+    recognized.
+    """
+
+    PIXEL_DELTA = 25
+
+    def __init__(self, min_changed_ratio: float, width: int, hold_seconds: float):
+        self.min_changed_ratio = min_changed_ratio
+        self.width = max(16, int(width))
+        self.hold_seconds = hold_seconds
+        self._previous = None
+        self._open_until = 0.0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        height = max(1, round(h * self.width / w))
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        small = cv2.resize(gray, (self.width, height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def changed(self, frame, now: float) -> bool:
+        if self.min_changed_ratio <= 0:
+            return True
+        thumb = self._thumbnail(frame)
+        previous, self._previous = self._previous, thumb
+        if previous is None or previous.shape != thumb.shape:
+            self._open_until = now + self.hold_seconds
+            return True
+        diff = cv2.absdiff(previous, thumb)
+        ratio = cv2.countNonZero(cv2.threshold(diff, self.PIXEL_DELTA, 255, cv2.THRESH_BINARY)[1]) / diff.size
+        if ratio >= self.min_changed_ratio:
+            self._open_until = now + self.hold_seconds
+            return True
+        return now < self._open_until
+
+
 class CameraWorker(threading.Thread):
+    """Capture thread for one camera.
+
+    It only reads frames, so the OpenCV buffer never backs up behind a slow
+    recognition; sampled frames are handed to the shared RecognitionPool.
+    """
+
     def __init__(self, organization_id: str, camera: dict):
         super().__init__(daemon=True, name=f"camera-worker-{camera['camera_id']}")
         self.organization_id = organization_id
         self.camera = camera
         self._stop_event = threading.Event()
+        self.sampler = FrameSampler(self._configured_fps() or 1.0)
+        self.motion_gate = MotionGate(
+            policy_service.POLICY_DEFAULTS["camera.motion.min_changed_ratio"] if settings.CAMERA_MOTION_GATING else 0.0,
+            settings.CAMERA_MOTION_DOWNSCALE_WIDTH,
+            settings.CAMERA_MOTION_HOLD_SECONDS,
+        )
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "frames_grabbed": 0,
+            "frames_sampled": 0,
+            "frames_gated": 0,
+            "frames_forwarded": 0,
+            "frames_enqueued": 0,
+            "frames_dropped": 0,
+            "frames_processed": 0,
+            "frames_failed": 0,
+            "last_error": None,
+        }
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
 
     def stop(self) -> None:
         self._stop_event.set()
 
+    def count(self, key: str, last_error: str | None = None) -> None:
+        # Stats are bumped from this capture thread, pool threads and other cameras' capture threads.
+        with self._stats_lock:
+            self.stats[key] += 1
+            if last_error is not None:
+                self.stats["last_error"] = last_error
+
+    def status(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            "camera_id": self.camera["camera_id"],
+            "running": self.is_alive(),
+            "queue_depth": _pool.queue.depth(self),
+            "sampling_fps": self.sampler.fps,
+            "motion_min_changed_ratio": self.motion_gate.min_changed_ratio,
+            "effective_fps": self.sampler.effective_fps(),
+            **stats,
+        }
+
     def run(self) -> None:
         source = self.camera["source"]
-        source_type = self.camera["camera_type"]
         camera_id = self.camera["camera_id"]
-        direction = str(self.camera.get("direction", "both")).lower()
         cap = cv2.VideoCapture(source)
 
         if not cap.isOpened():
@@ -102,97 +354,157 @@ class CameraWorker(threading.Thread):
                 db.close()
             return
 
-        last_sample = 0.0
+        _pool.ensure_started()
+        self._refresh_policies()
+        refreshed_at = time.monotonic()
         while not self._stop_event.is_set():
-            ok, frame = cap.read()
-            if not ok or frame is None:
+            # grab() only advances the stream; frames are decoded by retrieve() when sampled.
+            if not cap.grab():
                 time.sleep(0.2)
                 continue
+            self.count("frames_grabbed")
 
-            now = time.time()
-            # Current policy is 1 FPS sampling for camera streams.
-            if now - last_sample < 1.0:
+            now = time.monotonic()
+            if now - refreshed_at >= settings.CAMERA_SAMPLING_REFRESH_SECONDS:
+                self._refresh_policies()
+                refreshed_at = now
+            if not self.sampler.due(now):
+                continue
+            ok, frame = cap.retrieve()
+            if not ok or frame is None:
                 continue
-            last_sample = now
+            self.count("frames_sampled")
+            if not self.motion_gate.changed(frame, now):
+                self.count("frames_gated")
+                continue
+            self.count("frames_forwarded")
+            _pool.submit(FrameJob(self, frame, datetime.now(timezone.utc)))
+
+        cap.release()
+
+    def _configured_fps(self) -> float | None:
+        value = self.camera.get("sampling_fps")
+        return float(value) if value else None
+
+    def _refresh_policies(self) -> None:
+        db = SessionLocal()
+        try:
+            policies = policy_service.get_effective_policies(db, self.organization_id)
+        except Exception:
+            return
+        finally:
+            db.close()
+        self.sampler.fps = self._configured_fps() or float(policies.get("camera.stream.sampling_fps", 1) or 1)
+        if settings.CAMERA_MOTION_GATING:
+            self.motion_gate.min_changed_ratio = float(policies.get("camera.motion.min_changed_ratio", self.motion_gate.min_changed_ratio))
+
+    def process(self, frame, ts: datetime) -> None:
+        source_type = self.camera["camera_type"]
+        camera_id = self.camera["camera_id"]
+        direction = str(self.camera.get("direction", "both")).lower()
+
+        db = SessionLocal()
+        try:
+            policies = policy_service.get_effective_policies(db, self.organization_id)
+            face_boxes = None
+            if source_type == "wall_camera":
+                min_face_area_ratio = float(policies.get("camera.wall.min_face_area_ratio", 0.5))
+                valid, detail = _validate_wall_frame(frame, min_face_area_ratio)
+                if not valid:
+                    _event(
+                        db,
+                        self.organization_id,
+                        "WALL_CAMERA_FRAME_SKIPPED",
+                        "LOW",
+                        {"camera_id": camera_id, **detail},
+                    )
+                    return
+                # face_service detects around this box instead of scanning the whole frame again.
+                face_boxes = [detail["face_box"]]
 
             ok, enc = cv2.imencode(".jpg", frame)
             if not ok:
-                continue
-            b64 = base64.b64encode(enc.tobytes()).decode("utf-8")
-            ts = datetime.now(timezone.utc)
+                return
 
-            db = SessionLocal()
             try:
-                policies = policy_service.get_effective_policies(db, self.organization_id)
-                if source_type == "wall_camera":
-                    min_face_area_ratio = float(policies.get("camera.wall.min_face_area_ratio", 0.5))
-                    valid, detail = _validate_wall_frame(frame, min_face_area_ratio)
-                    if not valid:
-                        _event(
-                            db,
-                            self.organization_id,
-                            "WALL_CAMERA_FRAME_SKIPPED",
-                            "LOW",
-                            {"camera_id": camera_id, **detail},
-                        )
-                        continue
-
-                payload = {
-                    "source_type": source_type,
-                    "source_id": camera_id,
-                    "timestamp": ts.isoformat(),
-                    "image": f"data:image/jpeg;base64,{b64}",
-                    "policy": policies,
-                }
-                try:
-                    with httpx.Client(timeout=60.0) as client:
-                        resp = client.post(f"{settings.FACE_SERVICE_URL}/faces/recognize", json=payload)
-                    if not resp.is_success:
-                        _event(
-                            db,
-                            self.organization_id,
-                            "CAMERA_RECOGNITION_FAILED",
-                            "MEDIUM",
-                            {"camera_id": camera_id, "status_code": resp.status_code},
-                        )
-                        continue
-                    result = resp.json()
-                except Exception as exc:
+                result = self._recognize(enc.tobytes(), source_type, camera_id, ts, policies, face_boxes)
+                if "error" in result:
                     _event(
                         db,
                         self.organization_id,
-                        "CAMERA_RECOGNITION_ERROR",
+                        "CAMERA_RECOGNITION_FAILED",
                         "MEDIUM",
-                        {"camera_id": camera_id, "error": str(exc)},
+                        {"camera_id": camera_id, "status_code": result["error"]["status_code"]},
                     )
-                    continue
-
-                persist = face_metadata_service.persist_recognition_metadata(
-                    db,
-                    organization_id=self.organization_id,
-                    captured_at=ts,
-                    payload=result,
-                )
-                summary = self._mark_camera_attendance(
-                    db=db,
-                    result=result,
-                    event_ts=ts.replace(tzinfo=None),
-                    source_type=source_type,
-                    camera_id=camera_id,
-                    direction=direction,
-                    threshold=float(policies.get("recognition.threshold", 0.8)),
-                )
+                    return
+            except Exception as exc:
                 _event(
                     db,
                     self.organization_id,
-                    "CAMERA_FRAME_PROCESSED",
-                    "LOW",
-                    {"camera_id": camera_id, "persist": persist, "attendance": summary},
+                    "CAMERA_RECOGNITION_ERROR",
+                    "MEDIUM",
+                    {"camera_id": camera_id, "error": str(exc)},
                 )
-            finally:
-                db.close()
-
-        cap.release()
+                return
+
+            persist = face_metadata_service.persist_recognition_metadata(
+                db,
+                organization_id=self.organization_id,
+                captured_at=ts,
+                payload=result,
+            )
+            summary = self._mark_camera_attendance(
+                db=db,
+                result=result,
+                event_ts=ts.replace(tzinfo=None),
+                source_type=source_type,
+                camera_id=camera_id,
+                direction=direction,
+                threshold=float(policies.get("recognition.threshold", 0.8)),
+            )
+            _event(
+                db,
+                self.organization_id,
+                "CAMERA_FRAME_PROCESSED",
+                "LOW",
+                {"camera_id": camera_id, "persist": persist, "attendance": summary},
+            )
+        finally:
+            db.close()
+
+    def _recognize(
+        self,
+        frame: bytes,
+        source_type: str,
+        camera_id: str,
+        ts: datetime,
+        policies: dict,
+        face_boxes: list[list[int]] | None = None,
+    ) -> dict:
+        if settings.CAMERA_RECOGNITION_BATCHING:
+            # Shares one /faces/recognize/batch call with frames from other cameras.
+            future = recognition_batcher.submit(
+                frame,
+                source_type=source_type,
+                source_id=camera_id,
+                timestamp=ts,
+                policies=policies,
+                organization_id=self.organization_id,
+                face_boxes=face_boxes,
+            )
+            return future.result(timeout=settings.FACE_SERVICE_RECOGNIZE_TIMEOUT_SECONDS)
+
+        resp = request_sync(
+            "POST",
+            f"{settings.FACE_SERVICE_URL}/faces/recognize/raw",
+            route="recognize",
+            retry_errors=RETRY_CONNECT_ERRORS,
+            content=frame,
+            headers=raw_recognize_headers(source_type, camera_id, ts, policies, self.organization_id, face_boxes),
+        )
+        if not resp.is_success:
+            return {"error": {"status_code": resp.status_code}}
+        return resp.json()
 
     def _mark_camera_attendance(
         self,
@@ -230,12 +542,18 @@ class CameraWorker(threading.Thread):
                 skipped_low_confidence += 1
                 continue
 
+            track_id = row.get("track_id")
             dedupe_key = (camera_id, user_id, event_type)
+            track_key = (camera_id, track_id, event_type) if track_id else None
             with _event_guard_lock:
-                last = _recent_camera_events.get(dedupe_key, 0.0)
-                if (now_ts - last) < cooldown_sec:
+                # One attendance event per tracked face, however long it stays in view; the
+                # per-user cooldown still backs it up when a track is lost and re-created.
+                if track_key in _marked_tracks or (now_ts - _recent_camera_events.get(dedupe_key, 0.0)) < cooldown_sec:
                     skipped_duplicate += 1
                     continue
+                if track_key is not None:
+                    _prune_marked_tracks(now_ts)
+                    _marked_tracks[track_key] = now_ts
                 _recent_camera_events[dedupe_key] = now_ts
 
             try:
@@ -281,18 +599,38 @@ def stop_camera_worker(camera_id: str) -> dict:
         if worker is None:
             return {"camera_id": camera_id, "status": "not_running"}
         worker.stop()
+        # A stopped camera's last frame must not be recognized (or mark attendance) after the fact.
+        _pool.queue.purge(worker)
         return {"camera_id": camera_id, "status": "stopping"}
 
 
 def worker_status(camera_id: str) -> dict:
     with _lock:
         worker = _workers.get(camera_id)
-        return {"camera_id": camera_id, "running": bool(worker and worker.is_alive())}
+        if worker is None:
+            return {"camera_id": camera_id, "running": False}
+        return worker.status()
+
+
+def batching_status() -> dict:
+    return {"enabled": settings.CAMERA_RECOGNITION_BATCHING, **recognition_batcher.stats()}
 
 
 def all_worker_status() -> list[dict]:
     with _lock:
-        return [{"camera_id": cid, "running": w.is_alive()} for cid, w in _workers.items()]
+        return [w.status() for w in _workers.values()]
+
+
+def pool_status() -> dict:
+    return {"workers": _pool.size, "queue_depth": _pool.queue.depth(), "queue_max_size": _pool.queue.maxsize}
+
+
+def shutdown_camera_workers() -> None:
+    with _lock:
+        workers = list(_workers.values())
+    for worker in workers:
+        worker.stop()
+    _pool.stop()
 
 
 def bootstrap_enabled_workers(organization_id: str) -> None:
@@ -1,5 +1,7 @@
-import base64
+import asyncio
 import json
+import threading
+import time
 from datetime import datetime
 
 import httpx
@@ -8,6 +10,122 @@ from fastapi import UploadFile
 from ..core.config import settings
 
 
+# Retried (with backoff) when the call passes retry errors; registration is never retried.
+_RETRY_STATUSES = {502, 503, 504}
+# Any transport failure, for calls that are safe to repeat (delete).
+RETRY_TRANSPORT_ERRORS: tuple[type[Exception], ...] = (httpx.TransportError,)
+# Only failures where the request never reached face_service. Recognition is not idempotent: it
+# advances the camera's face tracks and may save an unknown-face image, so a read timeout or a
+# dropped response must not send the frame again.
+RETRY_CONNECT_ERRORS: tuple[type[Exception], ...] = (httpx.ConnectError, httpx.ConnectTimeout)
+_async_client: httpx.AsyncClient | None = None
+_sync_client: httpx.Client | None = None
+_clients_lock = threading.Lock()
+
+
+def _http2_enabled() -> bool:
+    if not settings.FACE_SERVICE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        # httpx needs the optional h2 package (`httpx[http2]`) for HTTP/2.
+        return False
+    return True
+
+
+def _client_options() -> dict:
+    return {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=settings.FACE_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.FACE_SERVICE_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.FACE_SERVICE_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "timeout": httpx.Timeout(settings.FACE_SERVICE_TIMEOUT_SECONDS, connect=settings.FACE_SERVICE_CONNECT_TIMEOUT_SECONDS),
+    }
+
+
+def _timeout(route: str) -> httpx.Timeout:
+    seconds = {
+        "recognize": settings.FACE_SERVICE_RECOGNIZE_TIMEOUT_SECONDS,
+        "register": settings.FACE_SERVICE_REGISTER_TIMEOUT_SECONDS,
+        "delete": settings.FACE_SERVICE_DELETE_TIMEOUT_SECONDS,
+    }.get(route, settings.FACE_SERVICE_TIMEOUT_SECONDS)
+    return httpx.Timeout(seconds, connect=settings.FACE_SERVICE_CONNECT_TIMEOUT_SECONDS)
+
+
+def _backoff_seconds(attempt: int) -> float:
+    return settings.FACE_SERVICE_RETRY_BACKOFF_SECONDS * (2**attempt)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    with _clients_lock:
+        if _async_client is None or _async_client.is_closed:
+            _async_client = httpx.AsyncClient(**_client_options())
+        return _async_client
+
+
+def get_sync_client() -> httpx.Client:
+    """Shared by all camera worker threads; httpx.Client is thread-safe."""
+    global _sync_client
+    with _clients_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+def open_clients() -> None:
+    get_async_client()
+    get_sync_client()
+
+
+async def close_clients() -> None:
+    global _async_client, _sync_client
+    with _clients_lock:
+        async_client, sync_client = _async_client, _sync_client
+        _async_client = _sync_client = None
+    if async_client is not None:
+        await async_client.aclose()
+    if sync_client is not None:
+        sync_client.close()
+
+
+async def _request(
+    method: str, url: str, *, route: str, retry_errors: tuple[type[Exception], ...], **kwargs
+) -> httpx.Response:
+    attempts = 1 + (settings.FACE_SERVICE_RETRIES if retry_errors else 0)
+    for attempt in range(attempts):
+        last = attempt + 1 >= attempts
+        try:
+            resp = await get_async_client().request(method, url, timeout=_timeout(route), **kwargs)
+        except retry_errors:
+            if last:
+                raise
+        else:
+            if last or resp.status_code not in _RETRY_STATUSES:
+                return resp
+        await asyncio.sleep(_backoff_seconds(attempt))
+
+
+def request_sync(
+    method: str, url: str, *, route: str, retry_errors: tuple[type[Exception], ...], **kwargs
+) -> httpx.Response:
+    attempts = 1 + (settings.FACE_SERVICE_RETRIES if retry_errors else 0)
+    for attempt in range(attempts):
+        last = attempt + 1 >= attempts
+        try:
+            resp = get_sync_client().request(method, url, timeout=_timeout(route), **kwargs)
+        except retry_errors:
+            if last:
+                raise
+        else:
+            if last or resp.status_code not in _RETRY_STATUSES:
+                return resp
+        time.sleep(_backoff_seconds(attempt))
+
+
 def _error_payload(resp: httpx.Response) -> dict:
     try:
         body = resp.json()
@@ -16,64 +134,88 @@ def _error_payload(resp: httpx.Response) -> dict:
     return {"error": {"status_code": resp.status_code, "body": body}}
 
 
+def raw_recognize_headers(
+    source_type: str,
+    source_id: str,
+    timestamp: datetime,
+    policies: dict | None = None,
+    organization_id: str | None = None,
+    face_boxes: list[list[int]] | None = None,
+) -> dict:
+    """Metadata for /faces/recognize/raw, which takes the encoded image as the request body."""
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "X-Source-Type": source_type,
+        "X-Source-Id": source_id,
+        "X-Timestamp": timestamp.isoformat(),
+        "X-Policy": json.dumps(policies or {}, default=str),
+    }
+    if organization_id:
+        headers["X-Organization-Id"] = str(organization_id)
+    if face_boxes:
+        headers["X-Face-Boxes"] = json.dumps(face_boxes)
+    return headers
+
+
 async def recognize_faces(
     source_type: str,
     source_id: str,
     timestamp: datetime,
     image: UploadFile,
     policies: dict | None = None,
+    organization_id: str | None = None,
 ) -> dict:
     img_content = await image.read()
-    encoded = base64.b64encode(img_content).decode("utf-8")
-    content_type = image.content_type or "application/octet-stream"
-
-    payload = {
-        "source_type": source_type,
-        "source_id": source_id,
-        "timestamp": timestamp.isoformat(),
-        "image": f"data:{content_type};base64,{encoded}",
-        "policy": policies or {},
-    }
-    url = f"{settings.FACE_SERVICE_URL}/faces/recognize"
+    headers = raw_recognize_headers(source_type, source_id, timestamp, policies, organization_id)
+    url = f"{settings.FACE_SERVICE_URL}/faces/recognize/raw"
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(url, json=payload)
-            if resp.is_success:
-                return resp.json()
-            return _error_payload(resp)
+        # Recognition has side effects (tracks, unknown-face images); retry only requests that never arrived.
+        resp = await _request(
+            "POST", url, route="recognize", retry_errors=RETRY_CONNECT_ERRORS, content=img_content, headers=headers
+        )
+        if resp.is_success:
+            return resp.json()
+        return _error_payload(resp)
     except Exception as exc:
         return {"error": {"status_code": 503, "body": {"detail": str(exc)}}}
 
 
-async def register_faces(user_id: str, files: list[UploadFile], policies: dict | None = None) -> dict:
+async def register_faces(
+    user_id: str,
+    files: list[UploadFile],
+    policies: dict | None = None,
+    organization_id: str | None = None,
+) -> dict:
     url = f"{settings.FACE_SERVICE_URL}/faces/register"
     upload_files = []
     for file in files:
         content = await file.read()
         upload_files.append(("images", (file.filename, content, file.content_type)))
 
+    data = {"user_id": user_id}
+    if policies:
+        data["policy_json"] = json.dumps(policies)
+    if organization_id:
+        data["organization_id"] = str(organization_id)
+
     try:
-        # Enrollment can be slower on first model load / heavier image sets.
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            data = {"user_id": user_id}
-            if policies:
-                data["policy_json"] = json.dumps(policies)
-            resp = await client.post(url, data=data, files=upload_files)
-            if resp.is_success:
-                return resp.json()
-            return _error_payload(resp)
+        # Enrollment can be slower on first model load / heavier image sets; a retry could enroll twice.
+        resp = await _request("POST", url, route="register", retry_errors=(), data=data, files=upload_files)
+        if resp.is_success:
+            return resp.json()
+        return _error_payload(resp)
     except Exception as exc:
         return {"error": {"status_code": 503, "body": {"detail": str(exc)}}}
 
 
-async def delete_face(face_id: str) -> dict:
+async def delete_face(face_id: str, organization_id: str | None = None) -> dict:
     url = f"{settings.FACE_SERVICE_URL}/faces/{face_id}"
+    params = {"organization_id": str(organization_id)} if organization_id else None
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.delete(url)
-            if resp.is_success:
-                return resp.json()
-            return _error_payload(resp)
+        resp = await _request("DELETE", url, route="delete", retry_errors=RETRY_TRANSPORT_ERRORS, params=params)
+        if resp.is_success:
+            return resp.json()
+        return _error_payload(resp)
     except Exception as exc:
         return {"error": {"status_code": 503, "body": {"detail": str(exc)}}}
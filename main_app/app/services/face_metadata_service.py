@@ -72,7 +72,8 @@ def persist_recognition_metadata(
     for row in results:
         status = row.get("status")
         image_path = row.get("image_path")
-        if not image_path:
+        # Cached results repeat what face_service already reported for this track.
+        if not image_path or row.get("cached"):
             continue
 
         username = row.get("user_id")
@@ -10,12 +10,15 @@ from app.models import SystemConfig
 
 POLICY_DEFAULTS: dict[str, Any] = {
     "recognition.threshold": 0.8,
+    "recognition.ann.nprobe": 16,
+    "recognition.ann.ef_search": 64,
     "attendance.min_time_minutes": 480,
     "attendance.windows": [],
     "attendance.late_grace_minutes": 0,
     "retention.days": 35,
     "camera.stream.sampling_fps": 1,
     "camera.wall.min_face_area_ratio": 0.5,
+    "camera.motion.min_changed_ratio": 0.005,
     "enrollment.images.min_count": 3,
     "enrollment.images.max_count": 5,
     "quality.min_image_width": 720,
@@ -23,6 +26,7 @@ POLICY_DEFAULTS: dict[str, Any] = {
     "quality.min_face_width_px": 112,
     "quality.min_face_height_px": 112,
     "quality.min_laplacian_variance": 80.0,
+    "detection.long_side_px": 1280,
     "quality.max_yaw_degrees": 25,
     "quality.max_pitch_degrees": 25,
 }
@@ -45,6 +49,8 @@ def _validate_policy_value(key: str, value: Any) -> None:
         return
 
     if key in {
+        "recognition.ann.nprobe",
+        "recognition.ann.ef_search",
         "attendance.min_time_minutes",
         "attendance.late_grace_minutes",
         "retention.days",
@@ -57,12 +63,19 @@ def _validate_policy_value(key: str, value: Any) -> None:
         "quality.min_face_height_px",
         "quality.max_yaw_degrees",
         "quality.max_pitch_degrees",
+        "detection.long_side_px",
     }:
         n = _must_number(value, key)
         if n < 0 or int(n) != n:
             raise AppException(422, "POLICY_VALUE_INVALID", f"Policy '{key}' must be a non-negative integer")
         return
 
+    if key == "camera.motion.min_changed_ratio":
+        n = _must_number(value, key)
+        if n < 0 or n > 1:
+            raise AppException(422, "POLICY_VALUE_INVALID", f"Policy '{key}' must be in range [0, 1]")
+        return
+
     if key == "quality.min_laplacian_variance":
         n = _must_number(value, key)
         if n < 0:
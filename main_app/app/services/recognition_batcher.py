@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+
+from app.core.config import settings
+from app.services.face_client import RETRY_CONNECT_ERRORS, request_sync
+
+
+class RecognitionBatcher:
+    """Coalesces camera frames into /faces/recognize/batch calls.
+
+    Frames from any camera are queued; a dispatcher thread sends whatever
+    arrived within `max_wait_ms` of the first frame (up to `max_frames`) as
+    one request, with at most `max_in_flight` batches outstanding. Each
+    caller gets back the same envelope `/faces/recognize` would return.
+    """
+
+    def __init__(self, max_frames: int, max_wait_ms: float, max_in_flight: int = 2):
+        self.max_frames = max(1, int(max_frames))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.max_in_flight = max(1, int(max_in_flight))
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight: threading.Semaphore = threading.Semaphore(self.max_in_flight)
+        self._stop_event = threading.Event()
+        self.batches_sent = 0
+        self.frames_sent = 0
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="recognition-batch")
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(self._executor,),
+                daemon=True,
+                name="recognition-batcher",
+            )
+            self._thread.start()
+
+    def submit(
+        self,
+        frame: bytes,
+        *,
+        source_type: str,
+        source_id: str,
+        timestamp: datetime,
+        policies: dict | None = None,
+        organization_id: str | None = None,
+        face_boxes: list[list[int]] | None = None,
+    ) -> Future:
+        self._ensure_started()
+        future: Future = Future()
+        meta = {
+            "source_type": source_type,
+            "source_id": source_id,
+            "timestamp": timestamp.isoformat(),
+            "policy": policies or {},
+            "organization_id": str(organization_id) if organization_id else None,
+        }
+        if face_boxes:
+            meta["face_boxes"] = face_boxes
+        self._queue.put((frame, meta, future))
+        return future
+
+    def _collect(self) -> list:
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_frames:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, executor: ThreadPoolExecutor) -> None:
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            self._in_flight.acquire()
+            executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list) -> None:
+        try:
+            files = [("frames", (f"frame_{i}.jpg", frame, "image/jpeg")) for i, (frame, _, _) in enumerate(batch)]
+            metadata = json.dumps([meta for _, meta, _ in batch], default=str)
+            resp = request_sync(
+                "POST",
+                f"{settings.FACE_SERVICE_URL}/faces/recognize/batch",
+                route="recognize",
+                retry_errors=RETRY_CONNECT_ERRORS,
+                data={"metadata": metadata},
+                files=files,
+            )
+            with self._lock:
+                self.batches_sent += 1
+                self.frames_sent += len(batch)
+            if not resp.is_success:
+                error = {"error": {"status_code": resp.status_code, "body": {"detail": resp.text}}}
+                for _, _, future in batch:
+                    future.set_result(error)
+                return
+            frames = resp.json().get("data", {}).get("frames", [])
+            for (_, meta, future), frame in zip(batch, frames):
+                future.set_result(
+                    {
+                        "success": True,
+                        "code": "FACE_RECOGNIZED",
+                        "message": "Recognition completed",
+                        "data": frame,
+                        "meta": {"source_id": meta["source_id"], "batch_size": len(batch)},
+                        "errors": [],
+                    }
+                )
+            for _, _, future in batch[len(frames):]:
+                future.set_exception(RuntimeError("face_service returned fewer frames than were sent"))
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        finally:
+            self._in_flight.release()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        with self._lock:
+            thread, executor = self._thread, self._executor
+            self._thread = self._executor = None
+        if thread is not None:
+            thread.join(timeout=2.0)
+        if executor is not None:
+            executor.shutdown(wait=True)
+        # Nothing will send what is still queued; fail it now instead of leaving callers to time out.
+        while True:
+            try:
+                _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("recognition batcher stopped"))
+
+    def stats(self) -> dict:
+        with self._lock:
+            batches_sent, frames_sent = self.batches_sent, self.frames_sent
+        return {
+            "queued": self._queue.qsize(),
+            "batches_sent": batches_sent,
+            "frames_sent": frames_sent,
+            "avg_batch_size": round(frames_sent / batches_sent, 2) if batches_sent else 0.0,
+        }
+
+
+recognition_batcher = RecognitionBatcher(
+    settings.CAMERA_BATCH_MAX_FRAMES,
+    settings.CAMERA_BATCH_MAX_WAIT_MS,
+    settings.CAMERA_BATCH_MAX_IN_FLIGHT,
+)
@@ -34,7 +34,7 @@ class MainAppIntegrationTests(unittest.TestCase):
         user_service.hash_password = lambda p: f"hash::{p}"
         audit_service.write_audit_log = lambda *args, **kwargs: None
 
-        async def fake_register(user_id, files, policies=None):
+        async def fake_register(user_id, files, policies=None, organization_id=None):
             return {
                 "success": True,
                 "code": "FACE_REGISTERED",
@@ -52,7 +52,7 @@ class MainAppIntegrationTests(unittest.TestCase):
                 "errors": [],
             }
 
-        async def fake_recognize(source_type, source_id, timestamp, image, policies=None):
+        async def fake_recognize(source_type, source_id, timestamp, image, policies=None, organization_id=None):
             return {
                 "success": True,
                 "code": "FACE_RECOGNIZED",
@@ -0,0 +1,280 @@
+import threading
+import time
+import unittest
+from unittest import mock
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.services import camera_worker_service
+from app.services.camera_worker_service import CameraWorker, FrameJob, FrameQueue, FrameSampler, MotionGate, RecognitionPool
+
+
+def _worker(camera_id: str) -> CameraWorker:
+    return CameraWorker("org-1", {"camera_id": camera_id, "camera_type": "camera", "source": "unused"})
+
+
+def _job(worker: CameraWorker, frame) -> FrameJob:
+    return FrameJob(worker, frame, datetime.now(timezone.utc))
+
+
+class FrameQueueTests(unittest.TestCase):
+    def test_newer_frame_replaces_the_cameras_queued_frame(self):
+        q = FrameQueue(maxsize=4)
+        cam = _worker("CAM_1")
+        self.assertIsNone(q.put(_job(cam, 1)))
+        dropped = q.put(_job(cam, 2))
+
+        self.assertEqual(dropped.frame, 1)
+        self.assertEqual(q.depth(cam), 1)
+        self.assertEqual(q.get(timeout=0).frame, 2)
+
+    def test_full_queue_drops_the_oldest_job(self):
+        q = FrameQueue(maxsize=2)
+        cams = [_worker(f"CAM_{i}") for i in range(3)]
+        for i, cam in enumerate(cams):
+            dropped = q.put(_job(cam, i))
+
+        self.assertEqual(dropped.frame, 0)
+        self.assertEqual([q.get(timeout=0).frame for _ in range(2)], [1, 2])
+        self.assertIsNone(q.get(timeout=0))
+
+    def test_purge_removes_only_that_cameras_job(self):
+        q = FrameQueue(maxsize=4)
+        stopped, running = _worker("CAM_1"), _worker("CAM_2")
+        q.put(_job(stopped, 1))
+        q.put(_job(running, 2))
+
+        self.assertEqual(q.purge(stopped), 1)
+        self.assertEqual(q.depth(stopped), 0)
+        self.assertEqual(q.get(timeout=0).frame, 2)
+
+
+class RecognitionPoolTests(unittest.TestCase):
+    def test_workers_are_shared_across_cameras_and_count_per_camera(self):
+        pool = RecognitionPool(size=2, queue_size=8)
+        seen: list[tuple[str, int]] = []
+        done = threading.Event()
+        cams = [_worker(f"CAM_{i}") for i in range(3)]
+        for cam in cams:
+            def process(frame, ts, cam=cam):
+                seen.append((cam.camera["camera_id"], frame))
+                if len(seen) == 3:
+                    done.set()
+            cam.process = process
+
+        pool.ensure_started()
+        try:
+            for i, cam in enumerate(cams):
+                pool.submit(_job(cam, i))
+            self.assertTrue(done.wait(timeout=5))
+            time.sleep(0.05)
+        finally:
+            pool.stop()
+
+        self.assertEqual(sorted(seen), [("CAM_0", 0), ("CAM_1", 1), ("CAM_2", 2)])
+        for cam in cams:
+            self.assertEqual(cam.stats["frames_enqueued"], 1)
+            self.assertEqual(cam.stats["frames_processed"], 1)
+            self.assertEqual(cam.stats["frames_dropped"], 0)
+
+    def test_status_reports_counters_and_queue_depth(self):
+        cam = _worker("CAM_9")
+        original = camera_worker_service._pool
+        camera_worker_service._pool = RecognitionPool(size=1, queue_size=4)
+        try:
+            camera_worker_service._pool.submit(_job(cam, 1))
+            camera_worker_service._pool.submit(_job(cam, 2))
+            status = cam.status()
+        finally:
+            camera_worker_service._pool = original
+
+        self.assertEqual(status["queue_depth"], 1)
+        self.assertEqual(status["frames_enqueued"], 2)
+        self.assertEqual(status["frames_dropped"], 1)
+
+    def test_jobs_of_a_stopped_camera_are_not_processed(self):
+        pool = RecognitionPool(size=1, queue_size=4)
+        stopped, running = _worker("CAM_1"), _worker("CAM_2")
+        seen = []
+        done = threading.Event()
+        stopped.process = lambda frame, ts: seen.append(frame)
+        running.process = lambda frame, ts: (seen.append(frame), done.set())
+
+        pool.submit(_job(stopped, 1))
+        pool.submit(_job(running, 2))
+        stopped.stop()
+        pool.ensure_started()
+        try:
+            self.assertTrue(done.wait(timeout=5))
+        finally:
+            pool.stop()
+
+        self.assertEqual(seen, [2])
+        self.assertEqual(stopped.stats["frames_processed"], 0)
+
+
+class FrameSamplerTests(unittest.TestCase):
+    def test_samples_on_a_fixed_schedule_without_catching_up(self):
+        sampler = FrameSampler(fps=2)
+        ticks = [i * 0.1 for i in range(31)]
+        sampled = [t for t in ticks if sampler.due(t)]
+
+        self.assertEqual(len(sampled), 7)
+        self.assertAlmostEqual(sampler.effective_fps(now=3.0), 2.0, delta=0.1)
+        # After a stall the next sample is due immediately, then the schedule resumes.
+        self.assertTrue(sampler.due(10.0))
+        self.assertFalse(sampler.due(10.2))
+
+    def test_non_positive_rate_falls_back_to_one_fps(self):
+        self.assertEqual(FrameSampler(fps=0).fps, 1.0)
+
+    def test_rate_can_be_read_while_the_capture_thread_samples(self):
+        sampler = FrameSampler(fps=1000)
+        stop = threading.Event()
+        errors: list[Exception] = []
+
+        def capture():
+            now = 0.0
+            while not stop.is_set():
+                now += 0.001
+                sampler.due(now)
+
+        thread = threading.Thread(target=capture)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 0.3
+            while time.monotonic() < deadline:
+                try:
+                    sampler.effective_fps(now=5.0)
+                except RuntimeError as exc:
+                    errors.append(exc)
+        finally:
+            stop.set()
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+class _FakeCapture:
+    def __init__(self, frames: int):
+        self.remaining = frames
+        self.grabs = 0
+        self.retrieves = 0
+
+    def isOpened(self):
+        return True
+
+    def grab(self):
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        self.grabs += 1
+        time.sleep(0.001)
+        return True
+
+    def retrieve(self):
+        self.retrieves += 1
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+
+class CaptureLoopTests(unittest.TestCase):
+    def test_only_sampled_frames_are_decoded_and_camera_override_wins(self):
+        capture = _FakeCapture(frames=300)
+        cam = CameraWorker("org-1", {"camera_id": "CAM_1", "camera_type": "camera", "source": "unused", "sampling_fps": 20})
+        cam.motion_gate.min_changed_ratio = 0.0
+        submitted = []
+
+        class _Pool:
+            def ensure_started(self):
+                pass
+
+            def submit(self, job):
+                submitted.append(job)
+                if capture.remaining <= 0:
+                    cam.stop()
+
+        def grab_until_drained():
+            ok = _FakeCapture.grab(capture)
+            if not ok:
+                cam.stop()
+            return ok
+
+        capture.grab = grab_until_drained
+        with mock.patch.object(camera_worker_service.cv2, "VideoCapture", return_value=capture), \
+                mock.patch.object(camera_worker_service, "_pool", _Pool()):
+            cam.run()
+
+        self.assertEqual(cam.sampler.fps, 20)
+        self.assertEqual(capture.grabs, 300)
+        self.assertEqual(capture.retrieves, len(submitted))
+        self.assertLess(capture.retrieves, 50)
+        self.assertEqual(cam.stats["frames_grabbed"], 300)
+        self.assertEqual(cam.stats["frames_sampled"], len(submitted))
+
+
+class MotionGateTests(unittest.TestCase):
+    def _scene(self, person_at: int | None = None) -> np.ndarray:
+        frame = np.full((240, 320, 3), 90, dtype=np.uint8)
+        frame[:, :40] = 30
+        if person_at is not None:
+            frame[60:200, person_at:person_at + 60] = 220
+        return frame
+
+    def test_static_scene_is_gated_and_movement_is_forwarded(self):
+        gate = MotionGate(min_changed_ratio=0.01, width=80, hold_seconds=2.0)
+        rng = np.random.default_rng(0)
+
+        self.assertTrue(gate.changed(self._scene(), now=0.0))
+        self.assertTrue(gate.changed(self._scene(), now=1.0))  # still inside the initial hold
+        noisy = np.clip(self._scene().astype(np.int16) + rng.integers(-4, 5, (240, 320, 3)), 0, 255).astype(np.uint8)
+        self.assertFalse(gate.changed(noisy, now=3.0))
+        self.assertTrue(gate.changed(self._scene(person_at=100), now=4.0))
+        self.assertTrue(gate.changed(self._scene(person_at=100), now=5.0))  # held after motion
+        self.assertFalse(gate.changed(self._scene(person_at=100), now=7.0))
+
+    def test_zero_ratio_forwards_everything(self):
+        gate = MotionGate(min_changed_ratio=0.0, width=80, hold_seconds=0.0)
+        self.assertTrue(gate.changed(self._scene(), now=0.0))
+        self.assertTrue(gate.changed(self._scene(), now=10.0))
+
+
+class TrackAttendanceTests(unittest.TestCase):
+    def setUp(self):
+        for guard in (camera_worker_service._marked_tracks, camera_worker_service._recent_camera_events):
+            patcher = mock.patch.dict(guard, clear=True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_each_track_is_marked_once_and_the_user_cooldown_still_applies(self):
+        cam = _worker("CAM_T")
+        marks = []
+        result = lambda track_id: {"data": {"results": [
+            {"status": "matched", "user_id": "emp_1", "confidence": 0.95, "track_id": track_id},
+        ]}}
+        sightings = [("trk_a", 0.0), ("trk_a", 1.0), ("trk_a", 40.0), ("trk_b", 41.0), ("trk_c", 50.0)]
+        summaries = []
+        with mock.patch.object(
+            camera_worker_service.attendance_service,
+            "mark_camera_attendance_event",
+            side_effect=lambda *a, **kw: marks.append(kw["user_id"]),
+        ):
+            for track_id, now in sightings:
+                with mock.patch.object(camera_worker_service.time, "time", return_value=1_000.0 + now):
+                    summaries.append(
+                        cam._mark_camera_attendance(
+                            None,
+                            result=result(track_id),
+                            event_ts=datetime.now(),
+                            source_type="ceiling_camera",
+                            camera_id="CAM_T",
+                            direction="entry",
+                            threshold=0.8,
+                        )
+                    )
+
+        # trk_b is a new track past the cooldown; trk_c is the same person re-tracked 9 s later.
+        self.assertEqual(marks, ["emp_1", "emp_1"])
+        self.assertEqual([s["skipped_duplicate"] for s in summaries], [0, 1, 1, 0, 1])
@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+from datetime import datetime
+
+import httpx
+
+from app.core.config import settings
+from app.services import face_client
+
+
+class FaceClientPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.calls: list[str] = []
+        self.responses: list = []
+        self._orig = (settings.FACE_SERVICE_RETRIES, settings.FACE_SERVICE_RETRY_BACKOFF_SECONDS)
+        settings.FACE_SERVICE_RETRIES = 2
+        settings.FACE_SERVICE_RETRY_BACKOFF_SECONDS = 0.0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.calls.append(f"{request.method} {request.url.path}")
+            outcome = self.responses.pop(0) if self.responses else 200
+            if isinstance(outcome, Exception):
+                raise outcome
+            return httpx.Response(outcome, json={"success": outcome == 200, "data": {}})
+
+        transport = httpx.MockTransport(handler)
+        face_client._async_client = httpx.AsyncClient(transport=transport)
+        face_client._sync_client = httpx.Client(transport=transport)
+
+    def tearDown(self):
+        asyncio.run(face_client.close_clients())
+        settings.FACE_SERVICE_RETRIES, settings.FACE_SERVICE_RETRY_BACKOFF_SECONDS = self._orig
+
+    def test_idempotent_delete_retries_transport_errors_and_503(self):
+        self.responses = [httpx.ConnectError("refused"), 503, 200]
+        result = asyncio.run(face_client.delete_face("face_emp_1", organization_id="org-1"))
+        self.assertTrue(result["success"])
+        self.assertEqual(len(self.calls), 3)
+
+    def test_registration_is_not_retried(self):
+        self.responses = [503]
+        upload = type("Upload", (), {"filename": "a.jpg", "content_type": "image/jpeg"})()
+
+        async def read():
+            return b"jpeg"
+
+        upload.read = read
+        result = asyncio.run(face_client.register_faces("emp_1", [upload]))
+        self.assertEqual(result["error"]["status_code"], 503)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_recognize_retries_only_requests_that_never_arrived(self):
+        upload = type("Upload", (), {})()
+
+        async def read():
+            return b"jpeg"
+
+        upload.read = read
+        for failure, calls in ((httpx.ConnectError("refused"), 2), (httpx.ReadTimeout("slow"), 1), (httpx.RemoteProtocolError("reset"), 1)):
+            with self.subTest(failure=type(failure).__name__):
+                self.calls, self.responses = [], [failure, 200]
+                asyncio.run(face_client.recognize_faces("camera", "CAM_1", datetime.utcnow(), upload))
+                self.assertEqual(len(self.calls), calls)
+
+    def test_sync_client_is_reused_and_gives_up_after_retries(self):
+        self.responses = [503, 503, 503]
+        resp = face_client.request_sync("POST", "http://face/faces/recognize/raw", route="recognize", retry_errors=face_client.RETRY_CONNECT_ERRORS)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(len(self.calls), 3)
+        self.assertIs(face_client.get_sync_client(), face_client.get_sync_client())
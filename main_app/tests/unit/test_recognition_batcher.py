@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+
+import httpx
+
+from app.services import face_client
+from app.services.recognition_batcher import RecognitionBatcher
+
+
+class RecognitionBatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.requests: list[list[dict]] = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.entered.set()
+            self.gate.wait(timeout=5)
+            body = request.read().decode("latin-1")
+            start = body.index("[{")
+            metadata = json.loads(body[start:body.index("}]", start) + 2])
+            self.requests.append(metadata)
+            frames = [
+                {"frame_index": i, "source_id": meta["source_id"], "source_type": meta["source_type"], "results": [], "errors": []}
+                for i, meta in enumerate(metadata)
+            ]
+            return httpx.Response(200, json={"success": True, "data": {"frames": frames}})
+
+        face_client._sync_client = httpx.Client(transport=httpx.MockTransport(handler))
+        self.batcher = RecognitionBatcher(max_frames=4, max_wait_ms=200)
+
+    def tearDown(self):
+        self.batcher.stop()
+        face_client._sync_client.close()
+        face_client._sync_client = None
+
+    def _submit(self, camera: str):
+        return self.batcher.submit(
+            b"jpeg",
+            source_type="camera",
+            source_id=camera,
+            timestamp=datetime.now(timezone.utc),
+            organization_id="org-1",
+        )
+
+    def test_frames_from_many_cameras_share_a_request_in_order(self):
+        futures = [self._submit(f"CAM_{i}") for i in range(6)]
+        results = [f.result(timeout=5) for f in futures]
+
+        self.assertEqual([r["data"]["source_id"] for r in results], [f"CAM_{i}" for i in range(6)])
+        self.assertEqual([len(batch) for batch in self.requests], [4, 2])
+        self.assertEqual(self.requests[0][0]["organization_id"], "org-1")
+        self.assertEqual(self.batcher.stats()["frames_sent"], 6)
+
+    def test_stop_fails_frames_still_queued(self):
+        self.batcher = RecognitionBatcher(max_frames=1, max_wait_ms=10, max_in_flight=1)
+        self.gate.clear()
+        futures = [self._submit(f"CAM_{i}") for i in range(3)]
+        # CAM_0 is in flight and CAM_1 waits for its slot; CAM_2 is never collected.
+        self.assertTrue(self.entered.wait(timeout=5))
+        while self.batcher.stats()["queued"] > 1:
+            time.sleep(0.01)
+        threading.Timer(0.3, self.gate.set).start()
+        self.batcher.stop()
+
+        self.assertEqual(futures[0].result(timeout=5)["data"]["source_id"], "CAM_0")
+        self.assertEqual(futures[1].result(timeout=5)["data"]["source_id"], "CAM_1")
+        with self.assertRaisesRegex(RuntimeError, "stopped"):
+            futures[2].result(timeout=0)
+        self.assertEqual(self.batcher.stats()["queued"], 0)
@@ -0,0 +1,82 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+FACE_SERVICE_ROOT = Path(__file__).resolve().parents[2] / "face_service"
+
+
+def previous_align(image: np.ndarray, box: list[int], landmarks: dict) -> np.ndarray:
+    # The aligner before template alignment: rotate the whole frame, then crop and resize.
+    x1, y1, x2, y2 = box
+    left_eye, right_eye = landmarks["left_eye"], landmarks["right_eye"]
+    angle = np.degrees(np.arctan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0])) - 180.0
+    center = (int((left_eye[0] + right_eye[0]) / 2.0), int((left_eye[1] + right_eye[1]) / 2.0))
+    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+    image = cv2.warpAffine(image, M, (image.shape[1], image.shape[0]), flags=cv2.INTER_CUBIC)
+    pts = [(int(M[0, 0] * x + M[0, 1] * y + M[0, 2]), int(M[1, 0] * x + M[1, 1] * y + M[1, 2])) for x, y in [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]]
+    x1, y1 = min(p[0] for p in pts), min(p[1] for p in pts)
+    x2, y2 = max(p[0] for p in pts), max(p[1] for p in pts)
+    pad = int((x2 - x1) * 0.1)
+    h, w = image.shape[:2]
+    return cv2.resize(image[max(0, y1 - pad):min(h, y2 + pad), max(0, x1 - pad):min(w, x2 + pad)], (112, 112))
+
+
+def synthetic_faces(width: int, height: int, count: int, seed: int) -> list[tuple[list[int], dict]]:
+    from app.engine.aligner import ARCFACE_TEMPLATE, LANDMARK_ORDER
+
+    rng = np.random.default_rng(seed)
+    faces = []
+    for _ in range(count):
+        size = float(rng.uniform(0.1, 0.25) * height)
+        x, y = rng.uniform(0, width - size), rng.uniform(0, height - size)
+        angle = np.radians(rng.uniform(-20, 20))
+        R = (size / 112.0) * np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        points = ARCFACE_TEMPLATE @ R.T + [x, y]
+        faces.append(([int(x), int(y), int(x + size), int(y + size)], {n: p.tolist() for n, p in zip(LANDMARK_ORDER, points)}))
+    return faces
+
+
+def per_face_ms(fn, image, faces, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for box, landmarks in faces:
+            fn(image, box, landmarks)
+    return (time.perf_counter() - start) * 1000.0 / (repeat * len(faces))
+
+
+def run(args) -> None:
+    sys.path.insert(0, str(FACE_SERVICE_ROOT))
+    from app.engine.aligner import FaceAligner
+
+    cv2.setNumThreads(args.threads)
+    template, legacy = FaceAligner("template"), FaceAligner("legacy")
+    print(f"faces_per_frame={args.faces} repeat={args.repeat} opencv_threads={args.threads}")
+    print(f"{'frame':<11} {'previous_ms':>12} {'legacy_ms':>10} {'template_ms':>12}")
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        image = np.random.default_rng(args.seed).integers(0, 255, (height, width, 3), dtype=np.uint8)
+        faces = synthetic_faces(width, height, args.faces, args.seed)
+        print(
+            f"{size:<11} {per_face_ms(previous_align, image, faces, args.repeat):>12.3f} "
+            f"{per_face_ms(legacy.align, image, faces, args.repeat):>10.3f} "
+            f"{per_face_ms(template.align, image, faces, args.repeat):>12.3f}"
+        )
+
+
+def main():
+    p = argparse.ArgumentParser(description="Per-face alignment cost across frame resolutions")
+    p.add_argument("--sizes", nargs="+", default=["640x480", "1280x720", "1920x1080", "3840x2160"])
+    p.add_argument("--faces", type=int, default=4)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--threads", type=int, default=1)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+FACE_SERVICE_ROOT = Path(__file__).resolve().parents[2] / "face_service"
+
+
+def synthetic_gallery(identities: int, per_identity: int, dim: int, noise: float, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((identities, dim)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    gallery = np.repeat(centers, per_identity, axis=0)
+    gallery += noise * rng.standard_normal(gallery.shape).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    return centers, gallery
+
+
+def make_queries(centers: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, centers.shape[0], count)
+    queries = centers[picks] + noise * rng.standard_normal((count, centers.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries.astype(np.float32)
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def measure(store, index, queries: np.ndarray, top_k: int, knobs: dict):
+    store.index = index
+    latencies = []
+    ids_out = []
+    for q in queries:
+        start = time.perf_counter()
+        _, ids = store.search(q, top_k=top_k, **knobs)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        ids_out.append(ids[0])
+    start = time.perf_counter()
+    store.search(queries, top_k=top_k, **knobs)
+    batch_ms = (time.perf_counter() - start) * 1000.0
+    return np.vstack(ids_out), latencies, batch_ms
+
+
+def recall(truth: np.ndarray, found: np.ndarray, k: int) -> tuple[float, float]:
+    at1 = float(np.mean(truth[:, 0] == found[:, 0]))
+    atk = float(np.mean([len(set(t[:k]) & set(f[:k])) / k for t, f in zip(truth, found)]))
+    return at1, atk
+
+
+def run(args) -> None:
+    os.environ["FAISS_IVF_NLIST"] = str(args.nlist)
+    os.environ["FAISS_HNSW_M"] = str(args.hnsw_m)
+    os.environ["FAISS_PQ_M"] = str(args.pq_m)
+    sys.path.insert(0, str(FACE_SERVICE_ROOT))
+    from app.vector.embedding_store import EmbeddingStore
+
+    store = EmbeddingStore(args.dim, "unused.index", index_type="flat")
+    if args.index_path:
+        source = EmbeddingStore(args.dim, args.index_path)
+        source.load()
+        _, gallery = source.ids_and_vectors()
+        queries = gallery[np.random.default_rng(args.seed).integers(0, gallery.shape[0], args.queries)]
+        queries = queries + args.noise * np.random.default_rng(args.seed).standard_normal(queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    else:
+        centers, gallery = synthetic_gallery(args.identities, args.per_identity, args.dim, args.noise, args.seed)
+        queries = make_queries(centers, args.queries, args.noise, args.seed)
+
+    print(f"gallery={gallery.shape[0]} dim={gallery.shape[1]} queries={queries.shape[0]} top_k={args.top_k}")
+    flat = store.build_index(gallery, index_type="flat")
+    truth, flat_lat, flat_batch = measure(store, flat, queries, args.top_k, {})
+    print(f"{'index':<10} {'knob':<14} {'build_s':>8} {'recall@1':>9} {'recall@k':>9} {'p50_ms':>8} {'p95_ms':>8} {'batch_ms':>9}")
+    print(
+        f"{'flat':<10} {'-':<14} {0.0:>8.2f} {1.0:>9.3f} {1.0:>9.3f} "
+        f"{percentile(flat_lat, 0.5):>8.3f} {percentile(flat_lat, 0.95):>8.3f} {flat_batch:>9.2f}"
+    )
+
+    sweeps = {
+        "ivf_flat": [("nprobe", v) for v in args.nprobe],
+        "ivf_pq": [("nprobe", v) for v in args.nprobe],
+        "hnsw": [("ef_search", v) for v in args.ef_search],
+    }
+    for index_type in args.types:
+        if index_type == "flat":
+            continue
+        start = time.perf_counter()
+        index = store.build_index(gallery, index_type=index_type)
+        build_s = time.perf_counter() - start
+        for knob, value in sweeps[index_type]:
+            found, lat, batch_ms = measure(store, index, queries, args.top_k, {knob: value})
+            at1, atk = recall(truth, found, args.top_k)
+            print(
+                f"{index_type:<10} {f'{knob}={value}':<14} {build_s:>8.2f} {at1:>9.3f} {atk:>9.3f} "
+                f"{percentile(lat, 0.5):>8.3f} {percentile(lat, 0.95):>8.3f} {batch_ms:>9.2f}"
+            )
+
+
+def main():
+    p = argparse.ArgumentParser(description="Recall vs latency of ANN index types against the flat index")
+    p.add_argument("--index-path", default=None, help="existing flat faiss.index to use as the gallery")
+    p.add_argument("--identities", type=int, default=20000)
+    p.add_argument("--per-identity", type=int, default=5)
+    p.add_argument("--dim", type=int, default=512)
+    p.add_argument("--noise", type=float, default=0.05)
+    p.add_argument("--queries", type=int, default=500)
+    p.add_argument("--top-k", type=int, default=5)
+    p.add_argument("--types", nargs="+", default=["ivf_flat", "hnsw", "ivf_pq"])
+    p.add_argument("--nlist", type=int, default=1024)
+    p.add_argument("--pq-m", type=int, default=64)
+    p.add_argument("--hnsw-m", type=int, default=32)
+    p.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    p.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+FACE_SERVICE_ROOT = Path(__file__).resolve().parents[2] / "face_service"
+
+
+def previous_preprocess(embedder, faces: list[np.ndarray]) -> np.ndarray:
+    # FaceEmbedder._run_chunk input handling before the preallocated buffers.
+    x = np.concatenate([embedder._face_tech_preprocess(face) for face in faces], axis=0)
+    if embedder.fixed_batch_size is not None and len(faces) < embedder.fixed_batch_size:
+        pad = np.zeros((embedder.fixed_batch_size - len(faces), *x.shape[1:]), dtype=np.float32)
+        x = np.concatenate([x, pad], axis=0)
+    if embedder.input_layout == "NCHW":
+        x = np.ascontiguousarray(x.transpose(0, 3, 1, 2))
+    return x
+
+
+def current_preprocess(embedder, faces: list[np.ndarray]) -> np.ndarray:
+    buffers = embedder._buffers()
+    for row, face in enumerate(faces):
+        embedder._fill(buffers, row, face)
+    return buffers.input
+
+
+def previous_embed(embedder, faces: list[np.ndarray]) -> np.ndarray:
+    step = embedder._chunk_size()
+    outputs = []
+    for start in range(0, len(faces), step):
+        chunk = faces[start:start + step]
+        out = embedder.session.run(None, {embedder.input_name: previous_preprocess(embedder, chunk)})[0]
+        outputs.append(out[:len(chunk)].astype(np.float32))
+    return embedder._normalize(np.vstack(outputs))
+
+
+def measure(fn, embedder, faces: list[np.ndarray], repeat: int) -> tuple[float, float, int]:
+    fn(embedder, faces)  # warm-up: buffers, ORT arenas
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(embedder, faces)
+    per_face_ms = (time.perf_counter() - start) * 1000.0 / (repeat * len(faces))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    fn(embedder, faces)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Blocks still alive after the call (results, new buffers) plus the transient peak.
+    new_blocks = sum(stat.count_diff for stat in after.compare_to(before, "lineno") if stat.count_diff > 0)
+    return per_face_ms, (peak - base) / 1024.0, new_blocks
+
+
+def run(args) -> None:
+    sys.path.insert(0, str(FACE_SERVICE_ROOT))
+    from app.core.config import settings
+    from app.engine.embedder import FaceEmbedder
+
+    if args.model:
+        settings.MODEL_PATH = args.model
+    settings.EMBEDDING_MAX_BATCH_SIZE = args.batch
+    embedder = FaceEmbedder()
+    embedder.load()
+    rng = np.random.default_rng(args.seed)
+    faces = [rng.integers(0, 255, (112, 112, 3), dtype=np.uint8) for _ in range(args.batch)]
+
+    rows = [
+        ("preprocess", "previous", previous_preprocess),
+        ("preprocess", "current", current_preprocess),
+    ]
+    if embedder.dev_mode:
+        print(f"no model at {settings.MODEL_PATH}: preprocessing only")
+    else:
+        rows += [("embed_batch", "previous", previous_embed), ("embed_batch", "current", FaceEmbedder.embed_batch)]
+
+    print(f"batch={args.batch} repeat={args.repeat} layout={embedder.input_layout} io_binding={embedder.io_binding}")
+    print(f"{'stage':<12} {'version':<9} {'ms_per_face':>12} {'peak_kb':>10} {'new_blocks':>11}")
+    for stage, version, fn in rows:
+        ms, peak_kb, blocks = measure(fn, embedder, faces, args.repeat)
+        print(f"{stage:<12} {version:<9} {ms:>12.4f} {peak_kb:>10.1f} {blocks:>11}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Embedder input preparation: per-face time and allocations before/after buffer reuse")
+    p.add_argument("--model", default="", help="ArcFace ONNX model (defaults to MODEL_PATH)")
+    p.add_argument("--batch", type=int, default=16)
+    p.add_argument("--repeat", type=int, default=50)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
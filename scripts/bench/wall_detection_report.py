@@ -0,0 +1,84 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+FACE_SERVICE_ROOT = ROOT / "face_service"
+
+
+def load_frames(pattern: str, width: int) -> list[np.ndarray]:
+    frames = []
+    for path in sorted(ROOT.glob(pattern)):
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        if width and img.shape[1] != width:
+            height = round(img.shape[0] * width / img.shape[1])
+            img = cv2.resize(img, (width, height))
+        frames.append(img)
+    return frames
+
+
+def cpu_ms(fn, frames: list[np.ndarray], repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        for frame in frames:
+            fn(frame)
+    return (time.process_time() - start) * 1000.0 / (repeat * len(frames))
+
+
+def run(args) -> None:
+    sys.path.insert(0, str(FACE_SERVICE_ROOT))
+    from app.core.config import settings
+    from app.engine.detector import detector
+
+    cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    frames = load_frames(args.images, args.width)
+    if not frames:
+        raise SystemExit(f"no images matched {args.images}")
+
+    def wall_check(frame):
+        # Same call main_app's _validate_wall_frame makes.
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(64, 64))
+        return [[int(x), int(y), int(x + w), int(y + h)] for x, y, w, h in faces]
+
+    hints = [wall_check(frame) for frame in frames]
+    usable = [(f, h) for f, h in zip(frames, hints) if len(h) == 1]
+    if not usable:
+        raise SystemExit("the wall check found no single-face frames to compare")
+    frames = [f for f, _ in usable]
+    hint_of = {id(f): h for f, h in usable}
+    settings.FACE_HINT_MARGIN = args.margin
+
+    main_app_ms = cpu_ms(wall_check, frames, args.repeat)
+    full_ms = cpu_ms(lambda f: detector.detect(f, min_laplacian_variance=0), frames, args.repeat)
+    refine_ms = cpu_ms(lambda f: detector.detect_in_regions(f, hint_of[id(f)], min_laplacian_variance=0), frames, args.repeat)
+    trust_ms = cpu_ms(lambda f: detector.faces_from_hints(f, hint_of[id(f)], min_laplacian_variance=0), frames, args.repeat)
+    refined_found = sum(1 for f in frames if detector.detect_in_regions(f, hint_of[id(f)], min_laplacian_variance=0))
+
+    print(f"frames={len(frames)} size={frames[0].shape[1]}x{frames[0].shape[0]} repeat={args.repeat} margin={args.margin}")
+    print(f"{'mode':<8} {'main_app_ms':>12} {'face_service_ms':>16} {'total_ms':>9} {'saved_ms':>9}")
+    baseline = main_app_ms + full_ms
+    for mode, service_ms in (("ignore", full_ms), ("refine", refine_ms), ("trust", trust_ms)):
+        total = main_app_ms + service_ms
+        print(f"{mode:<8} {main_app_ms:>12.2f} {service_ms:>16.2f} {total:>9.2f} {baseline - total:>9.2f}")
+    print(f"refine kept a face on {refined_found}/{len(frames)} frames")
+
+
+def main():
+    p = argparse.ArgumentParser(description="CPU per wall-camera frame with and without forwarded face boxes")
+    p.add_argument("--images", default="storage/images/users/*/original/*.jpg", help="glob relative to the repo root")
+    p.add_argument("--width", type=int, default=1280, help="resize frames to this width (0 keeps the original)")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--margin", type=float, default=0.25)
+    args = p.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
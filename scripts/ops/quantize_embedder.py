@@ -0,0 +1,112 @@
+import argparse
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+FACE_SERVICE_ROOT = ROOT / "face_service"
+
+
+def quantize(fp32_path: Path, int8_path: Path) -> None:
+    # Needs the `onnx` package next to onnxruntime: pip install onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path.parent.mkdir(parents=True, exist_ok=True)
+    # The CPU ConvInteger kernel only takes uint8 weights; signed weights fail to load.
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QUInt8)
+    print(f"wrote {int8_path} ({int8_path.stat().st_size / 1e6:.1f} MB, fp32 {fp32_path.stat().st_size / 1e6:.1f} MB)")
+
+
+def load_faces(pattern: str) -> tuple[list[np.ndarray], list[str]]:
+    # Held-out aligned crops laid out as <...>/<identity>/aligned/<file>.
+    faces, labels = [], []
+    for path in sorted(ROOT.glob(pattern)):
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        faces.append(img)
+        labels.append(path.parent.parent.name)
+    return faces, labels
+
+
+def embed_with(model_path: Path, faces: list[np.ndarray]) -> np.ndarray:
+    from app.core.config import settings
+    from app.engine.embedder import FaceEmbedder
+
+    settings.EMBEDDING_PRECISION = "fp32"
+    settings.MODEL_PATH = str(model_path)
+    embedder = FaceEmbedder()
+    embedder.load()
+    if embedder.dev_mode:
+        raise SystemExit(f"could not load {model_path}")
+    return embedder.embed_batch(faces)
+
+
+def top1_accuracy(embeddings: np.ndarray, labels: list[str]) -> float:
+    # Leave-one-out nearest neighbour over the held-out set.
+    sims = embeddings @ embeddings.T
+    np.fill_diagonal(sims, -np.inf)
+    nearest = sims.argmax(axis=1)
+    return float(np.mean([labels[i] == labels[j] for i, j in enumerate(nearest)]))
+
+
+def verification_accuracy(embeddings: np.ndarray, labels: list[str], threshold: float) -> float:
+    sims = embeddings @ embeddings.T
+    rows, cols = np.triu_indices(len(labels), k=1)
+    same = np.array([labels[i] == labels[j] for i, j in zip(rows, cols)])
+    return float(np.mean((sims[rows, cols] >= threshold) == same))
+
+
+def check(fp32_path: Path, int8_path: Path, args) -> bool:
+    faces, labels = load_faces(args.images)
+    identities = defaultdict(int)
+    for label in labels:
+        identities[label] += 1
+    if len(identities) < 2:
+        raise SystemExit(f"need at least two identities under {args.images}")
+
+    fp32 = embed_with(fp32_path, faces)
+    int8 = embed_with(int8_path, faces)
+    drift = np.sum(fp32 * int8, axis=1)
+    fp32_top1, int8_top1 = top1_accuracy(fp32, labels), top1_accuracy(int8, labels)
+    fp32_ver = verification_accuracy(fp32, labels, args.threshold)
+    int8_ver = verification_accuracy(int8, labels, args.threshold)
+
+    print(f"faces={len(faces)} identities={len(identities)} threshold={args.threshold}")
+    print(f"fp32_vs_int8_cosine mean={drift.mean():.4f} p5={np.percentile(drift, 5):.4f} min={drift.min():.4f}")
+    print(f"{'model':<6} {'top1':>7} {'verification':>13}")
+    print(f"{'fp32':<6} {fp32_top1:>7.4f} {fp32_ver:>13.4f}")
+    print(f"{'int8':<6} {int8_top1:>7.4f} {int8_ver:>13.4f}")
+
+    ok = drift.mean() >= args.min_cosine and fp32_top1 - int8_top1 <= args.max_top1_drop
+    print("PASS" if ok else "FAIL: keep EMBEDDING_PRECISION=fp32")
+    return ok
+
+
+def run(args) -> None:
+    sys.path.insert(0, str(FACE_SERVICE_ROOT))
+    fp32_path, int8_path = Path(args.model), Path(args.output)
+    if not args.check_only:
+        quantize(fp32_path, int8_path)
+    if not check(fp32_path, int8_path, args):
+        sys.exit(1)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Quantize the ArcFace model to INT8 and compare it with FP32 on held-out faces")
+    p.add_argument("--model", default=str(FACE_SERVICE_ROOT / "models" / "arc.onnx"))
+    p.add_argument("--output", default=str(FACE_SERVICE_ROOT / "models" / "arc.int8.onnx"))
+    p.add_argument("--images", default="storage/images/users/*/aligned/*.png", help="glob relative to the repo root")
+    p.add_argument("--threshold", type=float, default=0.8, help="verification threshold (CONFIDENCE_THRESHOLD)")
+    p.add_argument("--min-cosine", type=float, default=0.99, help="minimum mean cosine between fp32 and int8 embeddings")
+    p.add_argument("--max-top1-drop", type=float, default=0.01)
+    p.add_argument("--check-only", action="store_true", help="skip quantization and only compare existing models")
+    args = p.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
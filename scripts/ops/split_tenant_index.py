@@ -0,0 +1,84 @@
+import argparse
+import sys
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+FACE_SERVICE_ROOT = Path(__file__).resolve().parents[2] / "face_service"
+
+
+def _organization_key(value) -> str:
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return str(value)
+
+
+def embedding_owners(database_url: str) -> dict[str, list[int]]:
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(database_url)
+    owners: dict[str, list[int]] = defaultdict(list)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT organization_id, embedding_index FROM face_embeddings WHERE organization_id IS NOT NULL")
+        )
+        for organization_id, embedding_index in rows:
+            owners[_organization_key(organization_id)].append(int(embedding_index))
+    return owners
+
+
+def run(args) -> None:
+    sys.path.insert(0, str(FACE_SERVICE_ROOT))
+    from app.vector.embedding_store import EmbeddingStore
+    from app.vector.id_map import IDMapStore
+
+    source = EmbeddingStore(args.dim, args.index_path)
+    source.load()
+    source_map = IDMapStore(args.id_map_db)
+    source_map.load()
+    ids, vectors = source.ids_and_vectors()
+    position = {int(i): row for row, i in enumerate(ids)}
+
+    for organization_id, wanted in sorted(embedding_owners(args.database_url).items()):
+        directory = Path(args.tenant_root) / organization_id
+        store = EmbeddingStore(args.dim, str(directory / "faiss.index"))
+        store.load()
+        id_map = IDMapStore(str(directory / "id_map.sqlite3"))
+        id_map.load()
+
+        present = set(store.all_ids().tolist())
+        copy_ids = sorted({i for i in wanted if i in position and i not in present})
+        missing = sum(1 for i in wanted if i not in position)
+        if copy_ids and not args.dry_run:
+            # Keep the embedding IDs main_app already stored for this organization.
+            store.add(vectors[np.asarray([position[i] for i in copy_ids])], ids=copy_ids)
+            for embedding_id, payload in zip(copy_ids, source_map.get_many(copy_ids)):
+                if payload is not None:
+                    id_map.set(embedding_id, payload)
+            id_map.save()
+            store.save()
+        store.wal.close()
+        id_map.close()
+        print(f"{organization_id}: copied={len(copy_ids)} already_present={len(present & set(wanted))} missing={missing}")
+
+    source.wal.close()
+    source_map.close()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Copy the shared face index into per-organization partitions")
+    p.add_argument("--database-url", required=True, help="main_app DATABASE_URL (reads face_embeddings)")
+    p.add_argument("--index-path", default="face_service/storage/embeddings/faiss.index")
+    p.add_argument("--id-map-db", default="face_service/storage/embeddings/id_map.sqlite3")
+    p.add_argument("--tenant-root", default="face_service/storage/embeddings/tenants")
+    p.add_argument("--dim", type=int, default=512)
+    p.add_argument("--dry-run", action="store_true")
+    args = p.parse_args()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()